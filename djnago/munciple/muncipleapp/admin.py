@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Complaint
+
+
+@admin.register(Complaint)
+class ComplaintAdmin(admin.ModelAdmin):
+    list_display = ('complaint_id', 'service_code', 'status', 'location', 'created')
+    list_filter = ('service_code', 'status')
+    search_fields = ('complaint_id', 'location', 'description')
@@ -0,0 +1,96 @@
+"""
+Streaming complaint export: CSV or newline-delimited JSON, optionally gzipped.
+
+Rows are read in keyset batches over the (created, id) index and encoded into ~64 KB
+chunks as they go, so memory stays flat at any table size. The generators feed both the
+`export_complaints` management command and the StreamingHttpResponse of the export view.
+The agent's complaint_export.py carries the same encoders for its own store; keep them in step.
+"""
+import io
+import csv
+import json
+import zlib
+
+from django.db.models import Q
+
+from .models import Complaint
+
+EXPORT_FIELDS = (
+    'complaint_id', 'service_code', 'service_type', 'description', 'location', 'status', 'created', 'updated',
+)
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+BATCH_SIZE = 2000
+CHUNK_BYTES = 64 * 1024
+
+
+def export_rows(service_code=None, status=None, since=None, until=None, batch_size=BATCH_SIZE):
+    """Oldest-first complaint dicts; each batch is its own short query, never one long-lived cursor"""
+    queryset = Complaint.objects.all()
+    if service_code:
+        queryset = queryset.filter(service_code=service_code.upper())
+    if status:
+        queryset = queryset.filter(status=status)
+    if since:
+        queryset = queryset.filter(created__gte=since)
+    if until:
+        queryset = queryset.filter(created__lt=until)
+    queryset = queryset.order_by('created', 'id')
+
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(created__gt=last[0]) | Q(created=last[0], id__gt=last[1]))
+        rows = list(page.values('id', *EXPORT_FIELDS)[:batch_size])
+        for row in rows:
+            row = dict(row)
+            row.pop('id')
+            row['created'] = row['created'].isoformat()
+            row['updated'] = row['updated'].isoformat()
+            yield row
+        if len(rows) < batch_size:
+            return
+        last = (rows[-1]['created'], rows[-1]['id'])
+
+
+def iter_csv(rows, chunk_bytes=CHUNK_BYTES):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows, chunk_bytes=CHUNK_BYTES):
+    lines, size = [], 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield ''.join(lines)
+            lines, size = [], 0
+    yield ''.join(lines)
+
+
+def gzip_chunks(chunks, level=6):
+    # wbits=31: a complete gzip member, compressed incrementally
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(rows, fmt='csv', compress=False):
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    encoded = (chunk.encode('utf-8') for chunk in (iter_csv if fmt == 'csv' else iter_ndjson)(rows))
+    return gzip_chunks(encoded) if compress else encoded
@@ -0,0 +1,70 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from muncipleapp.models import Complaint
+from muncipleapp.search import build_search_text, search_complaints
+
+# Codes and service types as the agent files them (MunicipalAssistant.service_codes)
+SERVICES = {
+    'WS': ('water supply', ['paani nahi aa raha', 'पानी नहीं आ रहा', 'pipe burst near gate', 'ganda paani aa raha hai']),
+    'GC': ('garbage collection', ['kachra nahi utha', 'कचरा तीन दिन से पड़ा है', 'garbage not collected']),
+    'RI': ('road issues', ['sadak pe bada gaddha', 'सड़क टूटी हुई है', 'pothole on main road']),
+    'SL': ('street light', ['street light kharab', 'बत्ती नहीं जल रही', 'light not working at night']),
+    'DR': ('drainage', ['naali jam hai', 'नाली बंद है पानी भर गया', 'drain overflowing']),
+}
+AREAS = ['Sector 12', 'Civil Lines', 'गांधी नगर', 'Rajiv Chowk', 'Model Town', 'शास्त्री नगर', 'Old Market']
+QUERIES = [
+    ("paani", None), ("पानी नहीं", None), ("pani nahin", None), ("kachra", None), ("सड़क", None), ("sadak gadha", None),
+    ("street light", None), ("gandhi nagar", None), ("pan", None), ("pani", "WS"), ("pani", "SL"), ("kachra", "GC"),
+]
+
+
+class Command(BaseCommand):
+    help = "Time ranked search queries, optionally after seeding synthetic complaints (do not seed a real database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Synthetic complaints to insert first')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+        self.stdout.write(f"{Complaint.objects.count()} complaints indexed")
+        for query, service_code in QUERIES:
+            timings = []
+            for _ in range(options['repeat']):
+                rows, took_ms = search_complaints(query, options['limit'], service_code)
+                timings.append(took_ms)
+            self.stdout.write(
+                f"  {query!r:>16} {service_code or '--'}: {len(rows):3d} hits  median {statistics.median(timings):7.2f} ms"
+                f"  max {max(timings):7.2f} ms"
+            )
+
+    def seed(self, count):
+        rng = random.Random(7)
+        now = timezone.now()
+        start = time.perf_counter()
+        prefix = f"BM{int(time.time())}"
+        batch = []
+        with transaction.atomic():
+            for n in range(count):
+                code = rng.choice(list(SERVICES))
+                service_type, phrases = SERVICES[code]
+                description = f"{rng.choice(phrases)}, {rng.choice(phrases)} - ghar no. {rng.randint(1, 999)}"
+                location = rng.choice(AREAS)
+                batch.append(Complaint(
+                    complaint_id=f"{prefix}-{n:07d}", service_code=code, service_type=service_type,
+                    description=description, location=location, created=now,
+                    search_text=build_search_text(code, service_type, description, location),
+                ))
+                if len(batch) >= 5000:
+                    Complaint.objects.bulk_create(batch)
+                    batch = []
+            Complaint.objects.bulk_create(batch)
+        self.stdout.write(f"Seeded {count} complaints in {time.perf_counter() - start:.1f}s")
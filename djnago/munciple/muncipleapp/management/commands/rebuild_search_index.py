@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from muncipleapp.models import Complaint
+from muncipleapp.search import FTS_TABLE, REBUILD_SQL, build_search_text, fts_available
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Recompute the normalized search text and rebuild the FTS5 index (run after changing search.py)"
+
+    def handle(self, *args, **options):
+        changed = 0
+        batch = []
+        rows = Complaint.objects.only('service_code', 'service_type', 'description', 'location', 'search_text')
+        with transaction.atomic():
+            for complaint in rows.iterator(chunk_size=BATCH_SIZE):
+                text = build_search_text(
+                    complaint.service_code, complaint.service_type, complaint.description, complaint.location)
+                if text != complaint.search_text:
+                    complaint.search_text = text
+                    batch.append(complaint)
+                if len(batch) >= BATCH_SIZE:
+                    changed += Complaint.objects.bulk_update(batch, ['search_text'])
+                    batch = []
+            changed += Complaint.objects.bulk_update(batch, ['search_text'])
+
+        if fts_available():
+            with connection.cursor() as cursor:
+                cursor.execute(REBUILD_SQL)
+                # Merge index segments so queries touch as few b-trees as possible
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} complaints; search index rebuilt"))
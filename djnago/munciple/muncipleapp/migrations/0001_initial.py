@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Complaint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('complaint_id', models.CharField(max_length=32, unique=True)),
+                ('service_code', models.CharField(max_length=4)),
+                ('service_type', models.CharField(max_length=64)),
+                ('description', models.TextField()),
+                ('location', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('in_progress', 'In progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], default='submitted', max_length=16)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created', '-id'],
+                'indexes': [models.Index(fields=['service_code', 'status', 'created'], name='complaint_svc_status_created'), models.Index(fields=['created', 'id'], name='complaint_created_id')],
+            },
+        ),
+    ]
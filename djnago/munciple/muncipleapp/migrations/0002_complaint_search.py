@@ -0,0 +1,177 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:38
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of muncipleapp.search as of this migration, so later changes to the live search
+# code cannot change what this migration does. Re-index with `rebuild_search_index` after a change.
+FTS_TABLE = 'muncipleapp_complaint_fts'
+
+_CONSONANTS = {
+    'क': 'k', 'ख': 'kh', 'ग': 'g', 'घ': 'gh', 'ङ': 'n', 'च': 'ch', 'छ': 'chh', 'ज': 'j', 'झ': 'jh',
+    'ञ': 'n', 'ट': 't', 'ठ': 'th', 'ड': 'd', 'ढ': 'dh', 'ण': 'n', 'त': 't', 'थ': 'th', 'द': 'd',
+    'ध': 'dh', 'न': 'n', 'प': 'p', 'फ': 'ph', 'ब': 'b', 'भ': 'bh', 'म': 'm', 'य': 'y', 'र': 'r',
+    'ल': 'l', 'व': 'v', 'श': 'sh', 'ष': 'sh', 'स': 's', 'ह': 'h', 'ळ': 'l',
+}
+# Consonant + nukta; ड़/ढ़ are written d/dh in romanized Hindi (sadak, padhai)
+_NUKTA = {'क': 'q', 'ख': 'kh', 'ग': 'g', 'ज': 'z', 'ड': 'd', 'ढ': 'dh', 'फ': 'f', 'य': 'y'}
+_VOWELS = {
+    'अ': 'a', 'आ': 'aa', 'इ': 'i', 'ई': 'ii', 'उ': 'u', 'ऊ': 'uu', 'ऋ': 'ri', 'ए': 'e', 'ऐ': 'ai',
+    'ओ': 'o', 'औ': 'au', 'ऑ': 'o',
+}
+_MATRAS = {
+    'ा': 'aa', 'ि': 'i', 'ी': 'ii', 'ु': 'u', 'ू': 'uu', 'ृ': 'ri', 'े': 'e', 'ै': 'ai', 'ो': 'o',
+    'ौ': 'au', 'ॉ': 'o',
+}
+_NASALS = {'ं': 'n', 'ँ': 'n', 'ः': 'h'}
+_VIRAMA = '्'
+_NUKTA_SIGN = '़'
+_DIGITS = {chr(0x0966 + i): str(i) for i in range(10)}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_DEVANAGARI_RE = re.compile(r'[ऀ-ॿ]')
+
+
+def _delete_schwa(units):
+    """Drop the inherent 'a' Hindi does not pronounce: word-finally and in V C_a C V (kachara -> kachra)"""
+    if len(units) > 2 and units[-1][1] == 'A':
+        units.pop()
+    for i in range(len(units) - 3, 1, -1):
+        if (units[i][1] == 'A' and units[i - 1][1] == 'C' and units[i - 2][1] in 'VA'
+                and units[i + 1][1] == 'C' and units[i + 2][1] in 'VA'):
+            del units[i]
+    return ''.join(text for text, _ in units)
+
+
+def transliterate(text):
+    """Devanagari to a plain Latin spelling; other characters pass through"""
+    if not _DEVANAGARI_RE.search(text):
+        return text
+    out = []
+    # (latin, kind) per Devanagari word: C consonant, V vowel, A inherent vowel, N nasal/other
+    units = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char in _CONSONANTS:
+            nukta = i + 1 < len(text) and text[i + 1] == _NUKTA_SIGN
+            units.append((_NUKTA.get(char, _CONSONANTS[char]) if nukta else _CONSONANTS[char], 'C'))
+            i += 2 if nukta else 1
+            following = text[i] if i < len(text) else ''
+            if following in _MATRAS:
+                units.append((_MATRAS[following], 'V'))
+                i += 1
+            elif following == _VIRAMA:
+                i += 1
+            else:
+                units.append(('a', 'A'))
+            continue
+        if char in _VOWELS:
+            units.append((_VOWELS[char], 'V'))
+        elif char in _NASALS:
+            units.append((_NASALS[char], 'N'))
+        elif char in _DIGITS:
+            units.append((_DIGITS[char], 'N'))
+        elif not ('\u0900' <= char <= '\u097f'):
+            if units:
+                out.append(_delete_schwa(units))
+                units = []
+            out.append(char)
+        i += 1
+    if units:
+        out.append(_delete_schwa(units))
+    return ''.join(out)
+
+
+def _fold(token):
+    """Collapse spelling variants: paani/pani, neeche/niche, nahin/nahi, mein/men, gutter/guter"""
+    token = token.replace('ee', 'i').replace('oo', 'u').replace('ei', 'e')
+    token = token.replace('w', 'v').replace('ph', 'f').replace('z', 'j').replace('q', 'k')
+    token = re.sub(r'(.)\1+', r'\1', token)
+    if len(token) > 3 and token.endswith('n') and token[-2] in 'aeiou':
+        token = token[:-1]
+    return token
+
+
+def normalize_text(text):
+    """Fold Hindi (either script) and English text into space-separated search tokens"""
+    return ' '.join(_fold(token) for token in _TOKEN_RE.findall(transliterate(text or '').lower()))
+
+
+def service_token(service_code):
+    # Indexed alongside the text so a service filter is a doclist intersection, not a table scan
+    return f"svc{service_code.lower()}"
+
+
+def build_search_text(service_code, service_type, description, location):
+    return f"{normalize_text(f'{description} {location} {service_type}')} {service_token(service_code)}"
+
+
+# Kept in sync by triggers; status-only updates do not touch the index
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        search_text, content='muncipleapp_complaint', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS muncipleapp_complaint_fts_ai AFTER INSERT ON muncipleapp_complaint BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS muncipleapp_complaint_fts_ad AFTER DELETE ON muncipleapp_complaint BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS muncipleapp_complaint_fts_au AFTER UPDATE OF search_text ON muncipleapp_complaint
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+]
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS muncipleapp_complaint_fts_au",
+    "DROP TRIGGER IF EXISTS muncipleapp_complaint_fts_ad",
+    "DROP TRIGGER IF EXISTS muncipleapp_complaint_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def create_index(apps, schema_editor):
+    Complaint = apps.get_model('muncipleapp', 'Complaint')
+    batch = []
+    for complaint in Complaint.objects.only('service_code', 'service_type', 'description', 'location').iterator(chunk_size=2000):
+        complaint.search_text = build_search_text(
+            complaint.service_code, complaint.service_type, complaint.description, complaint.location
+        )
+        batch.append(complaint)
+        if len(batch) >= 2000:
+            Complaint.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    Complaint.objects.bulk_update(batch, ['search_text'])
+
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SQL + [REBUILD_SQL]:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muncipleapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
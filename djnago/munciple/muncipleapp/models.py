@@ -1,3 +1,40 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from .search import build_search_text
+
+
+class Complaint(models.Model):
+    STATUS_CHOICES = [
+        ('submitted', 'Submitted'),
+        ('in_progress', 'In progress'),
+        ('resolved', 'Resolved'),
+        ('closed', 'Closed'),
+    ]
+
+    complaint_id = models.CharField(max_length=32, unique=True)
+    service_code = models.CharField(max_length=4)
+    service_type = models.CharField(max_length=64)
+    description = models.TextField()
+    location = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='submitted')
+    created = models.DateTimeField(default=timezone.now)
+    updated = models.DateTimeField(auto_now=True)
+    # Transliterated, spelling-folded text indexed by the FTS5 table (see search.py)
+    search_text = models.TextField(blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-created', '-id']
+        indexes = [
+            # Dashboard filters: by service and status, newest first
+            models.Index(fields=['service_code', 'status', 'created'], name='complaint_svc_status_created'),
+            # Unfiltered keyset pages walk (created, id)
+            models.Index(fields=['created', 'id'], name='complaint_created_id'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_text = build_search_text(self.service_code, self.service_type, self.description, self.location)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.complaint_id} ({self.status})"
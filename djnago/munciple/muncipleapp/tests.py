@@ -1,3 +1,213 @@
+import io
+import csv
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .export import export_rows
+from .models import Complaint
+
+
+def make_complaint(number, minutes_ago=0, **fields):
+    values = {
+        'complaint_id': f'WS20240101-{number:04d}',
+        'service_code': 'WS',
+        'service_type': 'water supply',
+        'description': 'paani nahi aa raha',
+        'location': 'Ward 7',
+        'created': timezone.now() - timedelta(minutes=minutes_ago),
+    }
+    values.update(fields)
+    return Complaint.objects.create(**values)
+
+
+class ComplaintListTests(TestCase):
+    def setUp(self):
+        # Two complaints share a timestamp so the id tie-break is exercised
+        created = timezone.now() - timedelta(hours=1)
+        for number in range(1, 6):
+            make_complaint(number, minutes_ago=number)
+        make_complaint(6, created=created)
+        make_complaint(7, created=created)
+
+    def test_keyset_pages_cover_every_complaint_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'after': cursor} if cursor else {})}
+            body = self.client.get(reverse('complaint-list'), params).json()
+            seen += [row['complaint_id'] for row in body['results']]
+            cursor = body['next']
+            if cursor is None:
+                break
+        expected = list(Complaint.objects.order_by('-created', '-id').values_list('complaint_id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_last_full_page_has_no_next(self):
+        body = self.client.get(reverse('complaint-list'), {'limit': 7}).json()
+        self.assertEqual(len(body['results']), 7)
+        self.assertIsNone(body['next'])
+
+    def test_bad_limit(self):
+        for limit in ('0', '-3', 'ten'):
+            response = self.client.get(reverse('complaint-list'), {'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+        response = self.client.get(reverse('complaint-search'), {'q': 'paani', 'limit': '0'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_limit_is_capped(self):
+        response = self.client.get(reverse('complaint-list'), {'limit': '100000'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bad_cursor(self):
+        # Not base64, no separator, and a decodable value whose date does not parse
+        for cursor in ('not-base64!', 'Zm9vYmFy', 'bm90LWEtZGF0ZXwx'):
+            response = self.client.get(reverse('complaint-list'), {'after': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_unchanged_page_is_304(self):
+        response = self.client.get(reverse('complaint-list'))
+        etag = response['ETag']
+        response = self.client.get(reverse('complaint-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class ComplaintDetailTests(TestCase):
+    def setUp(self):
+        self.complaint = make_complaint(1)
+        self.url = reverse('complaint-detail', args=[self.complaint.complaint_id])
+
+    def test_etag_304_and_patch_changes_it(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.patch(self.url, json.dumps({'status': 'resolved'}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'resolved')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_patch_rejects_unknown_status(self):
+        response = self.client.patch(self.url, json.dumps({'status': 'lost'}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_complaint(self):
+        self.assertEqual(self.client.get(reverse('complaint-detail', args=['XX0'])).status_code, 404)
+
+
+class BulkIngestTests(TestCase):
+    def post(self, items):
+        return self.client.post(reverse('complaint-bulk-ingest'), json.dumps(items), content_type='application/json')
+
+    def test_duplicates_and_errors(self):
+        make_complaint(1)
+        items = [
+            {'complaint_id': 'WS20240101-0001', 'type': 'water supply', 'description': 'resent'},
+            {'complaint_id': 'SL20240101-0002', 'type': 'street light', 'timestamp': 1717200000},
+            {'complaint_id': 'SL20240101-0002', 'type': 'street light', 'timestamp': 1717200000},
+            {'type': 'garbage collection'},
+            {'complaint_id': 'GC20240101-0003', 'status': 'lost'},
+            {'complaint_id': 'GC20240101-0004', 'created': 'yesterday'},
+        ]
+        response = self.post(items)
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body['received'], 6)
+        self.assertEqual(body['created'], 1)
+        self.assertEqual(body['duplicates'], 2)
+        self.assertEqual([error['index'] for error in body['errors']], [3, 4, 5])
+
+        complaint = Complaint.objects.get(complaint_id='SL20240101-0002')
+        self.assertEqual(complaint.service_code, 'SL')
+        self.assertEqual(complaint.created.timestamp(), 1717200000)
+        self.assertNotEqual(Complaint.objects.get(complaint_id='WS20240101-0001').description, 'resent')
+
+    def test_resend_creates_nothing(self):
+        items = [{'complaint_id': 'WS20240101-0009', 'type': 'water supply'}]
+        self.assertEqual(self.post(items).status_code, 201)
+        response = self.post(items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['duplicates'], 1)
+
+    def test_rejects_non_list(self):
+        self.assertEqual(self.post({'complaint_id': 'WS1'}).status_code, 400)
+
+
+class ComplaintExportTests(TestCase):
+    def setUp(self):
+        for number in range(1, 6):
+            make_complaint(number, minutes_ago=number * 60)
+        make_complaint(6, complaint_id='SL20240101-0006', service_code='SL', service_type='street light',
+                       description='खंभे की बत्ती बंद है', minutes_ago=30)
+
+    def export(self, **params):
+        response = self.client.get(reverse('complaint-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_gzip_csv_round_trip(self):
+        body = gzip.decompress(self.export(gzip='1'))
+        rows = list(csv.DictReader(io.StringIO(body.decode('utf-8'))))
+        self.assertEqual([row['complaint_id'] for row in rows],
+                         list(Complaint.objects.order_by('created', 'id').values_list('complaint_id', flat=True)))
+        self.assertEqual(rows[-1]['description'], 'खंभे की बत्ती बंद है')
+
+    def test_service_and_date_filters(self):
+        lines = self.export(format='ndjson', service_code='sl').decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['complaint_id'] for line in lines], ['SL20240101-0006'])
+
+        since = (timezone.now() - timedelta(minutes=150)).isoformat()
+        until = (timezone.now() - timedelta(minutes=45)).isoformat()
+        lines = self.export(format='ndjson', service_code='WS', since=since, until=until).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['complaint_id'] for line in lines],
+                         ['WS20240101-0002', 'WS20240101-0001'])
+
+    def test_bad_format_and_date(self):
+        self.assertEqual(self.client.get(reverse('complaint-export'), {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('complaint-export'), {'since': 'yesterday'}).status_code, 400)
+
+    def test_batches_cover_every_row_once(self):
+        ids = [row['complaint_id'] for row in export_rows(batch_size=2)]
+        self.assertEqual(ids, list(Complaint.objects.order_by('created', 'id').values_list('complaint_id', flat=True)))
+
+    def test_management_command_gzip(self):
+        with tempfile.NamedTemporaryFile(suffix='.ndjson.gz') as output:
+            call_command('export_complaints', output=output.name, format='ndjson', gzip=True,
+                         service_code='WS', stderr=io.StringIO())
+            with gzip.open(output.name, 'rt', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(row['service_code'] == 'WS' for row in rows))
+
+
+class ComplaintSearchTests(TestCase):
+    def search(self, q, **params):
+        response = self.client.get(reverse('complaint-search'), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['complaint_id'] for row in response.json()['results']]
+
+    def test_devanagari_query_matches_romanized_text(self):
+        make_complaint(1, description='mere ghar mein paani nahin aa raha')
+        make_complaint(2, complaint_id='SL20240101-0002', service_code='SL', service_type='street light',
+                       description='khambe ki batti band hai')
+        self.assertEqual(self.search('पानी नहीं'), ['WS20240101-0001'])
+        self.assertEqual(self.search('बत्ती', service_code='SL'), ['SL20240101-0002'])
+        self.assertEqual(self.search('बत्ती', service_code='WS'), [])
+
+    def test_description_update_reindexes(self):
+        complaint = make_complaint(1, description='naali jam hai')
+        self.assertEqual(self.search('naali'), [complaint.complaint_id])
 
-# Create your tests here.
+        complaint.description = 'सड़क पर गड्ढा है'
+        complaint.save()
+        self.assertEqual(self.search('naali'), [])
+        self.assertEqual(self.search('sadak'), [complaint.complaint_id])
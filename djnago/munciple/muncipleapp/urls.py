@@ -1,11 +1,11 @@
-from django.contrib import admin
-from django.urls import path, include
-from.import settings
-from django.conf.urls.static import static
+from django.urls import path
 
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('', include('muncipleapp.urls')),
-    
+from . import views
 
+urlpatterns = [
+    path('complaints/', views.complaint_list, name='complaint-list'),
+    path('complaints/search/', views.complaint_search, name='complaint-search'),
+    path('complaints/export/', views.complaint_export, name='complaint-export'),
+    path('complaints/bulk/', views.complaint_bulk_ingest, name='complaint-bulk-ingest'),
+    path('complaints/<str:complaint_id>/', views.complaint_detail, name='complaint-detail'),
 ]
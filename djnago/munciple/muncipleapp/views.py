@@ -1,3 +1,245 @@
-from django.shortcuts import render
+import json
+import base64
+from datetime import datetime, timezone as dt_timezone
 
-# Create your views here.
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_GET, require_http_methods, require_POST
+
+from .export import CONTENT_TYPES, FORMATS, export_rows, stream_export
+from .models import Complaint
+from .search import build_search_text, fts_available, search_complaints
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+BULK_BATCH_SIZE = 500
+MAX_BULK_ITEMS = 10000
+
+LIST_FIELDS = ('id', 'complaint_id', 'service_code', 'service_type', 'location', 'status', 'created', 'updated')
+STATUSES = {choice for choice, _ in Complaint.STATUS_CHOICES}
+
+
+def _authorized(request):
+    """Agent workers authenticate with a shared token when COMPLAINTS_API_TOKEN is set"""
+    token = getattr(settings, 'COMPLAINTS_API_TOKEN', '')
+    return not token or request.headers.get('Authorization') == f'Bearer {token}'
+
+
+def _serialize(row):
+    row = dict(row)
+    row.pop('id', None)
+    row['created'] = row['created'].isoformat()
+    row['updated'] = row['updated'].isoformat()
+    return row
+
+
+def _parse_limit(request, default):
+    """Page size from ?limit=, capped at MAX_PAGE_SIZE; None when it is not a positive integer"""
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        return None
+    return min(limit, MAX_PAGE_SIZE) if limit > 0 else None
+
+
+def _encode_cursor(created, pk):
+    return base64.urlsafe_b64encode(f"{created.isoformat()}|{pk}".encode()).decode()
+
+
+def _decode_cursor(cursor):
+    created, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+    parsed = parse_datetime(created)
+    if parsed is None:
+        raise ValueError('bad cursor')
+    return parsed, int(pk)
+
+
+@require_GET
+def complaint_list(request):
+    """Newest-first complaints with keyset pagination: pass the returned `next` as `?after=`"""
+    queryset = Complaint.objects.all()
+    if request.GET.get('service_code'):
+        queryset = queryset.filter(service_code=request.GET['service_code'].upper())
+    if request.GET.get('status'):
+        queryset = queryset.filter(status=request.GET['status'])
+
+    limit = _parse_limit(request, PAGE_SIZE)
+    if limit is None:
+        return JsonResponse({'error': 'limit must be a positive integer'}, status=400)
+
+    if request.GET.get('after'):
+        try:
+            created, pk = _decode_cursor(request.GET['after'])
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': 'invalid cursor'}, status=400)
+        # Seek past the last row seen instead of OFFSET, so deep pages cost the same as the first
+        queryset = queryset.filter(Q(created__lt=created) | Q(created=created, id__lt=pk))
+
+    rows = list(queryset.order_by('-created', '-id').values(*LIST_FIELDS)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_cursor(rows[-1]['created'], rows[-1]['id']) if has_more else None
+    # ConditionalGetMiddleware adds an ETag and answers unchanged pages with 304
+    return JsonResponse({'results': [_serialize(row) for row in rows], 'next': next_cursor})
+
+
+@require_GET
+def complaint_search(request):
+    """Ranked full-text search; Devanagari and romanized Hindi queries match either script"""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'q is required'}, status=400)
+    limit = _parse_limit(request, 20)
+    if limit is None:
+        return JsonResponse({'error': 'limit must be a positive integer'}, status=400)
+
+    if not fts_available():
+        # FTS5 is SQLite-only; other backends get an unranked substring match
+        queryset = Complaint.objects.filter(description__icontains=query)
+        if request.GET.get('service_code'):
+            queryset = queryset.filter(service_code=request.GET['service_code'].upper())
+        if request.GET.get('status'):
+            queryset = queryset.filter(status=request.GET['status'])
+        rows = list(queryset.values(
+            'complaint_id', 'service_code', 'service_type', 'description', 'location', 'status', 'created'
+        )[:limit])
+        took_ms = None
+    else:
+        rows, took_ms = search_complaints(
+            query, limit, request.GET.get('service_code'), request.GET.get('status')
+        )
+    for row in rows:
+        if not isinstance(row['created'], str):
+            row['created'] = row['created'].isoformat()
+    return JsonResponse({'results': rows, 'took_ms': round(took_ms, 2) if took_ms is not None else None})
+
+
+def _complaint_etag(request, complaint_id):
+    updated = Complaint.objects.filter(complaint_id=complaint_id).values_list('updated', flat=True).first()
+    return f"{complaint_id}-{updated.timestamp():.6f}" if updated else None
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'PATCH'])
+@condition(etag_func=_complaint_etag)
+def complaint_detail(request, complaint_id):
+    """Status polling answers 304 from a single indexed lookup while nothing has changed"""
+    if request.method == 'PATCH':
+        if not _authorized(request):
+            return JsonResponse({'error': 'unauthorized'}, status=401)
+        try:
+            status = json.loads(request.body or b'{}').get('status')
+        except ValueError:
+            return JsonResponse({'error': 'invalid JSON'}, status=400)
+        if status not in STATUSES:
+            return JsonResponse({'error': f"status must be one of {sorted(STATUSES)}"}, status=400)
+        updated = Complaint.objects.filter(complaint_id=complaint_id).update(status=status, updated=timezone.now())
+        if not updated:
+            return JsonResponse({'error': 'Complaint ID not found'}, status=404)
+
+    row = Complaint.objects.filter(complaint_id=complaint_id).values(*LIST_FIELDS, 'description').first()
+    if row is None:
+        return JsonResponse({'error': 'Complaint ID not found'}, status=404)
+    return JsonResponse(_serialize(row))
+
+
+def _parse_created(value):
+    if value in (None, ''):
+        return timezone.now()
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"bad timestamp {value!r}")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed, dt_timezone.utc)
+
+
+@require_GET
+def complaint_export(request):
+    """Full dump for the state portal: ?format=csv|ndjson&gzip=1, filtered by service_code, status, since, until"""
+    if not _authorized(request):
+        return JsonResponse({'error': 'unauthorized'}, status=401)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return JsonResponse({'error': f"format must be one of {list(FORMATS)}"}, status=400)
+    try:
+        since = _parse_created(request.GET['since']) if request.GET.get('since') else None
+        until = _parse_created(request.GET['until']) if request.GET.get('until') else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    compress = request.GET.get('gzip') == '1'
+
+    rows = export_rows(request.GET.get('service_code'), request.GET.get('status'), since, until)
+    response = StreamingHttpResponse(
+        stream_export(rows, fmt, compress), content_type='application/gzip' if compress else CONTENT_TYPES[fmt]
+    )
+    filename = f"complaints.{fmt}" + ('.gz' if compress else '')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@csrf_exempt
+@require_POST
+def complaint_bulk_ingest(request):
+    """Insert a JSON list of agent complaints in batches; re-sent complaint IDs are ignored"""
+    if not _authorized(request):
+        return JsonResponse({'error': 'unauthorized'}, status=401)
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'invalid JSON'}, status=400)
+    if not isinstance(items, list):
+        return JsonResponse({'error': 'expected a JSON list of complaints'}, status=400)
+    if len(items) > MAX_BULK_ITEMS:
+        return JsonResponse({'error': f'at most {MAX_BULK_ITEMS} complaints per request'}, status=413)
+
+    complaints = {}
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            complaint_id = item['complaint_id']
+            service_type = item.get('service_type') or item.get('type', '')
+            status = item.get('status', 'submitted')
+            if status not in STATUSES:
+                raise ValueError(f"unknown status {status!r}")
+            # Agent IDs start with the service code, e.g. WS20240101-0001
+            service_code = (item.get('service_code') or complaint_id[:2]).upper()
+            description = item.get('description', '')
+            location = item.get('location', '')
+            complaints[complaint_id] = Complaint(
+                complaint_id=complaint_id,
+                service_code=service_code,
+                service_type=service_type,
+                description=description,
+                location=location,
+                status=status,
+                created=_parse_created(item.get('created', item.get('timestamp'))),
+                # bulk_create skips save(), so fill the search column here
+                search_text=build_search_text(service_code, service_type, description, location),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append({'index': index, 'error': str(e)})
+
+    # Retried pushes resend complaints we already hold; look them up through the unique index
+    ids = list(complaints)
+    existing = set()
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        existing.update(Complaint.objects.filter(
+            complaint_id__in=ids[start:start + BULK_BATCH_SIZE]
+        ).values_list('complaint_id', flat=True))
+    new = [complaint for complaint_id, complaint in complaints.items() if complaint_id not in existing]
+
+    with transaction.atomic():
+        # ignore_conflicts covers a concurrent push of the same IDs
+        Complaint.objects.bulk_create(new, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+    return JsonResponse(
+        {'received': len(items), 'created': len(new), 'duplicates': len(items) - len(new) - len(errors),
+         'errors': errors},
+        status=201 if new else 200,
+    )
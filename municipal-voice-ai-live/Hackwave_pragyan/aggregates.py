@@ -0,0 +1,159 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("municipal-agent")
+
+# Hourly buckets kept for charts (one week); memory is fixed at this many small counters
+AGG_BUCKET_HOURS = int(os.getenv("AGG_BUCKET_HOURS", "168"))
+# Wards tracked individually; further wards are counted under "Other"
+AGG_MAX_WARDS = int(os.getenv("AGG_MAX_WARDS", "500"))
+ROLLING_HOURS = 24
+
+OPEN_STATUSES = ("submitted", "in_progress")
+_WARD_RE = re.compile(r"(?:ward|वार्ड)\s*(?:no\.?\s*|number\s*)?(\d+)", re.IGNORECASE)
+
+
+def ward_of(location: str) -> str:
+    """'Ward 12, Civil Lines' -> 'Ward 12'; otherwise the first part of the address"""
+    if not location:
+        return "Unknown"
+    match = _WARD_RE.search(location)
+    if match:
+        return f"Ward {int(match.group(1))}"
+    return location.split(",")[0].strip().title() or "Unknown"
+
+
+class ComplaintAggregates:
+    """Dashboard counters kept current on every submit and status change instead of rescanning complaints"""
+
+    def __init__(self, bucket_hours: int = AGG_BUCKET_HOURS, max_wards: int = AGG_MAX_WARDS):
+        self.bucket_hours = max(bucket_hours, ROLLING_HOURS)
+        self.max_wards = max_wards
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Ring of hourly buckets: slot = hour % bucket_hours, tagged with the hour it currently holds
+        self._bucket_tags: List[int] = [-1] * self.bucket_hours
+        self._buckets: List[Counter] = [Counter() for _ in range(self.bucket_hours)]
+        self._hour = int(time.time() // 3600)
+        self.last_24h: Counter = Counter()
+        self.by_status: Counter = Counter()
+        self.by_service_status: Counter = Counter()
+        self.open_by_ward: Counter = Counter()
+        self._wards: set = set()
+
+    def _advance(self, hour: int):
+        """Expire buckets that slid out of the 24h window; at most 24 buckets per call"""
+        if hour <= self._hour:
+            return
+        for expired in range(self._hour - ROLLING_HOURS + 1, min(self._hour, hour - ROLLING_HOURS) + 1):
+            slot = expired % self.bucket_hours
+            if self._bucket_tags[slot] == expired:
+                self.last_24h.subtract(self._buckets[slot])
+        self.last_24h = +self.last_24h
+        self._hour = hour
+
+    def _ward_key(self, location: str) -> str:
+        ward = ward_of(location)
+        if ward not in self._wards:
+            if len(self._wards) >= self.max_wards:
+                return "Other"
+            self._wards.add(ward)
+        return ward
+
+    def _add(self, service: str, location: str, status: str, timestamp: float):
+        ward = self._ward_key(location)
+        self.by_status[status] += 1
+        self.by_service_status[(service, status)] += 1
+        if status in OPEN_STATUSES:
+            self.open_by_ward[ward] += 1
+
+        # Clock skew: never file a complaint in a future bucket
+        hour = min(int(timestamp // 3600), self._hour)
+        if hour <= self._hour - self.bucket_hours:
+            return
+        slot = hour % self.bucket_hours
+        if self._bucket_tags[slot] != hour:
+            self._bucket_tags[slot] = hour
+            self._buckets[slot] = Counter()
+        self._buckets[slot][service] += 1
+        if hour > self._hour - ROLLING_HOURS:
+            self.last_24h[service] += 1
+
+    def record_new(self, service: str, location: str, status: str = "submitted", timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._advance(int(time.time() // 3600))
+            self._add(service, location, status, timestamp)
+
+    def record_status_change(self, service: str, location: str, previous: str, status: str):
+        """The caller passes the stored complaint's fields, so no per-complaint state is kept here"""
+        if previous == status:
+            return
+        with self._lock:
+            ward = self._ward_key(location)
+            self.by_status[previous] -= 1
+            self.by_status[status] += 1
+            self.by_service_status[(service, previous)] -= 1
+            self.by_service_status[(service, status)] += 1
+            if previous in OPEN_STATUSES and status not in OPEN_STATUSES:
+                self.open_by_ward[ward] -= 1
+            elif status in OPEN_STATUSES and previous not in OPEN_STATUSES:
+                self.open_by_ward[ward] += 1
+
+    def rebuild(self, complaints: Iterable[Dict[str, Any]], service_of) -> int:
+        """Recount from stored complaints, e.g. after a restart; `service_of` maps a type to its code"""
+        started = time.perf_counter()
+        count = 0
+        with self._lock:
+            self._reset()
+            for complaint in complaints:
+                self._add(
+                    service_of(complaint.get("type", "")), complaint.get("location", ""),
+                    complaint.get("status", "submitted"), complaint.get("timestamp") or time.time(),
+                )
+                count += 1
+        logger.info(f"Rebuilt dashboard aggregates from {count} complaints in {time.perf_counter() - started:.2f}s")
+        return count
+
+    def last_24h_by_service(self) -> Dict[str, int]:
+        with self._lock:
+            self._advance(int(time.time() // 3600))
+            return dict(self.last_24h)
+
+    def open_by_ward_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {ward: count for ward, count in self.open_by_ward.items() if count}
+
+    def hourly(self, hours: int = ROLLING_HOURS) -> List[Dict[str, Any]]:
+        """Per-hour counts by service, oldest first, for charts"""
+        with self._lock:
+            self._advance(int(time.time() // 3600))
+            series = []
+            for hour in range(self._hour - min(hours, self.bucket_hours) + 1, self._hour + 1):
+                slot = hour % self.bucket_hours
+                counts = dict(self._buckets[slot]) if self._bucket_tags[slot] == hour else {}
+                series.append({"hour": time.strftime("%Y-%m-%d %H:00", time.localtime(hour * 3600)), **counts})
+            return series
+
+    def snapshot(self) -> Dict[str, Any]:
+        by_service_status: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for (service, status), count in self.by_service_status.items():
+                if count:
+                    by_service_status.setdefault(service, {})[status] = count
+            by_status = {status: count for status, count in self.by_status.items() if count}
+        return {
+            "generated_at": time.time(),
+            "last_24h_by_service": self.last_24h_by_service(),
+            "open_by_ward": self.open_by_ward_counts(),
+            "by_status": by_status,
+            "by_service_status": by_service_status,
+            "hourly": self.hourly(),
+        }
@@ -3,12 +3,19 @@ import streamlit as st
 import requests
 import json
 import os
+from collections import OrderedDict
 from dotenv import load_dotenv
 import threading
 import time
+import urllib.request
 
 load_dotenv()
 
+# Served by the agent worker next to /metrics (see aggregates.py); comma-separated with several workers
+DASHBOARD_URL = os.getenv("DASHBOARD_URL", "http://localhost:9100/dashboard")
+COMPLAINT_FEED_URL = os.getenv("COMPLAINT_FEED_URL", "http://localhost:9100/events")
+FEED_KEEP = 200
+
 st.set_page_config(
     page_title="Municipal Voice AI Assistant",
     page_icon="🏛️",
@@ -91,8 +98,6 @@ if 'call_status' not in st.session_state:
     st.session_state.call_status = "disconnected"  # disconnected, connecting, connected
 if 'room_name' not in st.session_state:
     st.session_state.room_name = None
-if 'complaints' not in st.session_state:
-    st.session_state.complaints = []
 
 def generate_room_name():
     import uuid
@@ -125,24 +130,168 @@ def start_call():
         # For this demo, we'll simulate the connection
         st.session_state.call_status = "connected"
         st.success(f"Connected to room: {room_name}")
-        
-        # Simulate a complaint being created after a few seconds
-        if not hasattr(st.session_state, 'simulated_complaint'):
-            st.session_state.simulated_complaint = True
-            threading.Timer(5.0, simulate_complaint).start()
-
-def simulate_complaint():
-    """Simulate a complaint being created during a call"""
-    complaint_id = f"WS20231201-{len(st.session_state.complaints) + 1:04d}"
-    st.session_state.complaints.append({
-        'id': complaint_id,
-        'type': 'Water Supply',
-        'description': 'No water for 2 days',
-        'location': 'Sector 15, Gandhinagar',
-        'status': 'Submitted',
-        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-    })
-    st.rerun()
+
+class StatusBoard:
+    """Latest status per complaint from every feed: a worker announces a change only on its own feed,
+    which need not be the feed of the worker that filed the complaint"""
+    
+    def __init__(self):
+        self.statuses = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def set(self, complaint_id, status):
+        with self.lock:
+            self.statuses[complaint_id] = status
+            self.statuses.move_to_end(complaint_id)
+            while len(self.statuses) > FEED_KEEP * 10:
+                self.statuses.popitem(last=False)
+    
+    def get(self, complaint_id, default):
+        with self.lock:
+            return self.statuses.get(complaint_id, default)
+
+class ComplaintFeed:
+    """Reads the agent's server-sent event stream on one thread shared by every dashboard session"""
+    
+    def __init__(self, url, board=None):
+        self.url = url
+        self.board = board or StatusBoard()
+        self.complaints = OrderedDict()
+        self.connected = False
+        self.last_event_id = None
+        self.lock = threading.Lock()
+        threading.Thread(target=self.run, name="complaint-feed", daemon=True).start()
+    
+    def run(self):
+        backoff = 1
+        while True:
+            try:
+                headers = {"Last-Event-ID": self.last_event_id} if self.last_event_id else {}
+                # urllib reads line by line; requests' iter_lines holds small events back until its chunk fills
+                with urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=60) as response:
+                    self.connected = True
+                    backoff = 1
+                    self.consume(line.decode("utf-8").rstrip("\r\n") for line in response)
+            except Exception:
+                pass
+            self.connected = False
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+    
+    def consume(self, lines):
+        event_id, event_type, data = None, None, []
+        for line in lines:
+            if line.startswith("id:"):
+                event_id = line[3:].strip()
+            elif line.startswith("event:"):
+                event_type = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and data:
+                self.apply(event_type, json.loads("\n".join(data)))
+                self.last_event_id = event_id
+                event_id, event_type, data = None, None, []
+    
+    def apply(self, event_type, event):
+        with self.lock:
+            if event_type == "complaint.created":
+                self.complaints[event["complaint_id"]] = event
+                while len(self.complaints) > FEED_KEEP:
+                    self.complaints.popitem(last=False)
+            elif event_type == "complaint.status":
+                self.board.set(event["complaint_id"], event["status"])
+    
+    def recent(self, count):
+        with self.lock:
+            complaints = [dict(complaint) for complaint in list(self.complaints.values())[-count:]][::-1]
+        for complaint in complaints:
+            complaint["status"] = self.board.get(complaint["complaint_id"], complaint["status"])
+        return complaints
+
+@st.cache_resource
+def complaint_feeds():
+    board = StatusBoard()
+    return [ComplaintFeed(url.strip(), board) for url in COMPLAINT_FEED_URL.split(",") if url.strip()]
+
+@st.fragment(run_every=2)
+def recent_complaints_panel():
+    """Re-renders on its own every 2s from the feed buffer; the rest of the page is not rerun"""
+    feeds = complaint_feeds()
+    complaints = sorted((c for feed in feeds for c in feed.recent(3)), key=lambda c: c['timestamp'], reverse=True)[:3]
+    if not complaints:
+        if not any(feed.connected for feed in feeds):
+            st.caption(f"Live feed not connected ({COMPLAINT_FEED_URL})")
+        return
+    st.markdown("---")
+    st.subheader("Recent Complaints")
+    for complaint in complaints:
+        st.info(f"""
+        **ID**: {complaint['complaint_id']}  
+        **Type**: {complaint['type']}  
+        **Location**: {complaint['location']}  
+        **Status**: {complaint['status']}  
+        **Time**: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(complaint['timestamp']))}
+        """)
+
+def merge_counts(total, counts):
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            merge_counts(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+@st.cache_data(ttl=5, show_spinner=False)
+def fetch_dashboard():
+    """Pre-aggregated counts from the agent workers, summed; cached briefly so reruns don't refetch"""
+    snapshots = []
+    for url in DASHBOARD_URL.split(","):
+        try:
+            response = requests.get(url.strip(), timeout=2)
+            response.raise_for_status()
+            snapshots.append(response.json())
+        except Exception:
+            continue
+    if not snapshots:
+        return None
+    dashboard = snapshots[0]
+    for snapshot in snapshots[1:]:
+        for key in ("last_24h_by_service", "open_by_ward", "by_status", "by_service_status"):
+            merge_counts(dashboard[key], snapshot[key])
+        for hour, other in zip(dashboard["hourly"], snapshot["hourly"]):
+            merge_counts(hour, {key: value for key, value in other.items() if key != "hour"})
+    return dashboard
+
+def show_dashboard():
+    st.header("📊 Complaint Dashboard")
+    dashboard = fetch_dashboard()
+    if dashboard is None:
+        st.caption(f"Dashboard unavailable: agent worker not reachable at {DASHBOARD_URL}")
+        return
+    
+    statuses = dashboard["by_status"]
+    cols = st.columns(4)
+    for col, (label, key) in zip(cols, [("Submitted", "submitted"), ("In progress", "in_progress"),
+                                         ("Resolved", "resolved"), ("Closed", "closed")]):
+        col.metric(label, statuses.get(key, 0))
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Last 24h by service")
+        if dashboard["last_24h_by_service"]:
+            st.bar_chart({"complaints": dashboard["last_24h_by_service"]})
+        else:
+            st.caption("No complaints in the last 24 hours")
+    with col2:
+        st.subheader("Open by ward")
+        if dashboard["open_by_ward"]:
+            st.bar_chart({"open": dashboard["open_by_ward"]})
+        else:
+            st.caption("No open complaints")
+    
+    if any(len(hour) > 1 for hour in dashboard["hourly"]):
+        st.subheader("Complaints per hour")
+        st.bar_chart(dashboard["hourly"], x="hour")
 
 def end_call():
     """End the current call"""
@@ -217,18 +366,11 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
         
-        # Complaints history
-        if st.session_state.complaints:
-            st.markdown("---")
-            st.subheader("Recent Complaints")
-            for complaint in st.session_state.complaints[-3:]:  # Show last 3 complaints
-                st.info(f"""
-                **ID**: {complaint['id']}  
-                **Type**: {complaint['type']}  
-                **Location**: {complaint['location']}  
-                **Status**: {complaint['status']}  
-                **Time**: {complaint['timestamp']}
-                """)
+        # Complaints history, pushed live from the agent
+        recent_complaints_panel()
+    
+    st.markdown("---")
+    show_dashboard()
     
     # Emergency contacts section
     st.markdown("---")
@@ -0,0 +1,117 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Optional, Set
+
+from metrics import registry
+
+logger = logging.getLogger("municipal-agent")
+
+# Upper bound on how long cancelling in-flight LLM/TTS work may take after the caller interrupts
+CANCEL_TIMEOUT = float(os.getenv("BARGE_IN_CANCEL_TIMEOUT", "0.25"))
+
+
+class UsageCounters:
+    """Delivered versus wasted LLM tokens and TTS characters for this worker"""
+
+    def __init__(self):
+        self.delivered_tokens = 0
+        self.wasted_tokens = 0
+        self.delivered_chars = 0
+        self.wasted_chars = 0
+        self.barge_ins = 0
+        # Every job thread of the worker updates these counters
+        self._lock = threading.Lock()
+
+    def record_turn(self, tokens: int, chars: int, interrupted: bool):
+        with self._lock:
+            if interrupted:
+                self.wasted_tokens += tokens
+                self.wasted_chars += chars
+            else:
+                self.delivered_tokens += tokens
+                self.delivered_chars += chars
+
+    def record_barge_in(self):
+        with self._lock:
+            self.barge_ins += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "delivered_tokens": self.delivered_tokens,
+                "wasted_tokens": self.wasted_tokens,
+                "delivered_chars": self.delivered_chars,
+                "wasted_chars": self.wasted_chars,
+                "barge_ins": self.barge_ins,
+            }
+
+
+usage_counters = UsageCounters()
+
+_usage_metric = registry.counter(
+    "municipal_usage_total", "LLM tokens and TTS characters, split by whether the caller heard them"
+)
+for _name in ("delivered_tokens", "wasted_tokens", "delivered_chars", "wasted_chars", "barge_ins"):
+    _usage_metric.set_function(lambda name=_name: getattr(usage_counters, name), kind=_name)
+
+
+class BargeInController:
+    """Cancels in-flight LLM streams, TTS segments and queued audio when the caller starts speaking"""
+
+    def __init__(self, cancel_timeout: float = CANCEL_TIMEOUT):
+        self.cancel_timeout = cancel_timeout
+        self.agent_state = "initializing"
+        self._session = None
+        self._active: Set = set()
+
+    def track(self, stream):
+        """Register a cancellable stream (anything with cancel() and a wait_cancelled() coroutine)"""
+        self._active.add(stream)
+
+    def untrack(self, stream):
+        self._active.discard(stream)
+
+    def attach(self, session):
+        """Listen for VAD speech-start while the agent is thinking or speaking"""
+        self._session = session
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        session.on("user_state_changed", self._on_user_state_changed)
+
+    def _on_agent_state_changed(self, event):
+        self.agent_state = event.new_state
+
+    def _on_user_state_changed(self, event):
+        if event.new_state == "speaking" and self.agent_state in ("thinking", "speaking"):
+            asyncio.create_task(self.barge_in())
+
+    async def barge_in(self) -> Optional[float]:
+        """Cancel all in-flight work; returns the time taken, or None if nothing was running"""
+        if not self._active and self.agent_state not in ("thinking", "speaking"):
+            return None
+
+        start = time.perf_counter()
+        usage_counters.record_barge_in()
+        streams = list(self._active)
+        for stream in streams:
+            stream.cancel()
+
+        waiters = [asyncio.ensure_future(stream.wait_cancelled()) for stream in streams]
+        if self._session is not None:
+            # Drops pending TTS segments and flushes the playout queue
+            waiters.append(asyncio.ensure_future(self._session.interrupt(force=True)))
+
+        if waiters:
+            _, pending = await asyncio.wait(waiters, timeout=self.cancel_timeout)
+            for waiter in pending:
+                waiter.cancel()
+            if pending:
+                logger.warning(
+                    f"Barge-in: {len(pending)} task(s) still running after {self.cancel_timeout * 1000:.0f}ms"
+                )
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Barge-in: cancelled {len(streams)} stream(s) in {elapsed * 1000:.1f}ms")
+        return elapsed
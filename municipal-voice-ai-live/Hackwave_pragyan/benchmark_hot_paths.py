@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the hot non-network paths: complaint ID generation, the complaint
+store and LiveKit token issuance.
+
+Reports pytest-benchmark style rows (min/mean/stddev/ops) for single-threaded runs,
+thread contention on one in-process store, process contention on one shared SQLite store,
+and memory per stored complaint at several store sizes.
+Results can be saved as a baseline and compared against later commits:
+
+    python benchmark_hot_paths.py --save
+    python benchmark_hot_paths.py --compare        # against the latest saved baseline
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import statistics
+import tempfile
+import subprocess
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Token signing only needs a key pair, not a LiveKit server
+os.environ.setdefault("LIVEKIT_API_KEY", "benchmark-key")
+os.environ.setdefault("LIVEKIT_API_SECRET", "benchmark-secret-benchmark-secret-0000")
+
+from complaints import MunicipalAssistant
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmarks")
+SERVICES = ["water supply", "street light", "garbage collection", "drainage", "road issues", "property tax"]
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+logging.getLogger("municipal-agent").setLevel(logging.WARNING)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(fn: Callable[[], Any], rounds: int, iterations: int) -> Dict[str, float]:
+    """Time `iterations` calls per round; stats are per call, in microseconds"""
+    fn()  # warm-up
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations)
+    mean = statistics.mean(samples)
+    return {
+        "min_us": round(min(samples) * 1e6, 3),
+        "mean_us": round(mean * 1e6, 3),
+        "stddev_us": round(statistics.pstdev(samples) * 1e6, 3),
+        "ops": round(1 / mean, 1),
+    }
+
+
+def populated_store(count: int) -> MunicipalAssistant:
+    assistant = MunicipalAssistant()
+    for i in range(count):
+        assistant.submit_complaint(SERVICES[i % len(SERVICES)], "No water since morning", f"Sector {i % 40}")
+    return assistant
+
+
+def bench_single(rounds: int, iterations: int) -> Dict[str, Dict[str, float]]:
+    from token_server import generate_token
+
+    results = {}
+    assistant = MunicipalAssistant()
+    results["generate_complaint_id"] = measure(
+        lambda: assistant.generate_complaint_id("water supply"), rounds, iterations
+    )
+
+    assistant = MunicipalAssistant()
+    results["submit_complaint"] = measure(
+        lambda: assistant.submit_complaint("street light", "Light not working", "MG Road"), rounds, iterations
+    )
+
+    assistant = populated_store(10_000)
+    ids = list(assistant.complaints)
+    cursor = iter(range(10 ** 9))
+    results["get_complaint_status"] = measure(
+        lambda: assistant.get_complaint_status(ids[next(cursor) % len(ids)]), rounds, iterations
+    )
+    results["get_complaint_status_miss"] = measure(
+        lambda: assistant.get_complaint_status("XX00000000-0000"), rounds, iterations
+    )
+
+    # Signing is much slower than the dict paths; keep the total runtime comparable
+    results["generate_token"] = measure(
+        lambda: generate_token("caller-123", "municipal-room"), rounds, max(1, iterations // 20)
+    )
+    return results
+
+
+def bench_threads(threads: int, per_thread: int) -> Dict[str, Any]:
+    """Concurrent submit_complaint on one shared store, as agent jobs do in THREAD executor mode"""
+    assistant = MunicipalAssistant()
+
+    def worker(index: int) -> List[str]:
+        service = SERVICES[index % len(SERVICES)]
+        return [assistant.submit_complaint(service, "Pothole", "Bus stand") for _ in range(per_thread)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        batches = list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - start
+
+    ids = [complaint_id for batch in batches for complaint_id in batch]
+    counters = [complaint_id.rsplit("-", 1)[1] for complaint_id in ids]
+    return {
+        "threads": threads,
+        "operations": len(ids),
+        "ops": round(len(ids) / elapsed, 1),
+        "duplicate_ids": len(ids) - len(set(ids)),
+        "duplicate_counters": len(counters) - len(set(counters)),
+        "stored": len(assistant.complaints),
+    }
+
+
+def _process_worker(task) -> Dict[str, Any]:
+    path, per_process = task
+    logging.getLogger("municipal-agent").setLevel(logging.WARNING)
+    from complaint_store import SQLiteComplaintStore
+
+    assistant = MunicipalAssistant(store=SQLiteComplaintStore(path))
+    ids = []
+    start = time.perf_counter()
+    for i in range(per_process):
+        complaint_id = assistant.submit_complaint(SERVICES[i % len(SERVICES)], "Drain blocked", "Ward 7")
+        assistant.get_complaint_status(complaint_id)
+        ids.append(complaint_id)
+    return {"seconds": time.perf_counter() - start, "ids": ids}
+
+
+def bench_processes(processes: int, per_process: int) -> Dict[str, Any]:
+    """Agent worker processes sharing one SQLite store (COMPLAINT_DB), as the supervisor runs them"""
+    from complaint_store import SQLiteComplaintStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "complaints.db")
+        start = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            reports = pool.map(_process_worker, [(path, per_process)] * processes)
+        elapsed = time.perf_counter() - start
+        stored = len(SQLiteComplaintStore(path))
+    durations = [report["seconds"] for report in reports]
+    ids = [complaint_id for report in reports for complaint_id in report["ids"]]
+    operations = processes * per_process
+    return {
+        "processes": processes,
+        "operations": operations,
+        "ops_per_process": round(per_process / statistics.mean(durations), 1),
+        "aggregate_ops": round(operations / max(durations), 1),
+        "duplicate_ids": len(ids) - len(set(ids)),
+        "stored": stored,
+        "wall_s": round(elapsed, 2),
+    }
+
+
+def bench_memory(sizes: List[int]) -> List[Dict[str, Any]]:
+    rows = []
+    for size in sizes:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        assistant = populated_store(size)
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append({
+            "records": size,
+            "total_mb": round((current - before) / 2 ** 20, 1),
+            "peak_mb": round((peak - before) / 2 ** 20, 1),
+            "bytes_per_record": round((current - before) / size),
+            "fill_ops": round(size / elapsed, 1),
+        })
+        del assistant
+    return rows
+
+
+def latest_baseline() -> Optional[str]:
+    if not os.path.isdir(BASELINE_DIR):
+        return None
+    files = sorted(
+        (os.path.join(BASELINE_DIR, name) for name in os.listdir(BASELINE_DIR) if name.endswith(".json")),
+        key=os.path.getmtime,
+    )
+    return files[-1] if files else None
+
+
+def save_baseline(report: Dict[str, Any]) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['revision']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-benchmark mean changes; returns names that regressed beyond the threshold"""
+    regressions = []
+    print(f"📊 Compared with {baseline['revision']} ({baseline['created']})")
+    for name, stats in report["single"].items():
+        old = baseline.get("single", {}).get(name)
+        if not old:
+            continue
+        change = (stats["mean_us"] - old["mean_us"]) / old["mean_us"]
+        marker = "❌" if change > threshold else "✅"
+        if change > threshold:
+            regressions.append(name)
+        print(f"  {marker} {name:<28} {old['mean_us']:>10.3f}us -> {stats['mean_us']:>10.3f}us ({change:+.1%})")
+    old_memory = {row["records"]: row for row in baseline.get("memory", [])}
+    for row in report["memory"]:
+        old = old_memory.get(row["records"])
+        if old:
+            change = (row["bytes_per_record"] - old["bytes_per_record"]) / old["bytes_per_record"]
+            marker = "❌" if change > threshold else "✅"
+            if change > threshold:
+                regressions.append(f"memory@{row['records']}")
+            print(f"  {marker} {'bytes/record @ ' + str(row['records']):<28} "
+                  f"{old['bytes_per_record']:>10} -> {row['bytes_per_record']:>10} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the complaint store and token issuance")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per round")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--per-worker", type=int, default=20000, help="Operations per thread")
+    parser.add_argument("--per-process", type=int, default=2000,
+                        help="Operations per process (each is a committed SQLite write)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Store sizes for memory")
+    parser.add_argument("--save", action="store_true", help="Save results as a baseline in .benchmarks/")
+    parser.add_argument("--compare", nargs="?", const="latest", help="Compare with a baseline file (default: latest)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Regression threshold for --compare")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "single": bench_single(args.rounds, args.iterations),
+        "threads": [bench_threads(n, args.per_worker) for n in args.threads],
+        "processes": bench_processes(args.processes, args.per_process),
+        "memory": bench_memory(args.sizes),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"⏱️  Hot path micro-benchmarks @ {report['revision']}")
+        print("=" * 78)
+        print(f"{'benchmark':<28} {'min us':>10} {'mean us':>10} {'stddev us':>10} {'ops/s':>14}")
+        for name, stats in report["single"].items():
+            print(f"{name:<28} {stats['min_us']:>10} {stats['mean_us']:>10} {stats['stddev_us']:>10} {stats['ops']:>14}")
+        print("=" * 78)
+        print("Thread contention (shared store):")
+        for row in report["threads"]:
+            status = "✅" if row["duplicate_ids"] == 0 and row["stored"] == row["operations"] else "❌"
+            print(f"  {status} {row['threads']:>3} threads  {row['ops']:>12} ops/s  "
+                  f"duplicate IDs: {row['duplicate_ids']}  stored: {row['stored']}/{row['operations']}")
+        proc = report["processes"]
+        status = "✅" if proc["duplicate_ids"] == 0 and proc["stored"] == proc["operations"] else "❌"
+        print(f"Process contention (shared SQLite store):\n  {status} {proc['processes']:>3} processes  "
+              f"{proc['aggregate_ops']:>12} ops/s aggregate ({proc['ops_per_process']} ops/s per process)  "
+              f"duplicate IDs: {proc['duplicate_ids']}  stored: {proc['stored']}/{proc['operations']}")
+        print("Memory per record:")
+        for row in report["memory"]:
+            print(f"  {row['records']:>9} records  {row['total_mb']:>8} MB  {row['bytes_per_record']:>6} B/record  "
+                  f"peak {row['peak_mb']} MB")
+
+    regressions = []
+    if args.compare:
+        path = latest_baseline() if args.compare == "latest" else args.compare
+        if not path:
+            print("⚠️  No saved baseline to compare with (run with --save first)")
+        else:
+            with open(path) as f:
+                regressions = compare(report, json.load(f), args.threshold)
+    if args.save:
+        print(f"💾 Baseline saved to {save_baseline(report)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
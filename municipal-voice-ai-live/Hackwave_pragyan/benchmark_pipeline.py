@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of the voice pipeline.
+
+Runs the same turn machinery as entrypoint (turn tracking, barge-in control, adaptive
+endpointing, GeminiLLM.chat with its overload levels, circuit breakers and model registry,
+instrumented TTS) against fake STT/TTS providers and a fake Gemini model, so it needs no
+network and no API keys. Reports turn-latency percentiles and the number of
+concurrent calls one worker process sustains within the latency SLO.
+
+The per-call CPU work the agent does itself is real: each call's 48 kHz caller audio is framed
+into 20ms frames and run through Silero VAD for the whole call, and STT results arrive as
+Deepgram JSON decoded by the plugin's own parser. Only provider latency is simulated, so
+their network I/O, TLS and Opus decoding are not counted.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# No provider is contacted, but municipal_agent configures Gemini at import
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+os.environ.setdefault("METRICS_PORT", "0")
+
+from livekit.agents import llm
+from livekit.agents.vad import VADEventType
+from livekit.plugins import silero
+from livekit.plugins.deepgram.stt import live_transcription_to_speech_data
+
+from barge_in import BargeInController
+from endpointing import VAD_MIN_SILENCE, AdaptiveEndpointer, attach_endpointer
+from metrics import TURN_STAGES, TurnTracker, instrument_tts
+from fake_providers import FakeCaller, FakeLLM, FakeSession, FakeSTT, FakeTTS
+from municipal_agent import MUNICIPAL_INSTRUCTIONS
+from complaints import municipal_assistant
+
+SENTENCE_END = (".", "?", "!", "।")
+# Stop waiting for the VAD to catch up this long after the caller's last interim result
+VAD_TIMEOUT = 10.0
+
+
+class RecordingTurnTracker(TurnTracker):
+    """TurnTracker that also keeps raw per-turn durations for percentile reporting"""
+
+    def __init__(self, sink):
+        super().__init__()
+        self._sink = sink
+
+    def finish(self):
+        if self.current is not None:
+            self._sink.append(self.current.durations())
+        super().finish()
+
+
+async def run_call(args, vad_model, results):
+    session = FakeSession()
+    turns = []
+    tracker = RecordingTurnTracker(turns)
+    tracker.attach(session)
+    barge_in = BargeInController()
+    barge_in.attach(session)
+    endpointer = AdaptiveEndpointer(language="hi")
+    # One Silero model per process, one stream per call, as the session opens it
+    vad = SimpleNamespace(stream=vad_model.stream)
+    attach_endpointer(session, vad, endpointer)
+    vad_stream = vad.stream()
+
+    caller = FakeCaller(seconds_per_word=args.seconds_per_word)
+    stt = FakeSTT(final_delay=args.stt_final_ms / 1000, seconds_per_word=args.seconds_per_word)
+    llm_model = FakeLLM(
+        first_token_delay=args.first_token_ms / 1000,
+        per_token_delay=args.per_token_ms / 1000,
+        barge_in=barge_in,
+        turn_tracker=tracker,
+        caller=lambda: "benchmark-caller",
+        system_instruction=MUNICIPAL_INSTRUCTIONS,
+    )
+    tts = FakeTTS(first_audio_delay=args.tts_first_audio_ms / 1000)
+    instrument_tts(tts, tracker)
+
+    loop = asyncio.get_running_loop()
+    speech = {"speaking": False, "ended_at": None, "ended": asyncio.Event()}
+
+    def set_speaking(speaking: bool):
+        if speaking == speech["speaking"]:
+            return
+        speech["speaking"] = speaking
+        old, new = ("listening", "speaking") if speaking else ("speaking", "listening")
+        session.emit("user_state_changed", old_state=old, new_state=new)
+
+    async def listen():
+        # Turn boundaries follow the caller script, not Silero's verdict on synthetic audio, but the
+        # end of speech is only reported once inference has caught up with the trailing silence, so
+        # a worker that falls behind on VAD shows it in the turn latency as it would in production
+        async for event in vad_stream:
+            end = caller.speech_end_offset
+            if (event.type == VADEventType.INFERENCE_DONE and speech["speaking"] and end is not None
+                    and event.timestamp >= end + VAD_MIN_SILENCE):
+                set_speaking(False)
+                speech["ended_at"] = loop.time()
+                speech["ended"].set()
+
+    def transcribed(message: str):
+        data = json.loads(message)
+        alternatives = live_transcription_to_speech_data("hi", data, is_final=data["is_final"], start_time_offset=0)
+        session.emit("user_input_transcribed", transcript=alternatives[0].text,
+                     is_final=data["is_final"], language=None)
+
+    microphone = asyncio.create_task(caller.run(vad_stream))
+    listener = asyncio.create_task(listen())
+    history = []
+    try:
+        for turn_index in range(args.turns):
+            transcript = stt.next_transcript()
+            words = transcript.split()
+            speech["ended"].clear()
+            caller.say(transcript)
+            set_speaking(True)
+            for i in range(len(words)):
+                await asyncio.sleep(args.seconds_per_word)
+                transcribed(stt.result(words[:i + 1], is_final=False))
+            try:
+                await asyncio.wait_for(speech["ended"].wait(), VAD_TIMEOUT)
+            except asyncio.TimeoutError:
+                set_speaking(False)
+                speech["ended_at"] = loop.time()
+            # Inference backlog: how much later than the silence window the VAD reported end of speech
+            spoke_until = caller.speech_ended_at or speech["ended_at"]
+            vad_lag = max(0.0, speech["ended_at"] - spoke_until - VAD_MIN_SILENCE)
+            await asyncio.sleep(stt.final_delay)
+            transcribed(stt.result(words, is_final=True))
+            if not args.no_endpointing:
+                await asyncio.sleep(endpointer.end_of_turn_delay())
+
+            finished = len(turns)
+            session.emit("agent_state_changed", old_state="listening", new_state="thinking")
+            history.append(llm.ChatMessage(role="user", content=[transcript]))
+            if args.submit_complaints and turn_index == 0:
+                # Inline before the model request, as the agent files it, so the store's latency
+                # lands in this turn's llm_request_sent and every later stage
+                municipal_assistant.submit_complaint("water supply", transcript, "Ward 7")
+            reply = await llm_model.chat(history)
+            tts_stream = tts.stream()
+
+            async def playout():
+                started = False
+                async for _ in tts_stream:
+                    if not started:
+                        started = True
+                        session.emit("agent_state_changed", old_state="thinking", new_state="speaking")
+
+            playback = asyncio.create_task(playout())
+            spoken = []
+            async for chunk in reply.stream():
+                text = chunk.text_content
+                spoken.append(text)
+                tts_stream.push_text(text)
+                if text.rstrip().endswith(SENTENCE_END):
+                    tts_stream.flush()
+            tts_stream.end_input()
+            await playback
+            history.append(llm.ChatMessage(role="assistant", content=["".join(spoken)]))
+            session.emit("agent_state_changed", old_state="speaking", new_state="listening")
+            if len(turns) > finished:
+                turns[-1]["vad_lag"] = vad_lag
+            await asyncio.sleep(args.think_ms / 1000)
+    finally:
+        microphone.cancel()
+        listener.cancel()
+        await vad_stream.aclose()
+    results.extend(turns)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+async def run_level(args, vad_model, concurrency):
+    results = []
+    lag = {"max": 0.0}
+
+    async def lag_probe():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag["max"] = max(lag["max"], time.perf_counter() - start - 0.01)
+
+    probe = asyncio.create_task(lag_probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(run_call(args, vad_model, results) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    probe.cancel()
+
+    # A VAD that falls behind real time delays the whole turn, so its backlog counts against the SLO
+    turn = [(r["playback_start"] + r.get("vad_lag", 0)) * 1000 for r in results if "playback_start" in r]
+    vad_lag = [r["vad_lag"] * 1000 for r in results if "vad_lag" in r]
+    stages = {
+        stage: round(percentile([r[stage] * 1000 for r in results if stage in r], 50), 1)
+        for stage in TURN_STAGES[1:]
+    }
+    return {
+        "concurrency": concurrency,
+        "turns": len(turn),
+        "p50_ms": round(percentile(turn, 50), 1),
+        "p95_ms": round(percentile(turn, 95), 1),
+        "p99_ms": round(percentile(turn, 99), 1),
+        "vad_lag_p95_ms": round(percentile(vad_lag, 95), 1),
+        "stage_p50_ms": stages,
+        "max_loop_lag_ms": round(lag["max"] * 1000, 1),
+        "turns_per_second": round(len(turn) / elapsed, 1),
+    }
+
+
+async def run_benchmark(args):
+    vad_model = silero.VAD.load(min_silence_duration=VAD_MIN_SILENCE)
+    levels = []
+    concurrency = 1
+    while concurrency <= args.max_concurrency:
+        levels.append(await run_level(args, vad_model, concurrency))
+        concurrency *= 2
+
+    within_slo = [level["concurrency"] for level in levels if level["p95_ms"] <= args.slo_ms]
+    return {
+        "config": {
+            "stt_final_ms": args.stt_final_ms,
+            "first_token_ms": args.first_token_ms,
+            "per_token_ms": args.per_token_ms,
+            "tts_first_audio_ms": args.tts_first_audio_ms,
+            "seconds_per_word": args.seconds_per_word,
+            "endpointing": not args.no_endpointing,
+            "slo_ms": args.slo_ms,
+        },
+        "levels": levels,
+        "concurrency_ceiling": max(within_slo) if within_slo else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline voice pipeline benchmark")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per simulated call")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="Highest concurrent call count to try")
+    parser.add_argument("--slo-ms", type=float, default=1500, help="p95 end-of-speech to playback target")
+    parser.add_argument("--stt-final-ms", type=float, default=150)
+    parser.add_argument("--first-token-ms", type=float, default=350)
+    parser.add_argument("--per-token-ms", type=float, default=20)
+    parser.add_argument("--tts-first-audio-ms", type=float, default=120)
+    parser.add_argument("--seconds-per-word", type=float, default=0.25, help="Caller speaking rate")
+    parser.add_argument("--think-ms", type=float, default=50, help="Pause between turns")
+    parser.add_argument("--no-endpointing", action="store_true", help="Do not include the end-of-turn delay")
+    parser.add_argument("--submit-complaints", action="store_true",
+                        help="File one complaint per call (into COMPLAINT_DB when set)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("municipal-agent").setLevel(logging.WARNING)
+    # Falling behind real time is what the benchmark measures; it is reported as VAD lag instead
+    logging.getLogger("livekit.plugins.silero").setLevel(logging.ERROR)
+    report = asyncio.run(run_benchmark(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("🧪 Offline pipeline benchmark (real VAD and framing, fake STT/LLM/TTS latency, no network)")
+    print("=" * 82)
+    print(f"{'calls':>6} {'turns':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'VAD lag':>9} "
+          f"{'loop lag':>9} {'turns/s':>8}")
+    for level in report["levels"]:
+        print(f"{level['concurrency']:>6} {level['turns']:>6} {level['p50_ms']:>8} {level['p95_ms']:>8} "
+              f"{level['p99_ms']:>8} {level['vad_lag_p95_ms']:>7}ms {level['max_loop_lag_ms']:>7}ms "
+              f"{level['turns_per_second']:>8}")
+    print("=" * 82)
+    print("Stage p50 at 1 call (ms from VAD end-of-speech):")
+    for stage, ms in report["levels"][0]["stage_p50_ms"].items():
+        print(f"  {stage:<18} {ms}")
+    print(f"✅ Concurrency ceiling within {args.slo_ms:.0f}ms p95: {report['concurrency_ceiling']} calls per worker")
+
+
+if __name__ == "__main__":
+    main()
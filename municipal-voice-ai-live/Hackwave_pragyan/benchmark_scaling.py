@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Multi-core scaling benchmark: concurrent calls sustained per number of agent worker processes.
+
+For each worker count, runs that many benchmark_pipeline.py processes side by side (pinned one
+per core with --pin, as `supervisor.py --production --pin` deploys them), all filing complaints
+into one shared SQLite store, and sums the per-worker concurrency ceilings within the SLO.
+
+Each simulated call does the agent's own CPU work (Silero VAD over 20ms frames of 48 kHz audio
+for the whole call, Deepgram JSON decoding, endpointing, turn metrics), so a worker saturates
+its core. Provider network I/O, TLS and Opus decoding are not simulated, so the totals are an
+upper bound on what the same cores sustain against the real providers.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CPU_COUNT = os.cpu_count() or 1
+
+
+def default_worker_counts():
+    counts, n = [], 1
+    while n < CPU_COUNT:
+        counts.append(n)
+        n *= 2
+    return counts + [CPU_COUNT]
+
+
+def run_workers(workers: int, args, complaint_db: str):
+    command = [
+        sys.executable, os.path.join(HERE, "benchmark_pipeline.py"), "--json", "--submit-complaints",
+        "--turns", str(args.turns), "--max-concurrency", str(args.max_concurrency), "--slo-ms", str(args.slo_ms),
+    ]
+    env = {**os.environ, "COMPLAINT_DB": complaint_db, "METRICS_PORT": "0"}
+    start = time.perf_counter()
+    processes = []
+    for index in range(workers):
+        process = subprocess.Popen(
+            command, env={**env, "AGENT_WORKER_INDEX": str(index)}, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        if args.pin and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(process.pid, {index % CPU_COUNT})
+        processes.append(process)
+    reports = [json.loads(process.communicate()[0]) for process in processes]
+    elapsed = time.perf_counter() - start
+
+    ceilings = [report["concurrency_ceiling"] for report in reports]
+    p95_at_ceiling = [
+        next((level["p95_ms"] for level in report["levels"] if level["concurrency"] == report["concurrency_ceiling"]), 0)
+        for report in reports
+    ]
+    return {
+        "workers": workers,
+        "calls_sustained": sum(ceilings),
+        "per_worker": ceilings,
+        "worst_p95_ms": max(p95_at_ceiling),
+        "seconds": round(elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent calls sustained vs. agent worker processes")
+    parser.add_argument("--workers", help="Comma-separated worker counts (default: 1, 2, 4 ... cores)")
+    parser.add_argument("--pin", action="store_true", help="Pin worker i to core i")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--slo-ms", type=float, default=1500)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else default_worker_counts()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in counts:
+            results.append(run_workers(workers, args, os.path.join(tmp, f"complaints-{workers}.db")))
+            if not args.json:
+                result = results[-1]
+                print(f"   {workers} worker(s): {result['calls_sustained']} calls in {result['seconds']}s")
+
+    if args.json:
+        print(json.dumps({"cores": CPU_COUNT, "pinned": args.pin, "results": results}, indent=2))
+        return
+
+    print(f"🧪 Scaling benchmark ({CPU_COUNT} cores, {'pinned' if args.pin else 'unpinned'}, SLO p95 {args.slo_ms:.0f}ms)")
+    print("=" * 64)
+    print(f"{'workers':>8} {'calls':>7} {'per core':>9} {'vs linear':>10} {'worst p95':>10}")
+    base = results[0]["calls_sustained"] / results[0]["workers"] if results[0]["calls_sustained"] else 0
+    for result in results:
+        per_core = result["calls_sustained"] / min(result["workers"], CPU_COUNT)
+        efficiency = result["calls_sustained"] / (base * result["workers"]) if base else 0
+        print(f"{result['workers']:>8} {result['calls_sustained']:>7} {per_core:>9.1f} {efficiency:>9.0%} "
+              f"{result['worst_p95_ms']:>8}ms")
+    print("=" * 64)
+    print("Counts VAD, framing, JSON and metrics CPU per call; provider I/O, TLS and Opus decode are not")
+    print("simulated, so these are upper bounds")
+    if any(result["workers"] > CPU_COUNT for result in results):
+        print("⚠️  More workers than cores: the extra workers share cores, so expect sub-linear scaling")
+
+
+if __name__ == "__main__":
+    main()
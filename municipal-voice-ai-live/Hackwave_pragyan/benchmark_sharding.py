@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Complaint write throughput vs. number of store shards.
+
+Runs several writer processes (standing in for agent workers), each filing complaints through
+municipal_assistant from a few threads, against a fresh store per configuration:
+
+    direct     one SQLite file, one transaction per complaint (COMPLAINT_SHARDS=1)
+    N shards   N files routed by service code, each with its own write-behind writer;
+               1 shard is the same batched writer on one file, so it separates the gain from
+               group commit from the gain from more shards
+
+Time runs until every complaint is committed, so complaints still queued are not counted as written.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CPU_COUNT = os.cpu_count() or 1
+DESCRIPTIONS = ["paani nahi aa raha", "कचरा तीन दिन से पड़ा है", "street light not working", "naali jam hai"]
+
+
+def write_complaints(complaints: int, threads: int) -> dict:
+    """Child process: file complaints from `threads` threads into the store the environment selects"""
+    sys.path.append(HERE)
+    from complaints import municipal_assistant
+
+    services = list(municipal_assistant.service_codes)
+    per_thread = complaints // threads
+
+    def submit(seed: int):
+        rng = random.Random(seed)
+        for i in range(per_thread):
+            municipal_assistant.submit_complaint(rng.choice(services), rng.choice(DESCRIPTIONS), f"Ward {i % 40}")
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=submit, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    flush = getattr(municipal_assistant.complaints, "flush", None)
+    if flush:
+        flush()
+    return {"complaints": per_thread * threads, "seconds": time.perf_counter() - start}
+
+
+def run_config(shards: int, args, complaint_db: str) -> dict:
+    """shards=0 is the direct store; every other count uses write-behind shards"""
+    command = [sys.executable, os.path.abspath(__file__), "--child",
+               "--complaints", str(args.complaints), "--threads", str(args.threads)]
+    env = {**os.environ, "COMPLAINT_DB": complaint_db, "COMPLAINT_SHARDS": str(max(shards, 1)),
+           "COMPLAINT_WRITE_BEHIND": "0" if shards == 0 else "1", "METRICS_PORT": "0"}
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen(command, env={**env, "AGENT_WORKER_INDEX": str(index)}, stdout=subprocess.PIPE,
+                         stderr=subprocess.DEVNULL)
+        for index in range(args.processes)
+    ]
+    reports = [json.loads(process.communicate()[0]) for process in processes]
+    elapsed = time.perf_counter() - start
+    written = sum(report["complaints"] for report in reports)
+    # Wall time of the slowest writer; process start-up is excluded
+    slowest = max(report["seconds"] for report in reports)
+    return {"shards": shards, "complaints": written, "seconds": round(slowest, 2),
+            "per_second": round(written / slowest), "wall_seconds": round(elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Complaint write throughput vs. store shards")
+    parser.add_argument("--shards", default="1,2,4,8", help="Comma-separated write-behind shard counts")
+    parser.add_argument("--processes", type=int, default=max(CPU_COUNT, 4), help="Writer processes (agent workers)")
+    parser.add_argument("--threads", type=int, default=4, help="Submitting threads per process")
+    parser.add_argument("--complaints", type=int, default=5000, help="Complaints per process")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(write_complaints(args.complaints, args.threads)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # The direct store first, as the baseline
+        for shards in [0] + [int(n) for n in args.shards.split(",")]:
+            results.append(run_config(shards, args, os.path.join(tmp, f"complaints-{shards}.db")))
+            if not args.json:
+                result = results[-1]
+                label = f"{shards} shard(s)" if shards else "direct"
+                print(f"   {label}: {result['complaints']} complaints in {result['seconds']}s")
+
+    if args.json:
+        print(json.dumps({"cores": CPU_COUNT, "processes": args.processes, "threads": args.threads,
+                          "results": results}, indent=2))
+        return
+
+    print(f"🧪 Sharding benchmark ({CPU_COUNT} cores, {args.processes} writer processes x {args.threads} threads)")
+    print("=" * 62)
+    print(f"{'shards':>8} {'store':>14} {'writes/s':>10} {'vs direct':>10} {'vs 1 shard':>11}")
+    direct = results[0]["per_second"]
+    one_shard = next((r["per_second"] for r in results if r["shards"] == 1), 0)
+    for result in results:
+        store = "write-behind" if result["shards"] else "direct"
+        shards = result["shards"] or 1
+        vs_direct = f"{result['per_second'] / direct:.1f}x" if direct else "-"
+        vs_one = f"{result['per_second'] / one_shard:.1f}x" if one_shard and result["shards"] else "-"
+        print(f"{shards:>8} {store:>14} {result['per_second']:>10} {vs_direct:>10} {vs_one:>11}")
+    print("=" * 62)
+    print("'vs 1 shard' is the effect of the shard count alone; 'vs direct' adds batched commits")
+    if args.processes > CPU_COUNT:
+        print("⚠️  More writer processes than cores: CPU, not the store, may cap the higher shard counts")
+
+
+if __name__ == "__main__":
+    main()
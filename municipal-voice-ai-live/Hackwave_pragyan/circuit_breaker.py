@@ -0,0 +1,292 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from livekit.agents import stt as agents_stt, tts as agents_tts
+
+from metrics import registry
+
+logger = logging.getLogger("municipal-agent")
+
+# Rolling window the error rate is computed over, and how many calls it needs before it may trip
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", "30"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+# First open period; doubles on each failed half-open probe up to BREAKER_MAX_OPEN
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "10"))
+BREAKER_MAX_OPEN = float(os.getenv("BREAKER_MAX_OPEN", "120"))
+
+# Calls slower than this (to first token / first audio) count as failures
+SLOW_CALL_SECONDS = {
+    "gemini": float(os.getenv("GEMINI_SLOW_CALL", "4")),
+    "elevenlabs": float(os.getenv("ELEVENLABS_SLOW_CALL", "3")),
+}
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = registry.gauge("municipal_circuit_state", "Provider circuit state (0 closed, 1 half-open, 2 open)")
+circuit_rejected = registry.counter(
+    "municipal_circuit_rejected_total", "Calls short-circuited because the provider's breaker was open"
+)
+circuit_transitions = registry.counter("municipal_circuit_transitions_total", "Breaker state changes")
+provider_error_rate = registry.gauge("municipal_provider_error_rate", "Failed or slow calls in the rolling window")
+provider_latency_seconds = registry.histogram(
+    "municipal_provider_latency_seconds", "Time to first token, transcript or audio per provider"
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Rolling-window breaker shared by every job in the worker; thread-safe"""
+
+    def __init__(self, name: str, window: float = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 error_rate: float = BREAKER_ERROR_RATE, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 max_open_seconds: float = BREAKER_MAX_OPEN, slow_call: Optional[float] = None):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.slow_call = slow_call
+        self.state = CLOSED
+        self._outcomes = deque()  # (timestamp, ok)
+        self._failures = 0
+        self._opened_for = open_seconds
+        self._retry_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        circuit_state.set_function(lambda: _STATE_VALUES[self.state], provider=name)
+        provider_error_rate.set_function(self.current_error_rate, provider=name)
+
+    def _prune(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            if not self._outcomes.popleft()[1]:
+                self._failures -= 1
+
+    def current_error_rate(self) -> float:
+        with self._lock:
+            self._prune(time.monotonic())
+            return self._failures / len(self._outcomes) if self._outcomes else 0.0
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logger.warning(f"Circuit {self.name}: {self.state} -> {state}")
+            self.state = state
+            circuit_transitions.inc(provider=self.name, state=state)
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe is let through"""
+        return self.admit()[0]
+
+    def admit(self) -> Tuple[bool, bool]:
+        """(allowed, probe): a call admitted as the half-open probe must report an outcome or release it"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True, False
+            if self.state == OPEN:
+                if time.monotonic() < self._retry_at:
+                    circuit_rejected.inc(provider=self.name)
+                    return False, False
+                self._transition(HALF_OPEN)
+            if self._probe_in_flight:
+                circuit_rejected.inc(provider=self.name)
+                return False, False
+            self._probe_in_flight = True
+            return True, True
+
+    def record_success(self, latency: Optional[float] = None):
+        if latency is not None:
+            provider_latency_seconds.observe(latency, provider=self.name)
+            if self.slow_call and latency > self.slow_call:
+                self.record_failure(slow=True)
+                return
+        with self._lock:
+            if self.state == HALF_OPEN:
+                # The probe got through: start from a clean window
+                self._probe_in_flight = False
+                self._outcomes.clear()
+                self._failures = 0
+                self._opened_for = self.open_seconds
+                self._transition(CLOSED)
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, True))
+            self._prune(now)
+
+    def record_failure(self, slow: bool = False):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._opened_for = min(self._opened_for * 2, self.max_open_seconds)
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._failures += 1
+            self._prune(now)
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and self._failures / len(self._outcomes) >= self.error_rate):
+                self._open(now)
+        if slow:
+            logger.debug(f"Circuit {self.name}: slow call counted as failure")
+
+    def release_probe(self):
+        """The probe ended without an outcome (e.g. the caller barged in); let another one through"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _open(self, now: float):
+        self._retry_at = now + self._opened_for
+        self._transition(OPEN)
+        logger.warning(f"Circuit {self.name}: failing fast for {self._opened_for:g}s")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, provider: Optional[str] = None) -> CircuitBreaker:
+    """Per-process breaker for a provider endpoint, e.g. "gemini:gemini-1.5-flash" """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, slow_call=SLOW_CALL_SECONDS.get(provider or name.split(":")[0]))
+        return _breakers[name]
+
+
+class _GuardedStream:
+    """Stream proxy that reports time to first output and stream errors to a breaker"""
+
+    def __init__(self, stream, breaker: CircuitBreaker, is_output: Callable = lambda event: True,
+                 probe: bool = False, report: bool = True):
+        self._stream = stream
+        self._breaker = breaker
+        # Set from the stream's own admit() result; the breaker's current state may belong to another call
+        self._probe = probe
+        self._is_output = is_output
+        self._started: Optional[float] = None
+        # A stream opened without being admitted reports nothing, so it cannot end another call's probe
+        self._reported = not report
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def push_text(self, text: str):
+        if self._started is None:
+            self._started = time.perf_counter()
+        self._stream.push_text(text)
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        self._release()
+        return await self._stream.__aexit__(*args)
+
+    async def aclose(self):
+        self._release()
+        await self._stream.aclose()
+
+    def _release(self):
+        if not self._reported:
+            self._reported = True
+            if self._probe:
+                self._breaker.release_probe()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            event = await self._stream.__anext__()
+        except StopAsyncIteration:
+            raise
+        except Exception:
+            if not self._reported:
+                self._reported = True
+                self._breaker.record_failure()
+            raise
+        if not self._reported and self._is_output(event):
+            self._reported = True
+            latency = time.perf_counter() - self._started if self._started is not None else None
+            self._breaker.record_success(latency)
+        return event
+
+
+class CachedClipStream:
+    """Stands in for a TTS stream by playing a pre-rendered clip once, whatever text is pushed"""
+
+    def __init__(self, frames: List):
+        self._frames = iter(frames)
+
+    def push_text(self, text: str):
+        pass
+
+    def flush(self):
+        pass
+
+    def end_input(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = next(self._frames, None)
+        if frame is None:
+            raise StopAsyncIteration
+        return agents_tts.SynthesizedAudio(frame=frame, request_id="circuit-open", is_final=True)
+
+
+def guard_tts(tts, fallback_frames: Callable[[], Optional[List]]):
+    """Route tts.stream() through a breaker; while it is open play the cached fallback clip instead"""
+    open_stream = tts.stream
+
+    def stream(*args, **kwargs):
+        # Keyed by model so a language-pinned model is judged separately from the multilingual one
+        breaker = get_breaker(f"elevenlabs:{tts.model}", "elevenlabs")
+        allowed, probe = breaker.admit()
+        if not allowed:
+            frames = fallback_frames()
+            if frames:
+                return CachedClipStream(frames)
+            # Nothing cached yet: a slow answer beats silence
+        return _GuardedStream(open_stream(*args, **kwargs), breaker, probe=probe, report=allowed)
+
+    tts.stream = stream
+
+
+def guard_stt(stt):
+    """Route stt.stream() through a breaker; a stream is healthy once it delivers a final transcript"""
+    open_stream = stt.stream
+
+    def is_final(event):
+        return getattr(event, "type", None) == agents_stt.SpeechEventType.FINAL_TRANSCRIPT
+
+    def stream(*args, **kwargs):
+        breaker = get_breaker(f"deepgram:{stt.model}", "deepgram")
+        allowed, probe = breaker.admit()
+        if not allowed:
+            # There is no second STT provider to fail over to; still open the stream so the call
+            # keeps working if Deepgram recovers, but the state shows up on /metrics
+            logger.warning(f"Circuit {breaker.name} is open; opening the stream anyway")
+        return _GuardedStream(open_stream(*args, **kwargs), breaker, is_final, probe=probe, report=allowed)
+
+    stt.stream = stream
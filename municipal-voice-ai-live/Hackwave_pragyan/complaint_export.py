@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Stream complaints out of the store as CSV or newline-delimited JSON, optionally gzipped.
+
+Rows are read from the store in batches and encoded into ~64 KB chunks as they arrive, so
+memory stays flat however many complaints there are. The Django app is deployed on its own
+and keeps a copy of the encoders (muncipleapp/export.py) for its export view; keep the two in step.
+
+    python complaint_export.py --db complaints.db -o complaints.csv.gz --gzip
+    python complaint_export.py --db complaints.db --format ndjson --service WS --since 2024-06-01
+"""
+import io
+import os
+import sys
+import csv
+import json
+import time
+import zlib
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from complaint_store import COMPLAINT_DB, SCAN_BATCH_SIZE, is_sharded, open_store
+
+EXPORT_FIELDS = ('id', 'service_code', 'type', 'description', 'location', 'status', 'created', 'worker')
+FORMATS = ('csv', 'ndjson')
+# Encoded text is buffered up to this size before it is yielded (one write / one HTTP chunk)
+CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+
+def export_rows(store, since: Optional[float] = None, until: Optional[float] = None,
+                service_code: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Flat export rows, with the service code reclassify_complaints.py assigned where there is one"""
+    for complaint_id, record in store.scan(since, until, service_code, batch_size):
+        yield {
+            'id': complaint_id,
+            # Otherwise the code the ID was issued with, e.g. WS20240101-0001
+            'service_code': record.get('service_code') or complaint_id[:2],
+            'type': record.get('type', ''),
+            'description': record.get('description', ''),
+            'location': record.get('location', ''),
+            'status': record.get('status', ''),
+            'created': datetime.fromtimestamp(record['timestamp'], tz=timezone.utc).isoformat(),
+            'worker': record.get('worker', 0),
+        }
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], chunk_bytes: int = CHUNK_BYTES) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], chunk_bytes: int = CHUNK_BYTES) -> Iterator[str]:
+    lines, size = [], 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(lines)
+            lines, size = [], 0
+    yield "".join(lines)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream incrementally into one gzip member"""
+    # wbits=31 writes the gzip header and trailer, so the output opens with gunzip / gzip.open
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(rows: Iterable[Dict[str, Any]], fmt: str = 'csv', compress: bool = False) -> Iterator[bytes]:
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    encoded = (chunk.encode('utf-8') for chunk in (iter_csv if fmt == 'csv' else iter_ndjson)(rows))
+    return gzip_chunks(encoded) if compress else encoded
+
+
+def parse_date(value: str) -> float:
+    """ISO date or datetime to a Unix timestamp; naive values are local time, like time.time()"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export complaints as CSV or NDJSON without loading them all")
+    parser.add_argument("--db", default=COMPLAINT_DB, help="Complaint store (default: COMPLAINT_DB)")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    parser.add_argument("--since", type=parse_date, help="Only complaints filed at or after this date (ISO)")
+    parser.add_argument("--until", type=parse_date, help="Only complaints filed before this date (ISO)")
+    parser.add_argument("--service", help="Only this service code, e.g. WS")
+    parser.add_argument("--batch-size", type=int, default=SCAN_BATCH_SIZE, help="Rows per store read")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("give --db or set COMPLAINT_DB; the in-memory store lives only inside the agent worker")
+    if not (os.path.exists(args.db) or is_sharded(args.db)):
+        parser.error(f"no complaint store at {args.db}")
+
+    # A sharded store reads its shard count from its own layout
+    store = open_store(args.db, shards=1)
+    counted = {'rows': 0}
+
+    def counting(rows):
+        for row in rows:
+            counted['rows'] += 1
+            yield row
+
+    rows = counting(export_rows(store, args.since, args.until, args.service and args.service.upper(), args.batch_size))
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    start = time.perf_counter()
+    written = 0
+    try:
+        for chunk in stream_export(rows, args.format, args.gzip):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    # Progress goes to stderr so stdout can be piped
+    print(f"✅ Exported {counted['rows']} complaints ({written / 1e6:.1f} MB) in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
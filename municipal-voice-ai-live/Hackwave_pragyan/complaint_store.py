@@ -0,0 +1,527 @@
+import os
+import json
+import time
+import zlib
+import queue
+import atexit
+import heapq
+import sqlite3
+import logging
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import queue_depth
+
+logger = logging.getLogger("municipal-agent")
+
+# SQLite file shared by every agent worker on the host; unset keeps complaints in process memory
+COMPLAINT_DB = os.getenv("COMPLAINT_DB", "")
+COMPLAINT_DB_BUSY_MS = int(os.getenv("COMPLAINT_DB_BUSY_MS", "5000"))
+# Rows per read when scanning the whole store (exports)
+SCAN_BATCH_SIZE = int(os.getenv("COMPLAINT_SCAN_BATCH", "1000"))
+# Split COMPLAINT_DB into this many files, routed by service code, each with its own writer
+COMPLAINT_SHARDS = int(os.getenv("COMPLAINT_SHARDS", "1"))
+# Batch writes through a write-behind writer even with a single shard
+COMPLAINT_WRITE_BEHIND = os.getenv("COMPLAINT_WRITE_BEHIND", "0") == "1"
+# Complaints waiting per shard before submit_complaint blocks (backpressure on the writer)
+SHARD_QUEUE_MAX = int(os.getenv("COMPLAINT_SHARD_QUEUE_MAX", "10000"))
+# Most complaints committed in one shard transaction
+SHARD_WRITE_BATCH = int(os.getenv("COMPLAINT_SHARD_WRITE_BATCH", "500"))
+# Counter values a process reserves per shard write; IDs stay unique but skip numbers across restarts
+SHARD_ID_BLOCK = int(os.getenv("COMPLAINT_SHARD_ID_BLOCK", "32"))
+
+
+def _matches(complaint_id: str, record: Dict[str, Any], since, until, service_code) -> bool:
+    # The code reclassify_complaints.py assigned wins over the one the ID was issued with
+    if service_code and (record.get('service_code') or complaint_id[:len(service_code)]) != service_code:
+        return False
+    if since is not None and record['timestamp'] < since:
+        return False
+    return until is None or record['timestamp'] < until
+
+
+class MemoryComplaintStore(dict):
+    """Complaints of a single process, keyed by complaint ID"""
+
+    persistent = False
+
+    def __init__(self):
+        super().__init__()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, complaint_id: str, record: Dict[str, Any]):
+        self[complaint_id] = record
+
+    def set_status(self, complaint_id: str, status: str) -> Optional[str]:
+        """Returns the previous status, or None if the complaint does not exist"""
+        with self._lock:
+            record = self.get(complaint_id)
+            if record is None:
+                return None
+            previous, record['status'] = record['status'], status
+            return previous
+
+    def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        """Merge fields into existing complaints; unknown IDs are skipped"""
+        with self._lock:
+            for complaint_id, fields in updates:
+                record = self.get(complaint_id)
+                if record is not None:
+                    record.update(fields)
+
+    def owned(self, worker: int) -> Tuple[List[Dict[str, Any]], Any]:
+        """Complaints filed by this worker and the status-log cursor they are current to"""
+        return [record for record in list(self.values()) if record.get('worker', 0) == worker], None
+
+    def status_changes(self, worker: int, cursor: Any) -> Tuple[List[Tuple[str, str, str, str]], Any]:
+        # One process: the worker that changes a status is always the one that counted the complaint
+        return [], cursor
+
+    def next_counter(self, name: str, key: Optional[str] = None) -> int:
+        with self._lock:
+            value = self._counters.get(name, 0) + 1
+            self._counters[name] = value
+            return value
+
+    def scan(self, since: Optional[float] = None, until: Optional[float] = None,
+             service_code: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(complaint_id, record) in insertion order, filtered by timestamp range and service code"""
+        # Snapshot the keys only, so complaints filed mid-scan cannot break the iteration
+        for complaint_id in list(self):
+            record = self.get(complaint_id)
+            if record is not None and _matches(complaint_id, record, since, until, service_code):
+                yield complaint_id, record
+
+
+class SQLiteComplaintStore(Mapping):
+    """Complaints shared by several worker processes through one SQLite database in WAL mode
+
+    WAL lets readers run alongside the single writer; every write is one short statement,
+    so workers queue on the busy timeout for microseconds rather than failing.
+    """
+
+    persistent = True
+
+    def __init__(self, path: str, busy_ms: int = COMPLAINT_DB_BUSY_MS):
+        self.path = path
+        self.busy_ms = busy_ms
+        # One connection per thread: agent jobs run as threads in the worker
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS complaints ("
+            " complaint_id TEXT PRIMARY KEY, type TEXT, description TEXT, location TEXT,"
+            " status TEXT, timestamp REAL, extra TEXT)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # Status changes for the worker that filed (and counts) each complaint, whoever made them
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS status_log ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, worker INTEGER NOT NULL, complaint_id TEXT,"
+            " type TEXT, location TEXT, previous TEXT, status TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS status_log_worker ON status_log (worker, seq)")
+        logger.info(f"Complaint store: {path} (WAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_ms / 1000, isolation_level=None)
+            # WAL is durable across process crashes at NORMAL; only an OS crash can lose the last commits
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_ms}")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _record(row) -> Dict[str, Any]:
+        complaint_type, description, location, status, timestamp, extra = row
+        record = {
+            'type': complaint_type, 'description': description, 'location': location,
+            'status': status, 'timestamp': timestamp,
+        }
+        if extra:
+            record.update(json.loads(extra))
+        return record
+
+    @staticmethod
+    def _row(complaint_id: str, record: Dict[str, Any]) -> tuple:
+        extra = {k: v for k, v in record.items() if k not in ('type', 'description', 'location', 'status', 'timestamp')}
+        return (complaint_id, record['type'], record['description'], record['location'], record['status'],
+                record['timestamp'], json.dumps(extra) if extra else None)
+
+    def add(self, complaint_id: str, record: Dict[str, Any]):
+        self._conn().execute("INSERT INTO complaints VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(complaint_id, record))
+
+    def set_status(self, complaint_id: str, status: str) -> Optional[str]:
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so read-then-update cannot interleave with another worker
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT status, type, location, extra FROM complaints WHERE complaint_id = ?", (complaint_id,)
+            ).fetchone()
+            if row is not None:
+                previous, complaint_type, location, extra = row
+                conn.execute("UPDATE complaints SET status = ? WHERE complaint_id = ?", (status, complaint_id))
+                conn.execute(
+                    "INSERT INTO status_log (worker, complaint_id, type, location, previous, status)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (json.loads(extra).get('worker', 0) if extra else 0, complaint_id, complaint_type, location,
+                     previous, status),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        """Merge fields into existing complaints in one transaction; unknown IDs are skipped
+
+        Not for status, which goes through set_status so the change is logged for the owning worker.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for complaint_id, fields in updates:
+                row = conn.execute(
+                    "SELECT type, description, location, status, timestamp, extra FROM complaints"
+                    " WHERE complaint_id = ?", (complaint_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+                record = {**self._record(row), **fields}
+                conn.execute(
+                    "UPDATE complaints SET type = ?, description = ?, location = ?, status = ?, timestamp = ?,"
+                    " extra = ? WHERE complaint_id = ?", (*self._row(complaint_id, record)[1:], complaint_id)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def owned(self, worker: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Complaints filed by this worker and the status-log cursor they are current to, read in one snapshot"""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            cursor = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM status_log").fetchone()[0]
+            rows = conn.execute(
+                "SELECT type, description, location, status, timestamp, extra FROM complaints"
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        records = (self._record(row) for row in rows)
+        return [record for record in records if record.get('worker', 0) == worker], cursor
+
+    def status_changes(self, worker: int, cursor: int) -> Tuple[List[Tuple[str, str, str, str]], int]:
+        """(type, location, previous, status) of this worker's complaints changed after `cursor`"""
+        rows = self._conn().execute(
+            "SELECT seq, type, location, previous, status FROM status_log WHERE worker = ? AND seq > ? ORDER BY seq",
+            (worker, cursor or 0),
+        ).fetchall()
+        return [row[1:] for row in rows], rows[-1][0] if rows else cursor
+
+    def add_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Insert complaints in one transaction (the write-behind group commit)"""
+        rows = [self._row(complaint_id, record) for complaint_id, record in items]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # OR IGNORE: a batch retried after a failed COMMIT may already be partly stored
+            conn.executemany("INSERT OR IGNORE INTO complaints VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def next_counter(self, name: str, key: Optional[str] = None, block: int = 1) -> int:
+        """Atomic across processes, so complaint IDs stay unique with any number of workers
+
+        With block > 1 the values up to the returned one are reserved for the caller.
+        """
+        return self._conn().execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value RETURNING value",
+            (name, block),
+        ).fetchone()[0]
+
+    def __getitem__(self, complaint_id: str) -> Dict[str, Any]:
+        row = self._conn().execute(
+            "SELECT type, description, location, status, timestamp, extra FROM complaints WHERE complaint_id = ?",
+            (complaint_id,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(complaint_id)
+        return self._record(row)
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self._conn().execute("SELECT complaint_id FROM complaints").fetchall())
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+
+    def items(self):
+        rows = self._conn().execute(
+            "SELECT complaint_id, type, description, location, status, timestamp, extra FROM complaints"
+        ).fetchall()
+        return [(row[0], self._record(row[1:])) for row in rows]
+
+    def values(self):
+        return [record for _, record in self.items()]
+
+    def scan(self, since: Optional[float] = None, until: Optional[float] = None,
+             service_code: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(complaint_id, record) in insertion order, `batch_size` rows per read
+
+        Each batch seeks past the last rowid seen and is its own short read, so a long export
+        never holds a read transaction open (which would stall WAL checkpoints) and memory
+        stays at one batch whatever the table size.
+        """
+        where, params = ["rowid > ?"], []
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(until)
+        if service_code:
+            # The code reclassify_complaints.py assigned, else the one the ID starts with (WS20240101-0001)
+            where.append("COALESCE(json_extract(extra, '$.service_code'), substr(complaint_id, 1, ?)) = ?")
+            params += [len(service_code), service_code]
+        sql = (
+            "SELECT rowid, complaint_id, type, description, location, status, timestamp, extra FROM complaints"
+            f" WHERE {' AND '.join(where)} ORDER BY rowid LIMIT ?"
+        )
+        last = 0
+        while True:
+            rows = self._conn().execute(sql, (last, *params, batch_size)).fetchall()
+            for row in rows:
+                yield row[1], self._record(row[2:])
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+
+class _WriteBehindShard:
+    """One shard file and the thread that writes its queued complaints in batched transactions"""
+
+    def __init__(self, index: int, store: SQLiteComplaintStore):
+        self.index = index
+        self.store = store
+        self.queue: "queue.Queue[Tuple[str, Dict[str, Any], threading.Event]]" = queue.Queue(maxsize=SHARD_QUEUE_MAX)
+        # Queued but not yet committed, so this process reads its own writes; the event is set on commit
+        self.pending: Dict[str, Tuple[Dict[str, Any], threading.Event]] = {}
+        self._counters: Dict[str, Tuple[int, int]] = {}
+        self._counter_lock = threading.Lock()
+        queue_depth.set_function(self.queue.qsize, queue=f"complaint_shard_{index}")
+        threading.Thread(target=self._run, name=f"complaint-shard-{index}", daemon=True).start()
+
+    def add(self, complaint_id: str, record: Dict[str, Any]):
+        committed = threading.Event()
+        self.pending[complaint_id] = (record, committed)
+        self.queue.put((complaint_id, record, committed))
+
+    def get_pending(self, complaint_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.pending.get(complaint_id)
+        return entry[0] if entry else None
+
+    def wait_committed(self, complaint_id: str):
+        """Wait for this one complaint's batch only, however busy the queue stays"""
+        entry = self.pending.get(complaint_id)
+        if entry:
+            entry[1].wait()
+
+    def next_counter(self, name: str) -> int:
+        # Reserve SHARD_ID_BLOCK values per round trip; one counter write no longer precedes every complaint
+        with self._counter_lock:
+            value, last = self._counters.get(name, (0, 0))
+            if value >= last:
+                last = self.store.next_counter(name, block=SHARD_ID_BLOCK)
+                value = last - SHARD_ID_BLOCK
+            self._counters[name] = (value + 1, last)
+            return value + 1
+
+    def flush(self):
+        """Wait for the complaints queued before this call; later submits do not extend the wait"""
+        for _, committed in list(self.pending.values()):
+            committed.wait()
+
+    def _run(self):
+        while True:
+            # Whatever queued up during the previous commit goes into the next one
+            batch = [self.queue.get()]
+            while len(batch) < SHARD_WRITE_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [(complaint_id, record) for complaint_id, record, _ in batch]
+            delay = 0.05
+            while True:
+                try:
+                    self.store.add_many(items)
+                    break
+                except sqlite3.OperationalError as e:
+                    # Busy beyond the timeout: keep the batch and retry rather than lose complaints
+                    logger.warning(f"Complaint shard {self.index} write failed ({e}); retrying in {delay:g}s")
+                    time.sleep(delay)
+                    delay = min(delay * 2, 2.0)
+                except Exception as e:
+                    logger.error(f"Complaint shard {self.index} dropped {len(batch)} complaints: {e}")
+                    break
+            for complaint_id, record, committed in batch:
+                entry = self.pending.get(complaint_id)
+                if entry and entry[0] is record:
+                    del self.pending[complaint_id]
+                # Also set when the batch was dropped, so no caller waits forever
+                committed.set()
+
+
+class ShardedComplaintStore(Mapping):
+    """Complaints split across SQLite files by service code, so workers write several files in parallel
+
+    Complaint IDs start with the service code, which routes any ID back to its shard. Writes are
+    queued per shard and committed in batches by the shard's writer thread. Lookups by ID see this
+    process's queued complaints; listings, scans and other processes see them once committed
+    (milliseconds later).
+    """
+
+    persistent = True
+
+    def __init__(self, path: str, shards: Optional[int] = None, routes: List[str] = ()):
+        self.path = path
+        first = SQLiteComplaintStore(f"{path}-shard0")
+        shards, self.routes = self._layout(first, shards, list(routes))
+        self.shards = [_WriteBehindShard(0, first)] + [
+            _WriteBehindShard(index, SQLiteComplaintStore(f"{path}-shard{index}")) for index in range(1, shards)
+        ]
+        self._route = {code: position % shards for position, code in enumerate(self.routes)}
+        self._pool = ThreadPoolExecutor(max_workers=shards, thread_name_prefix="complaint-fanout")
+        # Queued complaints are only in memory; commit them before the worker exits
+        atexit.register(self.flush)
+        logger.info(f"Complaint store: {shards} shards at {path}-shard*")
+
+    def _layout(self, first: SQLiteComplaintStore, shards: Optional[int], routes: List[str]) -> Tuple[int, List[str]]:
+        """Shard count and routed service codes, fixed in shard 0 by whichever process opened the store first"""
+        conn = first._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS shard_layout ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0), shards INTEGER NOT NULL, routes TEXT NOT NULL)"
+        )
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT shards, routes FROM shard_layout").fetchone()
+            if row is None:
+                created_with, saved = shards or COMPLAINT_SHARDS, []
+                conn.execute("INSERT INTO shard_layout VALUES (0, ?, '[]')", (created_with,))
+            else:
+                created_with, saved = row[0], json.loads(row[1])
+            # New service codes are appended, so existing codes never move to another shard
+            merged = saved + [code for code in routes if code not in saved]
+            if merged != saved:
+                conn.execute("UPDATE shard_layout SET routes = ?", (json.dumps(merged),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if shards is not None and shards != created_with:
+            # Routing depends on the shard count; reopening with another count would hide complaints
+            raise RuntimeError(
+                f"{self.path} was sharded {created_with} ways; set COMPLAINT_SHARDS={created_with} or re-shard first"
+            )
+        return created_with, merged
+
+    def shard_for(self, key: str) -> _WriteBehindShard:
+        """Shard of a service code or a complaint ID (which starts with one)"""
+        code = key[:2]
+        # Known services are spread round-robin; ad hoc codes (first two letters of the type) are hashed
+        index = self._route.get(code)
+        return self.shards[zlib.crc32(code.encode()) % len(self.shards) if index is None else index]
+
+    def _fan_out(self, fn):
+        # Reads go straight to the shard files; complaints still queued show up a batch later
+        return list(self._pool.map(fn, [shard.store for shard in self.shards]))
+
+    def flush(self):
+        for shard in self.shards:
+            shard.flush()
+
+    def add(self, complaint_id: str, record: Dict[str, Any]):
+        self.shard_for(complaint_id).add(complaint_id, record)
+
+    def set_status(self, complaint_id: str, status: str) -> Optional[str]:
+        shard = self.shard_for(complaint_id)
+        # Keeps the update ordered after the complaint's own insert
+        shard.wait_committed(complaint_id)
+        return shard.store.set_status(complaint_id, status)
+
+    def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        """One transaction per shard touched"""
+        by_shard: Dict[int, List[Tuple[str, Dict[str, Any]]]] = {}
+        for complaint_id, fields in updates:
+            shard = self.shard_for(complaint_id)
+            shard.wait_committed(complaint_id)
+            by_shard.setdefault(shard.index, []).append((complaint_id, fields))
+        for index, items in by_shard.items():
+            self.shards[index].store.update_many(items)
+
+    def owned(self, worker: int) -> Tuple[List[Dict[str, Any]], Tuple]:
+        results = self._fan_out(lambda store: store.owned(worker))
+        return [record for records, _ in results for record in records], tuple(cursor for _, cursor in results)
+
+    def status_changes(self, worker: int, cursor: Tuple) -> Tuple[List[Tuple[str, str, str, str]], Tuple]:
+        results = [shard.store.status_changes(worker, shard_cursor) for shard, shard_cursor in zip(self.shards, cursor)]
+        return [change for changes, _ in results for change in changes], tuple(cursor for _, cursor in results)
+
+    def next_counter(self, name: str, key: Optional[str] = None) -> int:
+        """Per shard, so only unique together with the service code prefix; callbacks count on shard 0"""
+        return (self.shard_for(key) if key else self.shards[0]).next_counter(name)
+
+    def __getitem__(self, complaint_id: str) -> Dict[str, Any]:
+        shard = self.shard_for(complaint_id)
+        record = shard.get_pending(complaint_id)
+        return record if record is not None else shard.store[complaint_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return (complaint_id for ids in self._fan_out(list) for complaint_id in ids)
+
+    def __len__(self) -> int:
+        return sum(self._fan_out(len))
+
+    def items(self):
+        return [item for items in self._fan_out(lambda store: store.items()) for item in items]
+
+    def values(self):
+        return [record for _, record in self.items()]
+
+    def scan(self, since: Optional[float] = None, until: Optional[float] = None,
+             service_code: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every shard's batched scan (each in commit order), merged by timestamp"""
+        # Every shard even for one service: a reclassified complaint stays in the shard its ID routed it to
+        return heapq.merge(
+            *(shard.store.scan(since, until, service_code, batch_size) for shard in self.shards),
+            key=lambda item: item[1]['timestamp'],
+        )
+
+
+def is_sharded(path: str) -> bool:
+    return os.path.exists(f"{path}-shard0")
+
+
+def open_store(path: str = COMPLAINT_DB, shards: int = COMPLAINT_SHARDS, routes: List[str] = (),
+               write_behind: bool = COMPLAINT_WRITE_BEHIND):
+    """routes lists the service codes to spread evenly over the shards"""
+    if not path:
+        return MemoryComplaintStore()
+    if shards > 1 or write_behind:
+        return ShardedComplaintStore(path, shards, routes)
+    if is_sharded(path):
+        # Opened without COMPLAINT_SHARDS (e.g. by an export); the store knows its own shard count
+        return ShardedComplaintStore(path, routes=routes)
+    return SQLiteComplaintStore(path)
@@ -0,0 +1,140 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from aggregates import ComplaintAggregates
+from complaint_store import open_store
+from events import complaint_events
+from metrics import register_json_route
+
+logger = logging.getLogger("municipal-agent")
+
+# Set by the supervisor when it runs several agent workers against one shared store
+AGENT_WORKER_INDEX = int(os.getenv("AGENT_WORKER_INDEX", "0"))
+
+
+class MunicipalAssistant:
+    def __init__(self, store=None):
+        self.callbacks: Dict[str, Dict[str, Any]] = {}
+        self.service_codes = {
+            "property tax": "PT",
+            "water supply": "WS", 
+            "waste management": "WM",
+            "street light": "SL",
+            "certificates": "CI",
+            "road issues": "RI",
+            "garbage collection": "GC",
+            "drainage": "DR"
+        }
+        # In-process dict by default; a SQLite file (COMPLAINT_DB) when several workers share complaints,
+        # split into COMPLAINT_SHARDS files by service code when one writer is not enough
+        self.complaints = open_store(routes=list(self.service_codes.values())) if store is None else store
+        # Dashboard counters, updated on every submit and status change
+        self.aggregates = ComplaintAggregates()
+        # Position in the shared store's status log up to which this worker's counters are current
+        self._status_cursor = None
+        self._status_lock = threading.Lock()
+        if self.complaints.persistent:
+            self.rebuild_aggregates()
+    
+    def service_code_for(self, service_type: str) -> str:
+        # Known service or first two letters
+        return self.service_codes.get(service_type.lower(), service_type[:2].upper())
+    
+    def generate_complaint_id(self, service_type: str) -> str:
+        from datetime import datetime
+        date_str = datetime.now().strftime('%Y%m%d')
+        service_code = self.service_code_for(service_type)
+        
+        # Atomic in the store, so IDs are unique across threads and worker processes;
+        # a sharded store counts per shard, unique together with the service code prefix
+        counter = self.complaints.next_counter("complaint", service_code)
+        return f"{service_code}{date_str}-{counter:04d}"
+    
+    def submit_complaint(self, service_type: str, description: str, location: str) -> str:
+        complaint_id = self.generate_complaint_id(service_type)
+        complaint = {
+            'type': service_type,
+            'description': description,
+            'location': location,
+            'status': 'submitted',
+            'timestamp': time.time(),
+            'worker': AGENT_WORKER_INDEX
+        }
+        self.complaints.add(complaint_id, complaint)
+        self.aggregates.record_new(self.service_code_for(service_type), location)
+        complaint_events.publish("complaint.created", {'complaint_id': complaint_id, **complaint})
+        logger.info(f"New complaint submitted: {complaint_id}")
+        return complaint_id
+    
+    def update_status(self, complaint_id: str, status: str) -> bool:
+        complaint = self.complaints.get(complaint_id)
+        if complaint is None:
+            return False
+        previous = self.complaints.set_status(complaint_id, status)
+        if previous is None:
+            return False
+        if self.complaints.persistent:
+            # The store logs the change for the worker that counted the complaint; that may be this one
+            self.sync_status_changes()
+        else:
+            self.aggregates.record_status_change(
+                self.service_code_for(complaint['type']), complaint['location'], previous, status
+            )
+        complaint_events.publish(
+            "complaint.status", {'complaint_id': complaint_id, 'status': status, 'previous': previous}
+        )
+        logger.info(f"Complaint {complaint_id}: {previous} -> {status}")
+        return True
+    
+    def get_complaint_status(self, complaint_id: str) -> Dict[str, Any]:
+        return self.complaints.get(complaint_id, {"error": "Complaint ID not found"})
+    
+    def schedule_callback(self, caller: str, reason: str) -> str:
+        """Queue a call-back for a caller we could not serve live (e.g. under overload)"""
+        from datetime import datetime
+        counter = self.complaints.next_counter("callback")
+        callback_id = f"CB{datetime.now().strftime('%Y%m%d')}-{counter:04d}"
+        self.callbacks[callback_id] = {
+            'caller': caller,
+            'reason': reason,
+            'status': 'pending',
+            'timestamp': time.time()
+        }
+        logger.info(f"Callback scheduled: {callback_id}")
+        return callback_id
+    
+    def get_all_complaints(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self.complaints.items())
+    
+    def iter_complaints(self, since: Optional[float] = None, until: Optional[float] = None,
+                        service_code: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(complaint_id, complaint) read from the store in batches; use for exports instead of get_all_complaints"""
+        return self.complaints.scan(since, until, service_code)
+    
+    def rebuild_aggregates(self) -> int:
+        """Recount the dashboard from the stored complaints (after a restart or a bulk load)"""
+        # With a shared store each worker counts its own complaints; the dashboard sums the workers
+        with self._status_lock:
+            own, self._status_cursor = self.complaints.owned(AGENT_WORKER_INDEX)
+            return self.aggregates.rebuild(own, self.service_code_for)
+    
+    def sync_status_changes(self) -> int:
+        """Apply status changes other workers made to complaints this worker counts"""
+        with self._status_lock:
+            changes, self._status_cursor = self.complaints.status_changes(AGENT_WORKER_INDEX, self._status_cursor)
+            for service_type, location, previous, status in changes:
+                self.aggregates.record_status_change(self.service_code_for(service_type), location, previous, status)
+            return len(changes)
+    
+    def dashboard(self) -> Dict[str, Any]:
+        if self.complaints.persistent:
+            self.sync_status_changes()
+        return self.aggregates.snapshot()
+
+
+# Create global instance
+municipal_assistant = MunicipalAssistant()
+register_json_route("/dashboard", municipal_assistant.dashboard)
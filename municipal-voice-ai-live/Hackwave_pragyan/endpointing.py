@@ -0,0 +1,158 @@
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+logger = logging.getLogger("municipal-agent")
+
+# Silero only needs to flag a short pause; the adaptive delay decides whether the turn is over
+VAD_MIN_SILENCE = float(os.getenv("VAD_MIN_SILENCE", "0.3"))
+
+TERMINAL_PUNCTUATION = (".", "?", "!", "।", "॥")
+
+
+@dataclass
+class EndpointingProfile:
+    """Per-language bounds and weights for choosing the end-of-turn delay (seconds)"""
+    min_delay: float
+    max_delay: float
+    base_delay: float
+    reference_rate: float  # words per second for an average caller
+    punctuation_factor: float = 0.5
+    continuation_factor: float = 1.6
+    continuation_words: Tuple[str, ...] = field(default_factory=tuple)
+
+
+PROFILES = {
+    "en": EndpointingProfile(
+        min_delay=0.2, max_delay=1.2, base_delay=0.6, reference_rate=2.5,
+        continuation_words=(
+            "and", "but", "or", "so", "because", "the", "a", "an", "to", "of", "in",
+            "at", "near", "my", "is", "um", "uh", "like",
+        ),
+    ),
+    # Hindi callers pause more mid-sentence and postpositions often trail a clause
+    "hi": EndpointingProfile(
+        min_delay=0.3, max_delay=1.5, base_delay=0.75, reference_rate=2.2,
+        continuation_words=(
+            "aur", "lekin", "par", "ki", "ke", "ka", "ko", "se", "mein", "me", "to",
+            "kyunki", "ya", "jo", "matlab", "woh", "वो", "और", "लेकिन", "कि", "के",
+            "का", "को", "से", "में", "तो", "क्योंकि", "या", "जो",
+        ),
+    ),
+}
+
+_WORD_RE = re.compile(r"[\wऀ-ॿ']+")
+
+
+class AdaptiveEndpointer:
+    """Picks the end-of-turn delay from VAD probability, interim punctuation and speaking rate"""
+
+    def __init__(self, language: str = "en", rate_smoothing: float = 0.3):
+        self.profile = PROFILES.get(language, PROFILES["en"])
+        self.language = language
+        self.speaking_rate = self.profile.reference_rate
+        self.vad_probability = 0.0
+        self.interim_text = ""
+        self._rate_smoothing = rate_smoothing
+
+    def set_language(self, language: str):
+        if language in PROFILES:
+            self.language = language
+            self.profile = PROFILES[language]
+
+    def on_vad(self, probability: float):
+        # Smoothed so a single noisy frame does not swing the delay
+        self.vad_probability = 0.7 * self.vad_probability + 0.3 * probability
+
+    def on_interim(self, text: str):
+        self.interim_text = text.strip()
+
+    def on_final(self, text: str, speech_duration: Optional[float] = None):
+        """Update the per-caller speaking rate from a finished utterance"""
+        words = len(_WORD_RE.findall(text))
+        if speech_duration and speech_duration > 0.3 and words:
+            rate = words / speech_duration
+            self.speaking_rate += self._rate_smoothing * (rate - self.speaking_rate)
+        self.interim_text = ""
+
+    def end_of_turn_delay(self) -> float:
+        profile = self.profile
+        delay = profile.base_delay
+
+        # Slow speakers leave longer gaps between words; fast speakers shorter ones
+        rate_ratio = profile.reference_rate / max(self.speaking_rate, 0.5)
+        delay *= min(max(rate_ratio, 0.7), 1.5)
+
+        text = self.interim_text
+        if text.endswith(TERMINAL_PUNCTUATION):
+            delay *= profile.punctuation_factor
+        elif text.endswith(",") or _last_word(text) in profile.continuation_words:
+            delay *= profile.continuation_factor
+
+        # Residual voice energy suggests the caller is about to continue
+        if self.vad_probability > 0.3:
+            delay *= 1.25
+        elif self.vad_probability < 0.05:
+            delay *= 0.85
+
+        return min(max(delay, profile.min_delay), profile.max_delay)
+
+
+def _last_word(text: str) -> str:
+    words = _WORD_RE.findall(text.lower())
+    return words[-1] if words else ""
+
+
+class _ObservedVADStream:
+    """Passes VAD events through unchanged while feeding probabilities to the endpointer"""
+
+    def __init__(self, stream, endpointer: AdaptiveEndpointer):
+        self._stream = stream
+        self._endpointer = endpointer
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self._stream.__anext__()
+        probability = getattr(event, "probability", None)
+        if probability is not None:
+            self._endpointer.on_vad(probability)
+        return event
+
+
+def attach_endpointer(session, vad, endpointer: AdaptiveEndpointer):
+    """Wire VAD and transcript events into the endpointer and apply its delay to the session"""
+    open_stream = vad.stream
+    vad.stream = lambda *args, **kwargs: _ObservedVADStream(open_stream(*args, **kwargs), endpointer)
+
+    state = {"speech_started": None, "speech_ended": None}
+
+    def apply_delay():
+        delay = endpointer.end_of_turn_delay()
+        session.update_options(min_endpointing_delay=delay, max_endpointing_delay=endpointer.profile.max_delay * 2)
+
+    def on_user_state_changed(event):
+        if event.new_state == "speaking":
+            state["speech_started"] = event.created_at
+            state["speech_ended"] = None
+        elif event.new_state == "listening":
+            state["speech_ended"] = event.created_at
+            apply_delay()
+
+    def on_transcribed(event):
+        if event.is_final:
+            started, ended = state["speech_started"], state["speech_ended"]
+            duration = (ended or event.created_at) - started if started else None
+            endpointer.on_final(event.transcript, duration)
+        else:
+            endpointer.on_interim(event.transcript)
+        apply_delay()
+
+    session.on("user_state_changed", on_user_state_changed)
+    session.on("user_input_transcribed", on_transcribed)
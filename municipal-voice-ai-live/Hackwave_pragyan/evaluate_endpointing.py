@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation of adaptive endpointing against a fixed silence window.
+
+Each recording is a mono 16-bit WAV file with a JSON sidecar of the same name:
+
+    {
+        "language": "hi",
+        "words": [{"text": "paani", "start": 0.42, "end": 0.80}, ...],
+        "turn_ends": [3.2, 7.9]
+    }
+
+Word text may carry punctuation as the STT would emit it with smart_format.
+"""
+import os
+import sys
+import json
+import math
+import wave
+import array
+import argparse
+from statistics import mean, median
+
+from endpointing import AdaptiveEndpointer, VAD_MIN_SILENCE
+
+FRAME_SECONDS = 0.03
+# What the agent waits today: Silero's default silence window plus the session's endpointing delay
+DEFAULT_FIXED_DELAY = 0.55 + 0.5
+TURN_END_TOLERANCE = 0.3
+
+
+def load_frames(path):
+    """Return per-frame speech probabilities estimated from signal energy"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        samples = array.array("h", wav.readframes(wav.getnframes()))
+
+    step = int(rate * FRAME_SECONDS) * channels
+    levels = []
+    for i in range(0, len(samples) - step + 1, step):
+        chunk = samples[i:i + step]
+        rms = math.sqrt(sum(s * s for s in chunk) / len(chunk)) or 1.0
+        levels.append(20 * math.log10(rms))
+
+    if not levels:
+        return []
+    noise_floor = sorted(levels)[len(levels) // 10]
+    return [min(max((level - noise_floor - 6) / 18, 0.0), 1.0) for level in levels]
+
+
+def find_pauses(probabilities):
+    """Yield (pause_start, pause_length) for every speech-to-silence transition"""
+    in_speech = False
+    pause_start = None
+    for i, probability in enumerate(probabilities):
+        t = i * FRAME_SECONDS
+        if probability >= 0.5:
+            if pause_start is not None:
+                yield pause_start, t - pause_start
+                pause_start = None
+            in_speech = True
+        elif in_speech:
+            in_speech = False
+            pause_start = t
+    if pause_start is not None:
+        yield pause_start, len(probabilities) * FRAME_SECONDS - pause_start
+
+
+def classify(pause_start, fire_time, turn_ends, latencies, counts):
+    nearest = min(turn_ends, key=lambda end: abs(end - pause_start), default=None)
+    if nearest is not None and abs(nearest - pause_start) <= TURN_END_TOLERANCE:
+        latencies.append(fire_time - nearest)
+        counts["detected"] += 1
+        return True
+    counts["premature"] += 1
+    return False
+
+
+def evaluate_recording(wav_path, fixed_delay):
+    with open(os.path.splitext(wav_path)[0] + ".json") as f:
+        labels = json.load(f)
+
+    probabilities = load_frames(wav_path)
+    words = labels.get("words", [])
+    turn_ends = labels.get("turn_ends", [])
+    endpointer = AdaptiveEndpointer(labels.get("language", "en"))
+
+    result = {
+        "language": endpointer.language,
+        "turns": len(turn_ends),
+        "adaptive": {"latencies": [], "detected": 0, "premature": 0},
+        "fixed": {"latencies": [], "detected": 0, "premature": 0},
+    }
+
+    frame_index = 0
+    turn_start = 0.0
+    for pause_start, pause_length in find_pauses(probabilities):
+        # Replay VAD probabilities and the interim transcript up to the pause
+        while frame_index * FRAME_SECONDS < pause_start + VAD_MIN_SILENCE and frame_index < len(probabilities):
+            endpointer.on_vad(probabilities[frame_index])
+            frame_index += 1
+        spoken = [w for w in words if turn_start <= w["start"] and w["end"] <= pause_start + 0.05]
+        endpointer.on_interim(" ".join(w["text"] for w in spoken))
+
+        # Like the fixed window, the adaptive one only starts once the VAD has declared end of speech
+        wait = VAD_MIN_SILENCE + endpointer.end_of_turn_delay()
+        adaptive = result["adaptive"]
+        if pause_length >= wait:
+            if classify(pause_start, pause_start + wait, turn_ends, adaptive["latencies"], adaptive):
+                endpointer.on_final(endpointer.interim_text, pause_start - turn_start)
+            turn_start = pause_start + pause_length
+
+        fixed = result["fixed"]
+        if pause_length >= fixed_delay:
+            classify(pause_start, pause_start + fixed_delay, turn_ends, fixed["latencies"], fixed)
+
+    return result
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def summarize(results):
+    summary = {}
+    for language in sorted({r["language"] for r in results}):
+        rows = [r for r in results if r["language"] == language]
+        entry = {"turns": sum(r["turns"] for r in rows)}
+        for mode in ("adaptive", "fixed"):
+            latencies = [lat for r in rows for lat in r[mode]["latencies"]]
+            entry[mode] = {
+                "detected": sum(r[mode]["detected"] for r in rows),
+                "premature": sum(r[mode]["premature"] for r in rows),
+                "mean_ms": round(mean(latencies) * 1000, 1) if latencies else 0.0,
+                "p50_ms": round(median(latencies) * 1000, 1) if latencies else 0.0,
+                "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+            }
+        entry["saved_ms"] = round(entry["fixed"]["mean_ms"] - entry["adaptive"]["mean_ms"], 1)
+        summary[language] = entry
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate adaptive endpointing on recorded calls")
+    parser.add_argument("recordings", help="Directory of .wav files with .json labels")
+    parser.add_argument("--fixed-delay", type=float, default=DEFAULT_FIXED_DELAY,
+                        help="Fixed end-of-turn window to compare against (seconds)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    wav_files = sorted(
+        os.path.join(args.recordings, name)
+        for name in os.listdir(args.recordings)
+        if name.endswith(".wav") and os.path.exists(os.path.join(args.recordings, name[:-4] + ".json"))
+    )
+    if not wav_files:
+        print(f"❌ No labelled recordings found in {args.recordings}")
+        return 1
+
+    summary = summarize([evaluate_recording(path, args.fixed_delay) for path in wav_files])
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"📊 Endpointing evaluation over {len(wav_files)} recording(s), fixed window {args.fixed_delay:.2f}s")
+    print("=" * 60)
+    for language, entry in summary.items():
+        adaptive, fixed = entry["adaptive"], entry["fixed"]
+        print(f"[{language}] {entry['turns']} turns")
+        print(f"  adaptive: p50 {adaptive['p50_ms']}ms  p90 {adaptive['p90_ms']}ms  "
+              f"detected {adaptive['detected']}  premature {adaptive['premature']}")
+        print(f"  fixed:    p50 {fixed['p50_ms']}ms  p90 {fixed['p90_ms']}ms  "
+              f"detected {fixed['detected']}  premature {fixed['premature']}")
+        print(f"  latency saved: {entry['saved_ms']}ms per turn")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
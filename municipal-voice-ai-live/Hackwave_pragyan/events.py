@@ -0,0 +1,128 @@
+import os
+import json
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import register_stream_route, registry
+
+logger = logging.getLogger("municipal-agent")
+
+# Events kept for reconnecting clients (Last-Event-ID) and per-subscriber backlog before dropping
+EVENT_HISTORY = int(os.getenv("EVENT_HISTORY", "1000"))
+SUBSCRIBER_QUEUE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE", "1000"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+events_published = registry.counter("municipal_events_published_total", "Complaint events published")
+events_dropped = registry.counter("municipal_events_dropped_total", "Events dropped for slow subscribers")
+event_subscribers = registry.gauge("municipal_event_subscribers", "Connected live-feed subscribers")
+
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+class Subscription:
+    """A subscriber's bounded queue; a subscriber that falls behind loses events instead of slowing publishers"""
+
+    def __init__(self, bus: "EventBus", maxsize: int):
+        self.bus = bus
+        self.queue: "queue.Queue[Event]" = queue.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event: Event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            events_dropped.inc()
+
+    def drain(self, timeout: float) -> List[Event]:
+        """Block for the first event, then take whatever else is already queued"""
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """In-process pub/sub for complaint events with a short replay history"""
+
+    def __init__(self, history: int = EVENT_HISTORY):
+        self._history: deque = deque(maxlen=history)
+        self._subscribers: List[Subscription] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            event = (self._next_id, event_type, data)
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+        events_published.inc(type=event_type)
+        return event[0]
+
+    def subscribe(self, last_event_id: Optional[int] = None, maxsize: int = SUBSCRIBER_QUEUE) -> Subscription:
+        subscription = Subscription(self, maxsize)
+        with self._lock:
+            # Replay under the lock so nothing published meanwhile is missed or duplicated
+            if last_event_id is not None:
+                for event in self._history:
+                    if event[0] > last_event_id:
+                        subscription.put(event)
+            self._subscribers.append(subscription)
+        event_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+                event_subscribers.dec()
+
+
+def format_sse(event: Event) -> str:
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# Complaint created / status changed events from MunicipalAssistant
+complaint_events = EventBus()
+
+
+def serve_sse(handler):
+    """GET /events: server-sent events; reconnecting clients resume from Last-Event-ID"""
+    last_event_id = handler.headers.get("Last-Event-ID")
+    subscription = complaint_events.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+    handler.send_header("Cache-Control", "no-cache")
+    handler.send_header("Access-Control-Allow-Origin", "*")
+    handler.end_headers()
+    try:
+        handler.wfile.write(b"retry: 2000\n\n")
+        handler.wfile.flush()
+        while True:
+            batch = subscription.drain(SSE_KEEPALIVE_SECONDS)
+            # One write per burst keeps syscalls flat when events arrive in bursts
+            payload = "".join(format_sse(event) for event in batch) if batch else ": keepalive\n\n"
+            handler.wfile.write(payload.encode())
+            handler.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        subscription.close()
+
+
+register_stream_route("/events", serve_sse)
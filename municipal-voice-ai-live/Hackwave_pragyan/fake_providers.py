@@ -0,0 +1,288 @@
+"""
+Local stand-ins for Deepgram, Gemini and ElevenLabs so the voice pipeline can run without network.
+"""
+import json
+import time
+import asyncio
+import functools
+import itertools
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from livekit import rtc
+from livekit.agents.utils.audio import AudioByteStream
+
+from municipal_agent import GeminiLLM
+from model_registry import GENERATION_PROFILES, model_registry
+from overload import OVERLOAD_FAST_MODEL
+
+DEFAULT_TRANSCRIPTS = [
+    "mere ghar mein do din se paani nahi aa raha hai",
+    "The streetlight near Sector 15 market is not working.",
+    "gali mein kachra teen din se pada hai, koi uthane nahi aaya",
+    "I want to know the status of my property tax payment.",
+    "naali band ho gayi hai aur paani sadak par aa raha hai",
+    "There is a big pothole on the main road near the bus stand.",
+]
+
+DEFAULT_REPLY = (
+    "I have registered your complaint. Your complaint ID is WS20240101-0001 "
+    "and it should be resolved within 24 to 48 hours."
+)
+
+
+class FakeSession:
+    """Minimal event emitter with the AgentSession hooks the pipeline attaches to"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable]] = {}
+        self.options = {}
+
+    def on(self, event: str, callback: Callable):
+        self._handlers.setdefault(event, []).append(callback)
+
+    def emit(self, event: str, **fields):
+        payload = SimpleNamespace(created_at=time.time(), **fields)
+        for callback in self._handlers.get(event, []):
+            callback(payload)
+
+    def update_options(self, **options):
+        self.options.update(options)
+
+    async def interrupt(self, force: bool = False):
+        return None
+
+
+# (F1, F2, F3) of a few vowels; harmonics near them are boosted so the signal reads as voiced speech
+VOWEL_FORMANTS = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480),
+                  (570, 840, 2410), (440, 1020, 2240), (660, 1720, 2410)]
+SYLLABLE_SECONDS = 0.22
+
+
+@functools.lru_cache(maxsize=64)
+def synthetic_speech(seconds: float, sample_rate: int = 48000) -> bytes:
+    """16-bit PCM of voiced syllables with consonant onsets, which Silero VAD classifies as speech"""
+    rng = np.random.default_rng(int(seconds * 1000))
+    n = int(sample_rate * SYLLABLE_SECONDS)
+    t = np.arange(n) / sample_rate
+    burst = int(0.03 * sample_rate)
+    syllables = []
+    for _ in range(max(1, round(seconds / SYLLABLE_SECONDS))):
+        f0 = rng.uniform(105, 150) * (1 + 0.08 * np.sin(np.pi * t / SYLLABLE_SECONDS))
+        phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+        f1, f2, f3 = VOWEL_FORMANTS[rng.integers(len(VOWEL_FORMANTS))]
+        signal = np.zeros(n)
+        for k in range(1, 45):
+            harmonic = k * f0
+            gain = (np.exp(-((harmonic - f1) / 90) ** 2) + 0.5 * np.exp(-((harmonic - f2) / 120) ** 2)
+                    + 0.25 * np.exp(-((harmonic - f3) / 150) ** 2) + 0.3 / k)
+            signal += gain * np.sin(k * phase)
+        signal[:burst] += rng.normal(0, 0.3, burst) * np.linspace(1, 0, burst)
+        syllables.append(signal * np.sin(np.pi * t / SYLLABLE_SECONDS) ** 0.6)
+    speech = np.concatenate(syllables)
+    speech = speech / np.abs(speech).max() * 0.3 + rng.normal(0, 0.003, len(speech))
+    return (speech * 32767).astype(np.int16).tobytes()
+
+
+class FakeCaller:
+    """Caller microphone: 20ms frames in real time, synthetic speech while talking and silence otherwise"""
+
+    def __init__(self, sample_rate: int = 48000, seconds_per_word: float = 0.25):
+        self.sample_rate = sample_rate
+        self.seconds_per_word = seconds_per_word
+        # Loop time and audio-stream offset (seconds pushed) at which the current utterance ended
+        self.speech_ended_at: Optional[float] = None
+        self.speech_end_offset: Optional[float] = None
+        self.pushed_seconds = 0.0
+        self._frame_bytes = sample_rate // 50 * 2
+        self._silence = bytes(self._frame_bytes)
+        self._pending = bytearray()
+
+    def say(self, transcript: str):
+        seconds = round(len(transcript.split()) * self.seconds_per_word, 2)
+        self._pending += synthetic_speech(seconds, self.sample_rate)
+        self.speech_ended_at = self.speech_end_offset = None
+
+    async def run(self, vad_stream):
+        """Push audio into the VAD stream for the whole call, as the room's audio input does"""
+        framer = AudioByteStream(self.sample_rate, 1, samples_per_channel=self.sample_rate // 50)
+        loop = asyncio.get_running_loop()
+        tick = loop.time()
+        while True:
+            if self._pending:
+                chunk = bytes(self._pending[:self._frame_bytes])
+                del self._pending[:self._frame_bytes]
+            else:
+                chunk = self._silence
+            for frame in framer.push(chunk):
+                vad_stream.push_frame(frame)
+            self.pushed_seconds += len(chunk) / 2 / self.sample_rate
+            if chunk is not self._silence and not self._pending:
+                self.speech_ended_at = loop.time()
+                self.speech_end_offset = self.pushed_seconds
+            # A worker that falls behind catches up in bursts, like frames buffered by the network
+            tick += 0.02
+            await asyncio.sleep(max(0.0, tick - loop.time()))
+
+
+class FakeSTT:
+    """Canned transcripts as Deepgram live results: an interim per word, the final after a fixed delay"""
+
+    def __init__(self, transcripts: Optional[List[str]] = None, final_delay: float = 0.15,
+                 seconds_per_word: float = 0.25):
+        self._transcripts = itertools.cycle(transcripts or DEFAULT_TRANSCRIPTS)
+        self.final_delay = final_delay
+        self.seconds_per_word = seconds_per_word
+
+    def next_transcript(self) -> str:
+        return next(self._transcripts)
+
+    def result(self, words: List[str], is_final: bool) -> str:
+        """One Results message as Deepgram's websocket sends it"""
+        step = self.seconds_per_word
+        return json.dumps({
+            "type": "Results",
+            "is_final": is_final,
+            "speech_final": is_final,
+            "channel": {"alternatives": [{
+                "transcript": " ".join(words),
+                "confidence": 0.93,
+                "words": [
+                    {"word": word.lower().strip(".,?!"), "punctuated_word": word,
+                     "start": i * step, "end": (i + 1) * step, "confidence": 0.93}
+                    for i, word in enumerate(words)
+                ],
+            }]},
+        }, ensure_ascii=False)
+
+
+class _Chunk:
+    __slots__ = ("text", "usage_metadata")
+
+    def __init__(self, text: str, tokens: int):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(candidates_token_count=tokens)
+
+
+class FakeChatSession:
+    """ChatSession stand-in; keeps the history it was started with, like the client-side original"""
+
+    def __init__(self, model: "FakeGenerativeModel", history: List[Dict]):
+        self.model = model
+        self.history = history
+
+    async def send_message_async(self, content, request_options=None, stream: bool = False):
+        return self.model.respond()
+
+
+class FakeGenerativeModel:
+    """GenerativeModel stand-in that streams a fixed reply after configurable first-token and per-token delays"""
+
+    def __init__(self, first_token_delay: float = 0.35, per_token_delay: float = 0.02, reply: str = DEFAULT_REPLY):
+        self.first_token_delay = first_token_delay
+        self.per_token_delay = per_token_delay
+        self.reply_tokens = reply.split(" ")
+
+    def start_chat(self, history=None) -> FakeChatSession:
+        return FakeChatSession(self, list(history or []))
+
+    async def respond(self):
+        await asyncio.sleep(self.first_token_delay)
+        for i, token in enumerate(self.reply_tokens):
+            if i:
+                await asyncio.sleep(self.per_token_delay)
+            yield _Chunk(token + " ", i + 1)
+
+
+class FakeLLM(GeminiLLM):
+    """The real GeminiLLM (overload levels, breakers, fallbacks, history) with only the Gemini request faked"""
+
+    def __init__(self, first_token_delay: float = 0.35, per_token_delay: float = 0.02,
+                 reply: str = DEFAULT_REPLY, model_name: str = "fake-gemini", **kwargs):
+        super().__init__(model_name=model_name, **kwargs)
+        fake = FakeGenerativeModel(first_token_delay, per_token_delay, reply)
+        # Swapped into the shared registry entries, the way a context-cached model replaces the original
+        for name in dict.fromkeys(self.model_names + [OVERLOAD_FAST_MODEL]):
+            for profile in GENERATION_PROFILES:
+                model_registry.get(name, profile, self.system_instruction).model = fake
+        self.generative_model = fake
+
+
+class FakeSynthesizeStream:
+    """Emits 20ms silence frames for each flushed sentence after a first-audio delay"""
+
+    def __init__(self, tts: "FakeTTS"):
+        self._tts = tts
+        self._pending = []
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._synthesize())
+        self._input: asyncio.Queue = asyncio.Queue()
+
+    def push_text(self, text: str):
+        self._pending.append(text)
+
+    def flush(self):
+        if self._pending:
+            self._input.put_nowait("".join(self._pending))
+            self._pending = []
+
+    def end_input(self):
+        self.flush()
+        self._input.put_nowait(None)
+
+    async def _synthesize(self):
+        tts = self._tts
+        first = True
+        while True:
+            text = await self._input.get()
+            if text is None:
+                break
+            await asyncio.sleep(tts.first_audio_delay if first else tts.segment_delay)
+            first = False
+            frames = max(1, int(len(text) / tts.chars_per_second / tts.frame_seconds))
+            for _ in range(frames):
+                self._queue.put_nowait(SimpleNamespace(frame=tts.silence_frame()))
+        self._queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        audio = await self._queue.get()
+        if audio is None:
+            raise StopAsyncIteration
+        return audio
+
+    async def aclose(self):
+        self._worker.cancel()
+
+
+class FakeTTS:
+    """TTS provider that synthesizes silence at a realistic rate"""
+
+    def __init__(self, first_audio_delay: float = 0.12, segment_delay: float = 0.03,
+                 chars_per_second: float = 15.0, sample_rate: int = 24000):
+        self.first_audio_delay = first_audio_delay
+        self.segment_delay = segment_delay
+        self.chars_per_second = chars_per_second
+        self.sample_rate = sample_rate
+        self.frame_seconds = 0.02
+        self._samples = int(sample_rate * self.frame_seconds)
+
+    def silence_frame(self) -> rtc.AudioFrame:
+        return rtc.AudioFrame(
+            data=bytes(self._samples * 2),
+            sample_rate=self.sample_rate,
+            num_channels=1,
+            samples_per_channel=self._samples,
+        )
+
+    def stream(self, **kwargs) -> FakeSynthesizeStream:
+        return FakeSynthesizeStream(self)
+
+    def prewarm(self):
+        pass
+
+    def update_options(self, **options):
+        pass
@@ -0,0 +1,102 @@
+import re
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional, Pattern, Tuple
+
+from complaints import municipal_assistant
+from language_pinning import detect_language
+from metrics import registry
+
+logger = logging.getLogger("municipal-agent")
+
+fast_path_total = registry.counter("municipal_fast_path_total", "Turns answered without calling Gemini")
+
+_COMPLAINT_ID_RE = re.compile(r"\b([A-Z]{2})\s?(\d{8})\s?-?\s?(\d{4})\b", re.IGNORECASE)
+
+
+@dataclass
+class Intent:
+    """A caller request that can be answered without the LLM"""
+    name: str
+    patterns: Tuple[Pattern, ...]
+    reply: Callable[[str, re.Match, str], Optional[str]]
+    # Low-confidence intents only answer when the worker is overloaded
+    aggressive_only: bool = False
+
+
+def _status_reply(text: str, match: re.Match, language: str) -> Optional[str]:
+    complaint_id = f"{match.group(1).upper()}{match.group(2)}-{match.group(3)}"
+    complaint = municipal_assistant.get_complaint_status(complaint_id)
+    if "error" in complaint:
+        if language == "hi":
+            return f"शिकायत {complaint_id} हमारे रिकॉर्ड में नहीं मिली। कृपया नंबर दोबारा बताइए।"
+        return f"I could not find complaint {complaint_id}. Could you repeat the number?"
+    if language == "hi":
+        return f"शिकायत {complaint_id} ({complaint['type']}) की स्थिति: {complaint['status']}।"
+    return f"Complaint {complaint_id} for {complaint['type']} is currently {complaint['status']}."
+
+
+def _emergency_reply(text: str, match: re.Match, language: str) -> str:
+    if language == "hi":
+        return "आग के लिए 101, पुलिस के लिए 100, एम्बुलेंस के लिए 102, और नगर निगम आपातकाल के लिए 1800-123-MUNI पर कॉल करें।"
+    return "For fire call 101, police 100, ambulance 102, and the municipal emergency line 1800-123-MUNI."
+
+
+def _services_reply(text: str, match: re.Match, language: str) -> str:
+    if language == "hi":
+        return ("मैं संपत्ति कर, पानी, कचरा, स्ट्रीटलाइट, प्रमाण पत्र, सड़क और नाली की शिकायतों में मदद कर सकती हूँ। "
+                "आपकी समस्या क्या है?")
+    return ("I can help with property tax, water supply, garbage, streetlights, certificates, roads and drainage. "
+            "What is the problem?")
+
+
+def _thanks_reply(text: str, match: re.Match, language: str) -> str:
+    if language == "hi":
+        return "आपका स्वागत है! क्या मैं और कुछ मदद कर सकती हूँ?"
+    return "You're welcome! Is there anything else I can help with?"
+
+
+INTENTS = (
+    Intent("complaint_status", (_COMPLAINT_ID_RE,), _status_reply),
+    Intent(
+        "emergency_numbers",
+        (re.compile(r"\b(emergency|fire|police|ambulance|aag|एम्बुलेंस|पुलिस)\b.*\b(number|numbers|nambar|नंबर)\b",
+                    re.IGNORECASE),),
+        _emergency_reply,
+    ),
+    Intent(
+        "emergency_numbers",
+        (re.compile(r"\b(emergency|fire|police|ambulance|aag|एम्बुलेंस|पुलिस|आग)\b", re.IGNORECASE),),
+        _emergency_reply,
+        aggressive_only=True,
+    ),
+    Intent(
+        "services",
+        (re.compile(r"\b(what (services|can you do)|kya (seva|sewa)|कौन सी सेवा)", re.IGNORECASE),),
+        _services_reply,
+        aggressive_only=True,
+    ),
+    Intent(
+        "thanks",
+        (re.compile(r"^\W*(thank you|thanks|dhanyavaad|dhanyavad|shukriya|धन्यवाद|शुक्रिया)\W*$", re.IGNORECASE),),
+        _thanks_reply,
+        aggressive_only=True,
+    ),
+)
+
+
+def match_fast_path(text: str, aggressive: bool = False) -> Optional[str]:
+    """Canned answer for a recognised intent, or None to fall through to Gemini"""
+    language = "hi" if detect_language(text) == "hi" else "en"
+    for intent in INTENTS:
+        if intent.aggressive_only and not aggressive:
+            continue
+        for pattern in intent.patterns:
+            match = pattern.search(text)
+            if match:
+                reply = intent.reply(text, match, language)
+                if reply:
+                    fast_path_total.inc(intent=intent.name)
+                    logger.info(f"Fast path: {intent.name}")
+                    return reply
+    return None
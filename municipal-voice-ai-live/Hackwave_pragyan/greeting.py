@@ -0,0 +1,151 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, List, Optional
+
+from livekit import rtc
+
+logger = logging.getLogger("municipal-agent")
+
+GREETINGS = {
+    "en": "Hello! You have reached the Municipal Corporation helpline. How can I help you today?",
+    "hi": "नमस्ते! नगर निगम हेल्पलाइन में आपका स्वागत है। मैं आपकी क्या सहायता कर सकती हूँ?",
+    "bilingual": (
+        "नमस्ते! नगर निगम हेल्पलाइन में आपका स्वागत है। "
+        "Hello, welcome to the Municipal Corporation helpline. How can I help you today?"
+    ),
+}
+DEFAULT_GREETING_LANGUAGE = "bilingual"
+# Longest a reply waits for the greeting to finish before speaking anyway
+GREETING_WAIT_TIMEOUT = float(os.getenv("GREETING_WAIT_TIMEOUT", "15"))
+
+# Played in place of a reply while the TTS provider's circuit is open
+HOLD_PHRASE = (
+    "क्षमा करें, अभी तकनीकी समस्या है। "
+    "Sorry, we are having technical trouble. Please stay on the line or call 1800-123-MUNI."
+)
+HOLD_CLIP = "hold"
+
+# Rendered clips are shared by every job that runs in this worker process
+_clip_cache: Dict[str, List[rtc.AudioFrame]] = {}
+# Jobs are threads with their own event loops and an asyncio.Lock belongs to one loop, so renders
+# are de-duplicated per loop; two jobs may each render a clip once and the later copy replaces the first
+_render_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+    weakref.WeakKeyDictionary()
+)
+_render_locks_guard = threading.Lock()
+
+
+def caller_language(participant: rtc.RemoteParticipant) -> str:
+    """Read the caller's language preference from participant attributes or metadata"""
+    language = (participant.attributes or {}).get("language")
+    if not language and participant.metadata:
+        try:
+            language = json.loads(participant.metadata).get("language")
+        except (ValueError, AttributeError):
+            language = None
+    language = (language or "").lower().split("-")[0]
+    return language if language in GREETINGS else DEFAULT_GREETING_LANGUAGE
+
+
+def _render_lock(key: str) -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    with _render_locks_guard:
+        return _render_locks.setdefault(loop, {}).setdefault(key, asyncio.Lock())
+
+
+async def get_clip(tts, key: str, text: str) -> List[rtc.AudioFrame]:
+    """Return a cached clip, rendering it on first use"""
+    frames = _clip_cache.get(key)
+    if frames is not None:
+        return frames
+
+    async with _render_lock(key):
+        frames = _clip_cache.get(key)
+        if frames is None:
+            frames = []
+            async with tts.synthesize(text) as stream:
+                async for audio in stream:
+                    frames.append(audio.frame)
+            _clip_cache[key] = frames
+            logger.info(f"Rendered {key} clip ({len(frames)} frames)")
+    return frames
+
+
+async def get_greeting_clip(tts, language: str) -> List[rtc.AudioFrame]:
+    """Return the cached greeting clip for a language, rendering it on first use"""
+    return await get_clip(tts, language, GREETINGS[language])
+
+
+def cached_hold_clip() -> Optional[List[rtc.AudioFrame]]:
+    return _clip_cache.get(HOLD_CLIP)
+
+
+class GreetingStage:
+    """Plays a pre-rendered greeting as soon as the caller's audio track is subscribed"""
+
+    def __init__(self, room: rtc.Room, tts):
+        self.room = room
+        self.tts = tts
+        self.played = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Must be registered before ctx.connect() so auto-subscribed tracks are not missed
+        room.on("track_subscribed", self._on_track_subscribed)
+
+    def prerender(self, languages=None):
+        """Render clips in the background so they are ready before anyone joins"""
+        for language in languages or GREETINGS:
+            if language not in _clip_cache:
+                asyncio.create_task(self._safe_render(language, GREETINGS[language]))
+        if HOLD_CLIP not in _clip_cache:
+            asyncio.create_task(self._safe_render(HOLD_CLIP, HOLD_PHRASE))
+
+    async def wait_played(self):
+        """Block the first reply until the greeting is over so the agent does not talk over itself"""
+        if self.played.is_set():
+            return
+        try:
+            await asyncio.wait_for(self.played.wait(), GREETING_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Greeting still not played after {GREETING_WAIT_TIMEOUT:.0f}s, replying anyway")
+            # Only the first reply pays the timeout
+            self.played.set()
+
+    async def _safe_render(self, key: str, text: str):
+        try:
+            await get_clip(self.tts, key, text)
+        except Exception as e:
+            logger.warning(f"Failed to pre-render {key} clip: {e}")
+            # The greeting render will most likely fail for the caller too; do not hold replies for it
+            if key != HOLD_CLIP and self._task is None:
+                self.played.set()
+
+    def _on_track_subscribed(self, track, publication, participant):
+        if track.kind != rtc.TrackKind.KIND_AUDIO or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._play(caller_language(participant)))
+
+    async def _play(self, language: str):
+        try:
+            frames = await get_greeting_clip(self.tts, language)
+            if not frames:
+                return
+
+            first = frames[0]
+            source = rtc.AudioSource(first.sample_rate, first.num_channels)
+            track = rtc.LocalAudioTrack.create_audio_track("greeting", source)
+            publication = await self.room.local_participant.publish_track(
+                track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+            )
+            for frame in frames:
+                await source.capture_frame(frame)
+            await source.wait_for_playout()
+            await self.room.local_participant.unpublish_track(publication.sid)
+            logger.info(f"Played {language} greeting")
+        except Exception as e:
+            logger.warning(f"Greeting playback failed: {e}")
+        finally:
+            self.played.set()
@@ -0,0 +1,135 @@
+import os
+import re
+import logging
+from collections import deque
+from typing import Optional
+
+from livekit.agents.types import NOT_GIVEN
+from livekit.agents.utils import is_given
+
+logger = logging.getLogger("municipal-agent")
+
+# Final utterances to observe before pinning, and how many recent ones to keep for code-switch checks
+PIN_AFTER_UTTERANCES = int(os.getenv("LANGUAGE_PIN_AFTER", "3"))
+CODE_SWITCH_WINDOW = 4
+
+# language None: no language enforced, the multilingual model detects it per sentence
+MULTILINGUAL = {
+    "stt": {"model": "nova-2-general", "language": "hi,en"},
+    "tts": {"model": "eleven_multilingual_v2", "language": None},
+}
+# Single-language models have lower first-byte latency than the multilingual ones
+PINNED = {
+    "en": {
+        "stt": {"model": "nova-2-general", "language": "en-IN"},
+        "tts": {"model": "eleven_flash_v2_5", "language": "en"},
+    },
+    "hi": {
+        "stt": {"model": "nova-2-general", "language": "hi"},
+        "tts": {"model": "eleven_flash_v2_5", "language": "hi"},
+    },
+}
+
+_DEVANAGARI_RE = re.compile(r"[ऀ-ॿ]")
+_LATIN_WORD_RE = re.compile(r"[A-Za-z']+")
+
+# Common romanized Hindi words; Hinglish callers are better served by the Hindi models
+_ROMANIZED_HINDI = {
+    "hai", "hain", "nahi", "nahin", "paani", "pani", "mera", "meri", "mere", "hamara", "humara",
+    "kya", "kab", "kaise", "kyun", "aap", "aapka", "bhai", "ji", "haan", "raha", "rahi", "rahe",
+    "gaya", "gayi", "ho", "tha", "thi", "se", "ko", "ka", "ki", "ke", "mein", "aur", "lekin",
+    "bijli", "sadak", "kachra", "naali", "shikayat", "din", "ghar", "gali", "abhi", "bahut",
+    "aa", "aaya", "galat", "karo", "kijiye", "chahiye", "wala", "wali", "sab", "kuch",
+}
+
+
+def detect_language(text: str, reported: Optional[str] = None) -> Optional[str]:
+    """Classify one utterance as "hi", "en" or "mixed"; None if there is too little to tell"""
+    if reported:
+        reported = reported.lower().split("-")[0]
+        if reported in PINNED:
+            return reported
+
+    devanagari = len(_DEVANAGARI_RE.findall(text))
+    latin_words = [w.lower() for w in _LATIN_WORD_RE.findall(text)]
+    if not devanagari and len(latin_words) < 2:
+        return None
+
+    hindi_words = sum(1 for w in latin_words if w in _ROMANIZED_HINDI)
+    english_words = len(latin_words) - hindi_words
+    hindi_score = hindi_words + devanagari / 3
+
+    if hindi_score and english_words >= 2 and min(hindi_score, english_words) / max(hindi_score, english_words) > 0.3:
+        return "mixed"
+    return "hi" if hindi_score >= english_words else "en"
+
+
+class SessionLanguagePinner:
+    """Pins STT and TTS to one language once the caller's language is clear"""
+
+    def __init__(self, stt, tts, endpointer=None, pin_after: int = PIN_AFTER_UTTERANCES):
+        self.stt = stt
+        self.tts = tts
+        self.endpointer = endpointer
+        self.pin_after = pin_after
+        self.pinned: Optional[str] = None
+        self.switches = 0
+        self._recent = deque(maxlen=max(pin_after, CODE_SWITCH_WINDOW))
+
+    def on_transcript(self, event):
+        if event.is_final:
+            self.observe(event.transcript, getattr(event, "language", None))
+
+    def observe(self, text: str, reported: Optional[str] = None):
+        # A pinned STT always reports the pinned language, so only the text itself can reveal a switch
+        language = detect_language(text, None if self.pinned else reported)
+        if language is None:
+            return
+        self._recent.append(language)
+
+        if self.pinned is None:
+            window = list(self._recent)[-self.pin_after:]
+            if len(window) == self.pin_after and len(set(window)) == 1 and window[0] in PINNED:
+                self._pin(window[0])
+        elif language != self.pinned:
+            # Code-switching: go back to the multilingual models immediately
+            self._unpin(language)
+
+    def _pin(self, language: str):
+        config = PINNED[language]
+        self._apply(config)
+        self.pinned = language
+        self.switches += 1
+        if self.endpointer:
+            self.endpointer.set_language(language)
+        logger.info(f"Pinned session language to {language} (stt={config['stt']}, tts={config['tts']})")
+
+    def _unpin(self, detected: str):
+        self._apply(MULTILINGUAL)
+        logger.info(f"Code-switch detected ({self.pinned} -> {detected}), reverting to multilingual models")
+        self.pinned = None
+        self.switches += 1
+        # Require a fresh run of consistent utterances before pinning again
+        self._recent.clear()
+
+    def _apply(self, config):
+        try:
+            self.stt.update_options(**config["stt"])
+            tts_options = dict(config["tts"])
+            if "language" in tts_options and tts_options["language"] is None:
+                del tts_options["language"]
+                _clear_language(self.tts)
+            self.tts.update_options(**tts_options)
+        except Exception as e:
+            logger.warning(f"Failed to update STT/TTS language options: {e}")
+
+
+def _clear_language(tts):
+    """Drop a pinned TTS language; update_options() can change the language but has no way to unset it
+
+    The model change applied next bumps the options revision, so the pooled connection (opened
+    with the old language_code) is replaced.
+    """
+    opts = getattr(tts, "_opts", None)
+    if opts is not None and is_given(getattr(opts, "language", NOT_GIVEN)):
+        opts.language = NOT_GIVEN
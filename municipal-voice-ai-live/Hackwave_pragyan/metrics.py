@@ -0,0 +1,370 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("municipal-agent")
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# Seconds; tuned for voice turn stages which range from tens of ms to a few seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# Turn stages in pipeline order; durations are reported relative to VAD end-of-speech
+TURN_STAGES = (
+    "vad_end_of_speech",
+    "stt_final",
+    "llm_request_sent",
+    "llm_first_token",
+    "llm_done",
+    "tts_first_audio",
+    "playback_start",
+)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two integer increments under a lock"""
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[Tuple[str, str], ...], List] = {}
+        # Jobs run as threads of one worker, so several calls observe the same series at once
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, **labels) -> Tuple[List[int], float, int]:
+        with self._lock:
+            counts, total, count = self._series.get(tuple(sorted(labels.items())), [[], 0.0, 0])
+            return list(counts), total, count
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            # Copied so a scrape sees each series' buckets, sum and count from the same instant
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """A value that is either set directly or read from a callback at scrape time"""
+
+    def __init__(self, name: str, help_text: str, kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._callbacks: Dict[Tuple[Tuple[str, str], ...], Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        with self._lock:
+            self._callbacks[tuple(sorted(labels.items()))] = fn
+
+    def value(self, **labels) -> float:
+        key = tuple(sorted(labels.items()))
+        if key in self._callbacks:
+            return self._callbacks[key]()
+        return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values, callbacks = list(self._values.items()), list(self._callbacks.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        # Callbacks run outside the lock; they may take locks of their own
+        for labels, fn in callbacks:
+            try:
+                lines.append(f"{self.name}{_format_labels(labels)} {fn()}")
+            except Exception as e:
+                logger.debug(f"Metric callback {self.name} failed: {e}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, create):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = create()
+            return metric
+
+    def histogram(self, name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(name, lambda: Histogram(name, help_text, buckets))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get(name, lambda: Gauge(name, help_text))
+
+    def counter(self, name: str, help_text: str) -> Gauge:
+        return self._get(name, lambda: Gauge(name, help_text, kind="counter"))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Per-worker registry shared by every job (thread) running in this process
+registry = Registry()
+
+turn_stage_seconds = registry.histogram(
+    "municipal_turn_stage_seconds", "Time from VAD end-of-speech to each turn stage"
+)
+stage_gap_seconds = registry.histogram(
+    "municipal_turn_stage_gap_seconds", "Time spent between consecutive turn stages"
+)
+connect_stage_seconds = registry.histogram(
+    "municipal_connect_stage_seconds", "Job start-up time per connect stage"
+)
+active_calls = registry.gauge("municipal_active_calls", "Calls currently handled by this worker")
+queue_depth = registry.gauge("municipal_queue_depth", "Items waiting in per-worker queues")
+
+
+class TurnTimer:
+    """Timestamps for one conversational turn"""
+
+    __slots__ = ("marks",)
+
+    def __init__(self):
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, stage: str, at: Optional[float] = None):
+        # First timestamp wins; later duplicates (e.g. extra LLM chunks) are ignored
+        if stage not in self.marks:
+            self.marks[stage] = at if at is not None else time.perf_counter()
+
+    def durations(self) -> Dict[str, float]:
+        origin = self.marks.get("vad_end_of_speech")
+        if origin is None:
+            return {}
+        return {stage: self.marks[stage] - origin for stage in TURN_STAGES[1:] if stage in self.marks}
+
+    def record(self):
+        for stage, seconds in self.durations().items():
+            turn_stage_seconds.observe(max(seconds, 0.0), stage=stage)
+        previous = None
+        for stage in TURN_STAGES:
+            if stage in self.marks:
+                if previous is not None:
+                    stage_gap_seconds.observe(max(self.marks[stage] - self.marks[previous], 0.0), stage=stage)
+                previous = stage
+
+
+class TurnTracker:
+    """Tracks the current turn of one call and records it once playback has started and the LLM is done"""
+
+    def __init__(self):
+        self.current: Optional[TurnTimer] = None
+        self.turns = 0
+
+    def mark(self, stage: str):
+        if stage == "vad_end_of_speech":
+            self.finish()
+            self.current = TurnTimer()
+        elif self.current is None:
+            # Agent output without a caller turn (e.g. the greeting) has nothing to measure against
+            return
+        self.current.mark(stage)
+        # Playback usually starts before the LLM finishes; the turn is complete once both happened
+        if "playback_start" in self.current.marks and "llm_done" in self.current.marks:
+            self.finish()
+
+    def finish(self):
+        if self.current is not None:
+            self.current.record()
+            self.current = None
+            self.turns += 1
+
+    def attach(self, session):
+        def on_user_state_changed(event):
+            if event.old_state == "speaking" and event.new_state != "speaking":
+                self.mark("vad_end_of_speech")
+
+        def on_transcribed(event):
+            if event.is_final:
+                self.mark("stt_final")
+
+        def on_agent_state_changed(event):
+            if event.new_state == "speaking":
+                self.mark("playback_start")
+
+        session.on("user_state_changed", on_user_state_changed)
+        session.on("user_input_transcribed", on_transcribed)
+        session.on("agent_state_changed", on_agent_state_changed)
+
+
+class _FirstAudioStream:
+    """TTS stream proxy that marks the first synthesized frame of each turn"""
+
+    def __init__(self, stream, tracker: TurnTracker):
+        self._stream = stream
+        self._tracker = tracker
+        self._seen = False
+        self._open = True
+        queue_depth.inc(queue="tts_streams")
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        self._closed()
+        return await self._stream.__aexit__(*args)
+
+    async def aclose(self):
+        self._closed()
+        await self._stream.aclose()
+
+    def _closed(self):
+        if self._open:
+            self._open = False
+            queue_depth.dec(queue="tts_streams")
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        audio = await self._stream.__anext__()
+        if not self._seen:
+            self._seen = True
+            self._tracker.mark("tts_first_audio")
+        return audio
+
+
+def instrument_tts(tts, tracker: TurnTracker):
+    open_stream = tts.stream
+    tts.stream = lambda *args, **kwargs: _FirstAudioStream(open_stream(*args, **kwargs), tracker)
+
+
+def record_connect_timings(timings):
+    for stage, seconds in timings.stages.items():
+        connect_stage_seconds.observe(seconds, stage=stage)
+
+
+# Set once LiveKit has registered the worker; /ready is the supervisor's readiness probe
+worker_ready = threading.Event()
+
+# Extra read-only JSON views served next to /metrics, e.g. the dashboard aggregates
+_json_routes: Dict[str, Callable[[], Any]] = {}
+# Long-lived responses (server-sent events); the handler writes to the request itself
+_stream_routes: Dict[str, Callable[[BaseHTTPRequestHandler], None]] = {}
+
+
+def register_json_route(path: str, handler: Callable[[], Any]):
+    _json_routes[path] = handler
+
+
+def register_stream_route(path: str, handler: Callable[[BaseHTTPRequestHandler], None]):
+    _stream_routes[path] = handler
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in _stream_routes:
+            _stream_routes[path](self)
+            return
+        route = _json_routes.get(path)
+        if route is not None:
+            body = json.dumps(route()).encode()
+            content_type = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = registry.render().encode()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.startswith("/health"):
+            body = b"ok\n"
+            content_type = "text/plain"
+        elif self.path.startswith("/ready"):
+            if not worker_ready.is_set():
+                self.send_error(503, "worker not registered yet")
+                return
+            body = b"ready\n"
+            content_type = "text/plain"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood the agent log
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def ensure_metrics_server(port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """Start the Prometheus endpoint once per process; port 0 disables it"""
+    global _server
+    if port <= 0:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"Metrics endpoint not started on port {port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Metrics endpoint listening on :{port}/metrics")
+    return _server
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Local HTTP stand-in for the Gemini generateContent / streamGenerateContent endpoints.
+
+Point the agent at it with GEMINI_API_ENDPOINT=http://127.0.0.1:8765 (REST transport).
+
+Modes:
+  canned  - replies chosen by regex rules from a JSON file, or a default reply
+  record  - forwards to the real API (GEMINI_API_KEY) and stores every exchange in a cassette
+  replay  - answers from a cassette recorded earlier, falling back to canned replies
+
+Latency and errors can be injected from the command line or at runtime with
+POST /control {"first_chunk_ms": 400, "error_rate": 0.2}.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PORT = 8765
+UPSTREAM = "https://generativelanguage.googleapis.com"
+DEFAULT_REPLY = "Thank you for reporting this. I have registered your complaint and it will be resolved within 24 to 48 hours."
+
+_PATH_RE = re.compile(r"^/(v1beta|v1)/models/(?P<model>[^:]+):(?P<method>generateContent|streamGenerateContent)")
+
+
+class MockConfig:
+    """Runtime-adjustable behaviour of the mock server"""
+
+    def __init__(self, rules=None, default_reply: str = DEFAULT_REPLY, first_chunk_ms: float = 300,
+                 chunk_ms: float = 40, words_per_chunk: int = 4, error_rate: float = 0.0,
+                 error_status: int = 503, mode: str = "canned", cassette: Optional[str] = None):
+        self.rules: List[Dict[str, str]] = rules or []
+        self.default_reply = default_reply
+        self.first_chunk_ms = first_chunk_ms
+        self.chunk_ms = chunk_ms
+        self.words_per_chunk = words_per_chunk
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.mode = mode
+        self.cassette = cassette
+        self.recorded: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats = {"requests": 0, "errors_injected": 0, "replayed": 0, "recorded": 0}
+        self._lock = threading.Lock()
+        if mode == "replay" and cassette:
+            self.load_cassette(cassette)
+
+    def update(self, **changes):
+        for key, value in changes.items():
+            if hasattr(self, key) and not key.startswith("_"):
+                setattr(self, key, value)
+
+    def load_cassette(self, path: str):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.recorded[entry["key"]] = entry["chunks"]
+
+    def save_exchange(self, key: str, chunks: List[Dict[str, Any]]):
+        with self._lock:
+            self.recorded[key] = chunks
+            self.stats["recorded"] += 1
+            if self.cassette:
+                with open(self.cassette, "a") as f:
+                    f.write(json.dumps({"key": key, "chunks": chunks}) + "\n")
+
+    def canned_reply(self, prompt: str) -> str:
+        for rule in self.rules:
+            if re.search(rule["match"], prompt, re.IGNORECASE):
+                return rule["reply"]
+        return self.default_reply
+
+
+def request_key(model: str, body: Dict[str, Any]) -> str:
+    """Cassette key: the model plus the conversation contents, ignoring generation settings"""
+    payload = json.dumps({"model": model, "contents": body.get("contents", [])}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def last_user_text(body: Dict[str, Any]) -> str:
+    for content in reversed(body.get("contents", [])):
+        if content.get("role", "user") == "user":
+            return " ".join(part.get("text", "") for part in content.get("parts", []))
+    return ""
+
+
+def make_chunks(reply: str, words_per_chunk: int) -> List[Dict[str, Any]]:
+    words = reply.split(" ")
+    pieces = [" ".join(words[i:i + words_per_chunk]) for i in range(0, len(words), words_per_chunk)]
+    chunks = []
+    for i, piece in enumerate(pieces):
+        text = piece if i == len(pieces) - 1 else piece + " "
+        chunk = {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}],
+            "usageMetadata": {"candidatesTokenCount": (i + 1) * words_per_chunk},
+        }
+        if i == len(pieces) - 1:
+            chunk["candidates"][0]["finishReason"] = "STOP"
+        chunks.append(chunk)
+    return chunks
+
+
+def merge_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Collapse streamed chunks into one non-streaming generateContent response"""
+    text = "".join(
+        part.get("text", "")
+        for chunk in chunks
+        for candidate in chunk.get("candidates", [])[:1]
+        for part in candidate.get("content", {}).get("parts", [])
+    )
+    merged = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}]}
+    if chunks and "usageMetadata" in chunks[-1]:
+        merged["usageMetadata"] = chunks[-1]["usageMetadata"]
+    return merged
+
+
+def fetch_upstream(model: str, body: Dict[str, Any], api_key: str) -> List[Dict[str, Any]]:
+    url = f"{UPSTREAM}/v1beta/models/{model}:streamGenerateContent?alt=sse&key={api_key}"
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+    )
+    chunks = []
+    with urllib.request.urlopen(request, timeout=60) as response:
+        for line in response:
+            line = line.decode().strip()
+            if line.startswith("data:"):
+                chunks.append(json.loads(line[5:]))
+    return chunks
+
+
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: MockConfig = None
+    api_key: Optional[str] = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/health"):
+            self._send_json(200, {"status": "ok", "stats": self.config.stats})
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.startswith("/control"):
+            self.config.update(**body)
+            self._send_json(200, {"status": "ok"})
+            return
+
+        match = _PATH_RE.match(self.path)
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": f"unknown path {self.path}"}})
+            return
+
+        config = self.config
+        config.stats["requests"] += 1
+        model = match.group("model")
+        streaming = match.group("method") == "streamGenerateContent"
+
+        time.sleep(config.first_chunk_ms / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            config.stats["errors_injected"] += 1
+            self._send_json(config.error_status, {
+                "error": {"code": config.error_status, "message": "Injected failure", "status": "UNAVAILABLE"}
+            })
+            return
+
+        chunks = self._resolve_chunks(model, body)
+        if not streaming:
+            self._send_json(200, merge_chunks(chunks))
+        elif "alt=sse" in self.path:
+            self._stream(chunks, sse=True)
+        else:
+            self._stream(chunks, sse=False)
+
+    def _resolve_chunks(self, model: str, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        config = self.config
+        key = request_key(model, body)
+        if config.mode in ("replay", "record") and key in config.recorded:
+            config.stats["replayed"] += 1
+            return config.recorded[key]
+        if config.mode == "record":
+            chunks = fetch_upstream(model, body, self.api_key)
+            config.save_exchange(key, chunks)
+            return chunks
+        return make_chunks(config.canned_reply(last_user_text(body)), config.words_per_chunk)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _stream(self, chunks: List[Dict[str, Any]], sse: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # The REST client expects a JSON array delivered incrementally; SSE clients expect data: lines
+        if not sse:
+            self._write_chunk(b"[")
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(self.config.chunk_ms / 1000)
+            payload = json.dumps(chunk)
+            if sse:
+                self._write_chunk(f"data: {payload}\r\n\r\n".encode())
+            else:
+                self._write_chunk(((",\r\n" if i else "") + payload).encode())
+        if not sse:
+            self._write_chunk(b"]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def start_mock_server(port: int = DEFAULT_PORT, config: Optional[MockConfig] = None,
+                      api_key: Optional[str] = None) -> ThreadingHTTPServer:
+    """Start the mock in a daemon thread; returns the server (use server.server_address for the port)"""
+    handler = type("Handler", (MockGeminiHandler,), {"config": config or MockConfig(), "api_key": api_key})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-gemini", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Gemini API")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--mode", choices=["canned", "record", "replay"], default="canned")
+    parser.add_argument("--responses", help="JSON file: {\"default\": str, \"rules\": [{\"match\", \"reply\"}]}")
+    parser.add_argument("--cassette", help="JSONL file to record to or replay from")
+    parser.add_argument("--first-chunk-ms", type=float, default=300)
+    parser.add_argument("--chunk-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    responses = {}
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+
+    config = MockConfig(
+        rules=responses.get("rules"),
+        default_reply=responses.get("default", DEFAULT_REPLY),
+        first_chunk_ms=args.first_chunk_ms,
+        chunk_ms=args.chunk_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        mode=args.mode,
+        cassette=args.cassette,
+    )
+    if args.mode == "record" and not os.getenv("GEMINI_API_KEY"):
+        print("❌ Record mode needs GEMINI_API_KEY to reach the real API")
+        return 1
+
+    server = start_mock_server(args.port, config, api_key=os.getenv("GEMINI_API_KEY"))
+    print(f"🤖 Mock Gemini listening on http://127.0.0.1:{server.server_address[1]} ({args.mode} mode)")
+    print(f"   export GEMINI_API_ENDPOINT=http://127.0.0.1:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Mock Gemini stopped")
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+from google.generativeai.types import HarmBlockThreshold, HarmCategory
+
+from overload import SHORT_REPLY_TOKENS
+
+logger = logging.getLogger("municipal-agent")
+
+# Must accept system_instruction (Gemini 1.5 or later); 1.0 names still work through the history prefix
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+# Cache the static system prompt on Gemini's side (billed per hour; needs a cache-capable model version)
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+
+GENERATION_PROFILES = {
+    # Keep responses concise for voice
+    "voice": genai.types.GenerationConfig(temperature=0.3, top_p=0.8, top_k=40, max_output_tokens=150),
+    # Used while the worker is overloaded
+    "short": genai.types.GenerationConfig(temperature=0.3, top_p=0.8, top_k=40, max_output_tokens=SHORT_REPLY_TOKENS),
+}
+
+# Complaints describe dead animals, fights over water and the like; only block clearly harmful output
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+}
+
+# Gemini 1.0 models reject system_instruction; they get the prompt as the opening exchange instead
+_LEGACY_MODELS = ("gemini-pro", "gemini-1.0")
+
+
+@dataclass
+class ModelEntry:
+    """A configured GenerativeModel plus the history to prepend for models without system instructions"""
+    model: genai.GenerativeModel
+    history_prefix: List[Dict] = field(default_factory=list)
+    cached_content: Optional[str] = None
+    expires_at: float = 0.0
+
+
+def supports_system_instruction(model_name: str) -> bool:
+    return not model_name.startswith(_LEGACY_MODELS)
+
+
+class ModelRegistry:
+    """Per-process GenerativeModel instances keyed by model, generation profile and system prompt"""
+
+    def __init__(self, context_cache: bool = GEMINI_CONTEXT_CACHE, cache_ttl: int = GEMINI_CONTEXT_CACHE_TTL):
+        self.context_cache = context_cache
+        self.cache_ttl = cache_ttl
+        self._entries: Dict[Tuple[str, str, str], ModelEntry] = {}
+        self._caching: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, profile: str = "voice", system_instruction: Optional[str] = None) -> ModelEntry:
+        digest = hashlib.sha1(system_instruction.encode()).hexdigest()[:12] if system_instruction else ""
+        key = (model_name, profile, digest)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = self._build(model_name, profile, system_instruction)
+        if self.context_cache and system_instruction and supports_system_instruction(model_name):
+            self._refresh_cache(key, entry, system_instruction)
+        return entry
+
+    def _build(self, model_name: str, profile: str, system_instruction: Optional[str]) -> ModelEntry:
+        generation_config = GENERATION_PROFILES[profile]
+        if not system_instruction or supports_system_instruction(model_name):
+            return ModelEntry(genai.GenerativeModel(
+                model_name,
+                generation_config=generation_config,
+                safety_settings=SAFETY_SETTINGS,
+                system_instruction=system_instruction,
+            ))
+        return ModelEntry(
+            genai.GenerativeModel(model_name, generation_config=generation_config, safety_settings=SAFETY_SETTINGS),
+            history_prefix=[
+                {"role": "user", "parts": [{"text": system_instruction}]},
+                {"role": "model", "parts": [{"text": "Understood."}]},
+            ],
+        )
+
+    def _refresh_cache(self, key, entry: ModelEntry, system_instruction: str):
+        # Create (or renew before it expires) off the event loop; callers keep the uncached model meanwhile
+        if entry.expires_at - time.time() > 60 or key in self._caching:
+            return
+        with self._lock:
+            if key in self._caching:
+                return
+            self._caching.add(key)
+        threading.Thread(
+            target=self._create_cache, args=(key, entry, system_instruction), name="gemini-context-cache", daemon=True
+        ).start()
+
+    def _create_cache(self, key, entry: ModelEntry, system_instruction: str):
+        model_name, profile, _ = key
+        try:
+            cached = genai.caching.CachedContent.create(
+                model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+                display_name=f"municipal-{profile}-{key[2]}",
+                system_instruction=system_instruction,
+                ttl=self.cache_ttl,
+            )
+            entry.model = genai.GenerativeModel.from_cached_content(
+                cached, generation_config=GENERATION_PROFILES[profile], safety_settings=SAFETY_SETTINGS
+            )
+            entry.cached_content = cached.name
+            entry.expires_at = time.time() + self.cache_ttl
+            logger.info(f"Gemini context cache {cached.name} ready for {model_name}/{profile}")
+        except Exception as e:
+            # Commonly: the prompt is below the provider's minimum cacheable size
+            logger.warning(f"Gemini context caching unavailable for {model_name}: {e}")
+            entry.expires_at = time.time() + self.cache_ttl
+        finally:
+            with self._lock:
+                self._caching.discard(key)
+
+
+# Shared by every job in the worker process
+model_registry = ModelRegistry()
@@ -1,7 +1,9 @@
 import os
 import asyncio
 import logging
-from typing import Dict, Any
+import time
+import functools
+from typing import Awaitable, Callable, Dict, Any, Optional
 from dotenv import load_dotenv
 # Make sure you have the correct import
 from livekit.plugins import deepgram, elevenlabs, silero  
@@ -14,155 +16,372 @@ logger = logging.getLogger("municipal-agent")
 load_dotenv()
 
 # Import LiveKit components
-from livekit.agents import Agent, JobContext, WorkerOptions, cli
+from livekit.agents import Agent, AgentServer, JobContext, JobExecutorType, WorkerOptions, cli
 from livekit.agents import llm
 from livekit.plugins import deepgram, elevenlabs, silero
 
+from stream_prewarm import EAGER_CONNECT, ConnectTimings, StreamPrewarmer
+from greeting import GreetingStage, cached_hold_clip
+from barge_in import BargeInController, usage_counters
+from endpointing import VAD_MIN_SILENCE, AdaptiveEndpointer, attach_endpointer
+from language_pinning import SessionLanguagePinner
+from complaints import municipal_assistant
+from fast_paths import match_fast_path
+from overload import (
+    CANNED, FAST_MODEL, FAST_PATHS, OVERLOAD_FAST_MODEL, SHORT_REPLIES, overload_controller
+)
+from model_registry import GEMINI_MODEL, model_registry
+from circuit_breaker import CircuitOpenError, get_breaker, guard_stt, guard_tts
+from profiling import install_signal_trigger, profile_job, start_loop_monitor
+from metrics import (
+    TurnTracker, active_calls, ensure_metrics_server, instrument_tts, queue_depth, record_connect_timings,
+    worker_ready
+)
+
 # Import Gemini
 import google.generativeai as genai
+
+# Point at a local stand-in (see mock_gemini_server.py) instead of the Google endpoint
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "1"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "10"))
+# Tried in order when the primary model's circuit is open or its request failed
+GEMINI_FALLBACK_MODELS = [m.strip() for m in os.getenv("GEMINI_FALLBACK_MODELS", "").split(",") if m.strip()]
+
 # Configure Gemini API
 try:
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    if GEMINI_API_ENDPOINT:
+        genai.configure(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            transport="rest",
+            client_options={"api_endpoint": GEMINI_API_ENDPOINT}
+        )
+    else:
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
     logger.info("Gemini API configured successfully")
 except Exception as e:
     logger.error(f"Failed to configure Gemini API: {e}")
     raise
 
 
+FALLBACK_REPLY = "I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
+# Spoken without waiting on Gemini when every model's circuit is open
+HOLD_REPLY = "Our system is busy right now. Please stay on the line, or call 1800-123-MUNI for urgent help."
+# Spoken at the highest overload level, once a call-back has been queued
+CALLBACK_REPLY = (
+    "We are receiving a very high number of calls. I have scheduled a call-back for you, "
+    "reference {reference}. For emergencies please call 1800-123-MUNI."
+)
+BUSY_REPLY = "We are receiving a very high number of calls. Please hold, someone will be with you shortly."
+
+
+def assistant_message(text: str) -> llm.ChatMessage:
+    return llm.ChatMessage(role="assistant", content=[text])
+
+
+async def _iterate_chunks(response):
+    """Iterate a streamed response from either the async (gRPC) or sync (REST) Gemini client"""
+    if hasattr(response, "__aiter__"):
+        async for chunk in response:
+            yield chunk
+        return
+    loop = asyncio.get_event_loop()
+    iterator = iter(response)
+    while True:
+        chunk = await loop.run_in_executor(None, next, iterator, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+async def _guarded_chunks(response, breaker, started: float, on_failure, probe: bool = False):
+    """Report time to first chunk, or the stream's failure, to the model's circuit breaker"""
+    reported = False
+    try:
+        async for chunk in _iterate_chunks(response):
+            if not reported:
+                reported = True
+                breaker.record_success(time.perf_counter() - started)
+            yield chunk
+    except Exception:
+        if not reported:
+            reported = True
+            on_failure()
+            breaker.record_failure()
+        raise
+    finally:
+        if not reported and probe:
+            breaker.release_probe()
+
+
+class StaticReply(llm.ChatContext):
+    """A reply known up front (fallbacks, fast paths, overload responses)"""
+
+    def __init__(self, text: str, turn_tracker: Optional[TurnTracker] = None,
+                 speak_after: Optional[Callable[[], Awaitable]] = None):
+        super().__init__()
+        self.text = text
+        self._turn_tracker = turn_tracker
+        self._speak_after = speak_after
+
+    async def message(self) -> llm.ChatMessage:
+        if self._speak_after:
+            await self._speak_after()
+        return assistant_message(self.text)
+
+    async def stream(self):
+        if self._turn_tracker:
+            for stage in ("llm_request_sent", "llm_first_token", "llm_done"):
+                self._turn_tracker.mark(stage)
+        if self._speak_after:
+            await self._speak_after()
+        yield assistant_message(self.text)
+
+
+class GeminiStream(llm.ChatContext):
+    """Streams a Gemini reply chunk by chunk; cancel() aborts the request mid-generation"""
+
+    def __init__(self, start_response, barge_in: Optional[BargeInController] = None, on_cancel=None,
+                 turn_tracker: Optional[TurnTracker] = None, stats: Optional[Dict[str, int]] = None,
+                 max_retries: int = 0, speak_after: Optional[Callable[[], Awaitable]] = None):
+        super().__init__()
+        self._start_response = start_response
+        self._stats = stats if stats is not None else {}
+        self._max_retries = max_retries
+        self._barge_in = barge_in
+        self._turn_tracker = turn_tracker
+        self._on_cancel = on_cancel
+        self._speak_after = speak_after
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.tokens = 0
+        self.chars = 0
+        self.cancelled = False
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._produce())
+            if self._barge_in:
+                self._barge_in.track(self)
+
+    def _mark(self, stage: str):
+        if self._turn_tracker:
+            self._turn_tracker.mark(stage)
+
+    def _count(self, key: str):
+        self._stats[key] = self._stats.get(key, 0) + 1
+
+    async def _produce(self):
+        queue_depth.inc(queue="llm_inflight")
+        try:
+            self._count("requests")
+            self._mark("llm_request_sent")
+            attempt = 0
+            while True:
+                produced = False
+                try:
+                    response = await self._start_response()
+                    async for chunk in _iterate_chunks(response):
+                        usage = getattr(chunk, "usage_metadata", None)
+                        if usage and usage.candidates_token_count:
+                            self.tokens = usage.candidates_token_count
+                        if chunk.text:
+                            produced = True
+                            self._mark("llm_first_token")
+                            self._queue.put_nowait(chunk.text)
+                    break
+                except (asyncio.CancelledError, CircuitOpenError):
+                    raise
+                except Exception as e:
+                    # Only retry before anything was spoken; a half-sent reply cannot be replayed
+                    if produced or attempt >= self._max_retries:
+                        raise
+                    attempt += 1
+                    self._count("retries")
+                    logger.warning(f"Gemini request failed ({e}), retry {attempt}/{self._max_retries}")
+                    await asyncio.sleep(0.2 * attempt)
+            self._mark("llm_done")
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        except CircuitOpenError as e:
+            logger.warning(f"Gemini short-circuited: {e}")
+            self._count("short_circuits")
+            if self.chars == 0 and self._queue.empty():
+                self._queue.put_nowait(HOLD_REPLY)
+        except Exception as e:
+            logger.error(f"Error in Gemini chat: {e}")
+            self._count("errors")
+            if self.chars == 0 and self._queue.empty():
+                self._count("fallbacks")
+                self._queue.put_nowait(FALLBACK_REPLY)
+        finally:
+            queue_depth.dec(queue="llm_inflight")
+            self._queue.put_nowait(None)
+            if self._barge_in:
+                self._barge_in.untrack(self)
+
+    def cancel(self):
+        if self._task and not self._task.done():
+            self.cancelled = True
+            self._task.cancel()
+            if self._on_cancel:
+                self._on_cancel()
+
+    async def wait_cancelled(self):
+        if self._task:
+            await asyncio.wait({self._task})
+
+    async def message(self) -> llm.ChatMessage:
+        parts = [chunk.text_content async for chunk in self.stream()]
+        return assistant_message("".join(parts))
+
+    async def stream(self):
+        # Yield text as soon as Gemini produces it so TTS can start on the first sentence
+        self._ensure_started()
+        try:
+            # Gemini keeps generating meanwhile; only the hand-off to TTS waits
+            if self._speak_after:
+                await self._speak_after()
+            while True:
+                text = await self._queue.get()
+                if text is None:
+                    break
+                self.chars += len(text)
+                yield assistant_message(text)
+        finally:
+            # Consumer went away (interruption or shutdown): stop paying for the rest of the reply
+            self.cancel()
+            usage_counters.record_turn(self.tokens or self.chars // 4, self.chars, self.cancelled)
+
+
 class GeminiLLM(llm.LLM):
-    def __init__(self, model_name="gemini-pro"):
+    def __init__(self, model_name=GEMINI_MODEL, barge_in: Optional[BargeInController] = None,
+                 turn_tracker: Optional[TurnTracker] = None, caller=None, system_instruction: Optional[str] = None,
+                 speak_after: Optional[Callable[[], Awaitable]] = None):
+        super().__init__()
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
-        self.chat_sessions = {}  # Store chat sessions by session ID
+        self.system_instruction = system_instruction
+        # Configured models are built once per process and shared by every call
+        self.generative_model = model_registry.get(model_name, "voice", system_instruction).model
+        self.model_names = [model_name] + [m for m in GEMINI_FALLBACK_MODELS if m != model_name]
+        self.barge_in = barge_in
+        self.turn_tracker = turn_tracker
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "fallbacks": 0, "short_circuits": 0}
+        # Returns the caller's identity, used when scheduling a call-back under overload
+        self.caller = caller
+        self.callback_reference = None
+        # Awaited before any reply is spoken (the greeting must finish first)
+        self.speak_after = speak_after
+    
+    @property
+    def model(self) -> str:
+        return self.model_name
+    
+    def _choose_model(self, failed: set, prefer: Optional[str] = None, profile: str = "voice"):
+        """First model whose breaker lets a call through, and whether the call is that breaker's probe;
+        models that already failed this turn go last"""
+        names = [prefer] + [m for m in self.model_names if m != prefer] if prefer else self.model_names
+        ordered = [m for m in names if m not in failed] + [m for m in names if m in failed]
+        for name in ordered:
+            breaker = get_breaker(f"gemini:{name}", "gemini")
+            allowed, probe = breaker.admit()
+            if allowed:
+                return name, model_registry.get(name, profile, self.system_instruction), breaker, probe
+        raise CircuitOpenError(f"circuits open for {', '.join(self.model_names)}")
         
+    def _overload_reply(self, text: str, level: int) -> Optional[str]:
+        """Answer without Gemini when the worker is degraded far enough, or the intent is trivial"""
+        if level >= CANNED:
+            if self.callback_reference is None and self.caller is not None:
+                self.callback_reference = municipal_assistant.schedule_callback(self.caller(), text)
+                return CALLBACK_REPLY.format(reference=self.callback_reference)
+            return BUSY_REPLY
+        return match_fast_path(text, aggressive=level >= FAST_PATHS)
+    
     async def chat(self, messages: list[llm.ChatMessage], **kwargs) -> llm.ChatContext:
         try:
+            level = overload_controller.current_level()
+            reply = self._overload_reply(messages[-1].text_content, level) if messages else None
+            if reply:
+                return StaticReply(reply, self.turn_tracker, self.speak_after)
+            
             # Convert LiveKit messages to Gemini format
             gemini_messages = []
             
             for msg in messages:
-                role = "user" if msg.role == llm.ChatRole.USER else "model"
+                if msg.role == "system" and self.system_instruction:
+                    # Already part of the registered model's system_instruction
+                    continue
+                role = "user" if msg.role == "user" else "model"
                 gemini_messages.append({
                     "role": role,
-                    "parts": [{"text": msg.content}]
+                    "parts": [{"text": msg.text_content}]
                 })
             
-            # Use the last message ID as session key (simplified approach)
-            session_key = str(id(messages))
-            
-            # Start new chat session or continue existing one
-            if session_key not in self.chat_sessions:
-                self.chat_sessions[session_key] = self.model.start_chat(history=gemini_messages[:-1])
-            
-            chat_session = self.chat_sessions[session_key]
+            history = gemini_messages[:-1]
+            # Generation settings live on the registered model; replies get shorter under load
+            profile = "short" if level >= SHORT_REPLIES else "voice"
+            # Retries are ours (GEMINI_MAX_RETRIES); the client's own back-off would stall the caller
+            request_options = {"timeout": GEMINI_TIMEOUT, "retry": None}
+            failed = set()
             
-            # Generate response using the last user message
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                lambda: chat_session.send_message(
-                    messages[-1].content,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.3,
-                        top_p=0.8,
-                        top_k=40,
-                        max_output_tokens=150,  # Keep responses concise for voice
-                    )
+            # Stream the response natively on the event loop so it can be cancelled mid-generation
+            async def start_response():
+                # Raises CircuitOpenError straight away when no model is healthy
+                model_name, entry, breaker, probe = self._choose_model(
+                    failed, prefer=OVERLOAD_FAST_MODEL if level >= FAST_MODEL else None, profile=profile
                 )
-            )
-            
-            # Create response context
-            class GeminiContext(llm.ChatContext):
-                async def message(self) -> llm.ChatMessage:
-                    return llm.ChatMessage(
-                        role=llm.ChatRole.ASSISTANT,
-                        content=response.text
-                    )
-                    
-                async def stream(self):
-                    # For voice interactions, we typically want the full response
-                    yield llm.ChatMessage(
-                        role=llm.ChatRole.ASSISTANT,
-                        content=response.text
-                    )
+                
+                # A chat session only holds history client-side and resends it on every request,
+                # so each attempt builds one from this turn's context; nothing is shared between calls
+                chat_session = entry.model.start_chat(history=entry.history_prefix + history)
+                
+                started = time.perf_counter()
+                try:
+                    if GEMINI_API_ENDPOINT:
+                        # The REST transport has no async streaming; pull chunks from a worker thread
+                        response = await asyncio.get_event_loop().run_in_executor(
+                            None,
+                            lambda: chat_session.send_message(
+                                messages[-1].text_content, request_options=request_options, stream=True
+                            )
+                        )
+                    else:
+                        response = await chat_session.send_message_async(
+                            messages[-1].text_content,
+                            request_options=request_options,
+                            stream=True
+                        )
+                except asyncio.CancelledError:
+                    if probe:
+                        breaker.release_probe()
+                    raise
+                except Exception:
+                    failed.add(model_name)
+                    breaker.record_failure()
+                    raise
+                return _guarded_chunks(response, breaker, started, lambda: failed.add(model_name), probe)
             
-            return GeminiContext()
+            return GeminiStream(
+                start_response,
+                barge_in=self.barge_in,
+                turn_tracker=self.turn_tracker,
+                stats=self.stats,
+                max_retries=GEMINI_MAX_RETRIES,
+                speak_after=self.speak_after
+            )
             
         except Exception as e:
             logger.error(f"Error in Gemini chat: {e}")
+            self.stats["fallbacks"] += 1
             # Return a fallback response
-            class FallbackContext(llm.ChatContext):
-                async def message(self) -> llm.ChatMessage:
-                    return llm.ChatMessage(
-                        role=llm.ChatRole.ASSISTANT,
-                        content="I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
-                    )
-                    
-                async def stream(self):
-                    yield llm.ChatMessage(
-                        role=llm.ChatRole.ASSISTANT,
-                        content="I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
-                    )
-            
-            return FallbackContext()
-
-
-class MunicipalAssistant:
-    def __init__(self):
-        self.complaints: Dict[str, Dict[str, Any]] = {}
-        self.complaint_counter = 1
-        self.service_codes = {
-            "property tax": "PT",
-            "water supply": "WS", 
-            "waste management": "WM",
-            "street light": "SL",
-            "certificates": "CI",
-            "road issues": "RI",
-            "garbage collection": "GC",
-            "drainage": "DR"
-        }
-    
-    def generate_complaint_id(self, service_type: str) -> str:
-        from datetime import datetime
-        date_str = datetime.now().strftime('%Y%m%d')
-        
-        # Get service code or use first two letters
-        service_code = self.service_codes.get(service_type.lower(), service_type[:2].upper())
-        
-        complaint_id = f"{service_code}{date_str}-{self.complaint_counter:04d}"
-        self.complaint_counter += 1
-        return complaint_id
-    
-    def submit_complaint(self, service_type: str, description: str, location: str) -> str:
-        complaint_id = self.generate_complaint_id(service_type)
-        self.complaints[complaint_id] = {
-            'type': service_type,
-            'description': description,
-            'location': location,
-            'status': 'submitted',
-            'timestamp': asyncio.get_event_loop().time()
-        }
-        logger.info(f"New complaint submitted: {complaint_id}")
-        return complaint_id
-    
-    def get_complaint_status(self, complaint_id: str) -> Dict[str, Any]:
-        return self.complaints.get(complaint_id, {"error": "Complaint ID not found"})
-    
-    def get_all_complaints(self) -> Dict[str, Dict[str, Any]]:
-        return self.complaints
-
-# Create global instance
-municipal_assistant = MunicipalAssistant()
+            return StaticReply(FALLBACK_REPLY, self.turn_tracker, self.speak_after)
 
 
 
-async def entrypoint(ctx: JobContext):
-    logger.info("Municipal agent starting up...")
-    await ctx.connect()
-    
-    # Set up the AI agent with detailed instructions for municipal services
-    agent = Agent(
-        name="Municipal Assistant",
-        instructions="""You are a helpful Municipal Corporation voice assistant for Indian citizens.
+# Detailed instructions for municipal services; Gemini receives them once as its system instruction
+MUNICIPAL_INSTRUCTIONS = """You are a helpful Municipal Corporation voice assistant for Indian citizens.
         You help citizens with various municipal services in a friendly, patient manner.
 
         SERVICES YOU PROVIDE:
@@ -194,14 +413,38 @@ async def entrypoint(ctx: JobContext):
         - Municipal Emergency: 1800-123-MUNI
 
         Remember: You are the first point of contact for citizens seeking help with municipal services."""
+
+
+async def entrypoint(ctx: JobContext):
+    logger.info("Municipal agent starting up...")
+    timings = ConnectTimings()
+    
+    # Per-worker latency histograms and gauges, served in Prometheus text format
+    ensure_metrics_server()
+    active_calls.inc()
+    
+    # Optional sampling profile of this job, and a watchdog for callbacks that block the loop
+    profiler = profile_job(ctx.job.id)
+    loop_monitor = start_loop_monitor()
+    
+    async def call_ended():
+        active_calls.dec()
+        if profiler is not None:
+            profiler.stop()
+        if loop_monitor is not None:
+            await loop_monitor.aclose()
+    
+    ctx.add_shutdown_callback(call_ended)
+    turn_tracker = TurnTracker()
+    
+    # Set up the AI agent with detailed instructions for municipal services
+    agent = Agent(
+        name="Municipal Assistant",
+        instructions=MUNICIPAL_INSTRUCTIONS
     )
     
     # Configure voice processing components
     try:
-        # Voice Activity Detection
-        vad = silero.VAD.load()
-        logger.info("VAD loaded successfully")
-        
         # Speech-to-Text (supports Hindi and English)
         stt = deepgram.STT(
             model="nova-2-general",
@@ -209,6 +452,8 @@ async def entrypoint(ctx: JobContext):
             smart_format=True,
             interim_results=True
         )
+        # Provider health is tracked per worker; /metrics shows each circuit's state
+        guard_stt(stt)
         logger.info("Speech-to-Text configured")
         
         # Text-to-Speech (multilingual support)
@@ -218,16 +463,51 @@ async def entrypoint(ctx: JobContext):
             stability=0.5,
             similarity_boost=0.8
         )
+        # While ElevenLabs' circuit is open, play the cached "please hold" clip instead of waiting
+        guard_tts(tts, cached_hold_clip)
         logger.info("Text-to-Speech configured")
         
+        # Greet the caller from a cached clip while the rest of the pipeline comes up
+        greeting = GreetingStage(ctx.room, tts)
+        greeting.prerender()
+        
         # Language Model (Gemini)
-        llm_model = GeminiLLM(model_name="gemini-pro")
+        barge_in = BargeInController()
+        llm_model = GeminiLLM(
+            model_name=GEMINI_MODEL, barge_in=barge_in, turn_tracker=turn_tracker,
+            caller=lambda: next(iter(ctx.room.remote_participants), ctx.room.name),
+            system_instruction=MUNICIPAL_INSTRUCTIONS, speak_after=greeting.wait_played
+        )
         logger.info("Gemini LLM configured")
         
     except Exception as e:
         logger.error(f"Failed to initialize components: {e}")
         raise
     
+    # Voice Activity Detection loads off the event loop, in parallel with connecting
+    vad_task = asyncio.ensure_future(
+        timings.measure("vad", asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(silero.VAD.load, min_silence_duration=VAD_MIN_SILENCE)
+        ))
+    )
+    
+    # Open STT/TTS streams alongside the room connection so the first turn skips the handshakes
+    if EAGER_CONNECT:
+        prewarmer = StreamPrewarmer(stt, tts, timings)
+        ctx.add_shutdown_callback(prewarmer.aclose)
+        await prewarmer.connect_with(ctx.connect())
+    else:
+        await timings.measure("room", ctx.connect())
+        timings.log()
+    record_connect_timings(timings)
+    
+    try:
+        vad = await vad_task
+        logger.info("VAD loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load VAD: {e}")
+        raise
+    
     # Create and configure session
     session = ctx.create_session(
         vad=vad,
@@ -236,19 +516,58 @@ async def entrypoint(ctx: JobContext):
         tts=tts
     )
     
+    # Timestamp every turn stage from end-of-speech to playback start
+    turn_tracker.attach(session)
+    instrument_tts(tts, turn_tracker)
+    
+    # Cancel LLM/TTS work as soon as the caller talks over the agent
+    barge_in.attach(session)
+    
+    # Pick the end-of-turn delay per utterance instead of waiting a fixed silence window
+    endpointer = AdaptiveEndpointer(language="hi")
+    attach_endpointer(session, vad, endpointer)
+    
+    # Switch to faster single-language STT/TTS models once the caller's language is clear
+    language_pinner = SessionLanguagePinner(stt, tts, endpointer)
+    session.on("user_input_transcribed", language_pinner.on_transcript)
+    
     # Start the agent session
     logger.info("Starting agent session...")
     await session.start(agent=agent)
     logger.info("Agent session started successfully")
 
+def create_server() -> AgentServer:
+    """Worker whose metrics port answers /ready once LiveKit has registered it"""
+    # Jobs share one process so breakers, overload level, models and metrics cover the whole worker;
+    # everything they share is locked, and per-call state lives on the job's own objects
+    options = WorkerOptions(entrypoint, job_executor_type=JobExecutorType.THREAD)
+    # Several workers on one host need distinct health ports (the supervisor sets this per worker)
+    if os.getenv("AGENT_HTTP_PORT"):
+        options.port = int(os.getenv("AGENT_HTTP_PORT"))
+    server = AgentServer.from_server_options(options)
+    
+    @server.on("worker_started")
+    def on_started():
+        # Started here rather than on the first call so /dashboard, /events and /ready are up from boot
+        ensure_metrics_server()
+    
+    @server.on("worker_registered")
+    def on_registered(worker_id, server_info):
+        logger.info(f"Worker {worker_id} registered with LiveKit")
+        worker_ready.set()
+    
+    return server
+
 if __name__ == "__main__":
     # Test Gemini connection on startup
     try:
-        test_model = genai.GenerativeModel('gemini-pro')
+        test_model = genai.GenerativeModel(GEMINI_MODEL)
         test_response = test_model.generate_content("Test connection")
         logger.info(f"Gemini test successful: {test_response.text[:50]}...")
     except Exception as e:
         logger.error(f"Gemini test failed: {e}")
     
-    # Run the agent
-    cli.run_app(WorkerOptions(entrypoint))
+    # `kill -USR1 <pid>` writes a flamegraph profile of the whole worker
+    install_signal_trigger()
+    
+    cli.run_app(create_server())
@@ -0,0 +1,98 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict
+
+from metrics import active_calls, queue_depth, registry
+from profiling import recent_loop_lag
+
+logger = logging.getLogger("municipal-agent")
+
+# Capacity targets; pressure 1.0 means one of the signals has reached its target
+OVERLOAD_MAX_CALLS = int(os.getenv("OVERLOAD_MAX_CALLS", "32"))
+OVERLOAD_MAX_LOOP_LAG = float(os.getenv("OVERLOAD_MAX_LOOP_LAG", "0.1"))
+OVERLOAD_MAX_LLM_INFLIGHT = int(os.getenv("OVERLOAD_MAX_LLM_INFLIGHT", "16"))
+# Seconds a lower level's pressure must hold before stepping down
+OVERLOAD_COOLDOWN = float(os.getenv("OVERLOAD_COOLDOWN", "15"))
+OVERLOAD_FAST_MODEL = os.getenv("OVERLOAD_FAST_MODEL", "gemini-1.5-flash-8b")
+SHORT_REPLY_TOKENS = int(os.getenv("OVERLOAD_SHORT_REPLY_TOKENS", "60"))
+
+NORMAL, SHORT_REPLIES, FAST_MODEL, FAST_PATHS, CANNED = range(5)
+LEVEL_NAMES = ("normal", "short_replies", "fast_model", "fast_paths", "canned")
+
+# Pressure needed to enter each level; leaving it needs pressure below the threshold minus the band
+ENTER_PRESSURE = (0.0, 0.7, 0.85, 1.0, 1.25)
+HYSTERESIS_BAND = 0.15
+
+# Switching to the model that already serves every call sheds nothing, so that level is skipped
+_SAME_MODEL = OVERLOAD_FAST_MODEL == os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+ACTIVE_LEVELS = tuple(level for level in range(len(LEVEL_NAMES)) if not (level == FAST_MODEL and _SAME_MODEL))
+
+overload_level = registry.gauge("municipal_overload_level", "Degradation level (0 normal ... 4 canned)")
+overload_pressure = registry.gauge("municipal_overload_pressure", "Highest of calls, loop lag and LLM queue vs. target")
+overload_transitions = registry.counter("municipal_overload_transitions_total", "Degradation level changes")
+
+
+class OverloadController:
+    """Picks a degradation level from worker load; steps up at once, steps down one level per cooldown"""
+
+    def __init__(self, cooldown: float = OVERLOAD_COOLDOWN, evaluate_every: float = 0.5, levels=ACTIVE_LEVELS):
+        self.cooldown = cooldown
+        self.evaluate_every = evaluate_every
+        self.levels = levels
+        self.level = NORMAL
+        self.pressure = 0.0
+        self._changed_at = time.monotonic()
+        self._below_since = None
+        self._evaluated_at = 0.0
+        self._lock = threading.Lock()
+        overload_level.set_function(lambda: self.level)
+        overload_pressure.set_function(lambda: round(self.pressure, 3))
+
+    def signals(self) -> Dict[str, float]:
+        return {
+            "calls": active_calls.value() / OVERLOAD_MAX_CALLS,
+            "loop_lag": recent_loop_lag() / OVERLOAD_MAX_LOOP_LAG,
+            "llm_inflight": queue_depth.value(queue="llm_inflight") / OVERLOAD_MAX_LLM_INFLIGHT,
+        }
+
+    def current_level(self) -> int:
+        """Cheap enough to call every turn; re-evaluates at most every `evaluate_every` seconds"""
+        now = time.monotonic()
+        if now - self._evaluated_at >= self.evaluate_every:
+            with self._lock:
+                if now - self._evaluated_at >= self.evaluate_every:
+                    self._evaluated_at = now
+                    self.update(max(self.signals().values()), now)
+        return self.level
+
+    def update(self, pressure: float, now: float = None) -> int:
+        now = time.monotonic() if now is None else now
+        self.pressure = pressure
+        target = max(level for level in self.levels if pressure >= ENTER_PRESSURE[level])
+
+        if target > self.level:
+            self._below_since = None
+            self._set_level(target)
+        elif self.level > NORMAL and pressure < ENTER_PRESSURE[self.level] - HYSTERESIS_BAND:
+            if self._below_since is None:
+                self._below_since = now
+            elif now - self._below_since >= self.cooldown and now - self._changed_at >= self.cooldown:
+                self._below_since = now
+                self._set_level(max(level for level in self.levels if level < self.level))
+        else:
+            self._below_since = None
+        return self.level
+
+    def _set_level(self, level: int):
+        logger.warning(
+            f"Overload level {LEVEL_NAMES[self.level]} -> {LEVEL_NAMES[level]} (pressure {self.pressure:.2f})"
+        )
+        self.level = level
+        self._changed_at = time.monotonic()
+        overload_transitions.inc(level=LEVEL_NAMES[level])
+
+
+# One controller per worker process; every job reads the same level
+overload_controller = OverloadController()
@@ -0,0 +1,233 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+
+from metrics import registry
+
+logger = logging.getLogger("municipal-agent")
+
+# Sample the first N seconds of every job (0 disables); profiles land in PROFILE_DIR
+PROFILE_JOB_SECONDS = float(os.getenv("PROFILE_JOB_SECONDS", "0"))
+# Length of the whole-worker profile taken on `kill -USR1 <worker pid>`
+PROFILE_SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "30"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Log any callback that keeps the event loop busy for longer than this (0 disables)
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1"))
+# A monitor with no heartbeat for this long belongs to a loop that is gone, not one that is busy
+LOOP_LAG_STALE_SECONDS = float(os.getenv("LOOP_LAG_STALE_SECONDS", "30"))
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+loop_lag_seconds = registry.histogram(
+    "municipal_event_loop_lag_seconds", "Delay between a scheduled loop wake-up and when it ran", LAG_BUCKETS
+)
+loop_blocked_total = registry.counter(
+    "municipal_event_loop_blocked_total", "Callbacks that blocked the event loop beyond LOOP_LAG_THRESHOLD"
+)
+
+# Monitors of the jobs running now; each job thread has its own event loop and lag
+_monitors = set()
+_monitors_lock = threading.Lock()
+
+
+def recent_loop_lag() -> float:
+    """Worst smoothed lag among the loops of running jobs, read by the overload controller"""
+    with _monitors_lock:
+        monitors = list(_monitors)
+    now = time.monotonic()
+    lags = [monitor.recent_lag(now) for monitor in monitors if now - monitor.last_beat < LOOP_LAG_STALE_SECONDS]
+    return max(lags, default=0.0)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame) -> str:
+    """Root-first `a;b;c` stack, the format flamegraph.pl, speedscope and inferno read"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Samples Python stacks of selected threads from a background thread"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, thread_ids: Optional[Iterable[int]] = None):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self, duration: Optional[float] = None, on_done=None):
+        """Begin sampling; with a duration, stops itself and calls on_done(profiler)"""
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration, on_done), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self, duration: Optional[float], on_done):
+        own_id = threading.get_ident()
+        names = {}
+        deadline = self._started + duration if duration else None
+        while not self._stop.wait(self.interval):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                root = f"thread:{names.get(thread_id, thread_id)}"
+                self.samples[f"{root};{collapse_stack(frame)}"] += 1
+            self.sample_count += 1
+        if on_done is not None:
+            on_done(self)
+
+    def write(self, path: str) -> str:
+        """Write collapsed stacks (one `stack count` line each)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def _write_profile(profiler: SamplingProfiler, name: str):
+    path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+    profiler.write(path)
+    logger.info(
+        f"Profile written to {path} ({profiler.sample_count} samples, {len(profiler.samples)} unique stacks)"
+    )
+
+
+def profile_job(job_id: str, seconds: float = PROFILE_JOB_SECONDS) -> Optional[SamplingProfiler]:
+    """Profile the calling job's thread (its event loop) for the first `seconds` of the call"""
+    if seconds <= 0:
+        return None
+    logger.info(f"Profiling job {job_id} for {seconds:g}s")
+    return SamplingProfiler(thread_ids=[threading.get_ident()]).start(
+        duration=seconds, on_done=lambda profiler: _write_profile(profiler, f"job-{job_id}")
+    )
+
+
+_signal_profiler: Optional[SamplingProfiler] = None
+
+
+def _on_profile_signal(signum, frame):
+    global _signal_profiler
+    if _signal_profiler is not None and _signal_profiler._thread.is_alive():
+        logger.info("Profile already in progress, ignoring signal")
+        return
+    logger.info(f"Profiling all threads of worker {os.getpid()} for {PROFILE_SIGNAL_SECONDS:g}s")
+    _signal_profiler = SamplingProfiler().start(
+        duration=PROFILE_SIGNAL_SECONDS,
+        on_done=lambda profiler: _write_profile(profiler, f"worker-{os.getpid()}"),
+    )
+
+
+def install_signal_trigger(signum: int = getattr(signal, "SIGUSR1", 0)) -> bool:
+    """Profile the whole worker on SIGUSR1; must be called from the main thread"""
+    if not signum:
+        return False
+    try:
+        signal.signal(signum, _on_profile_signal)
+    except ValueError as e:
+        logger.warning(f"Profiling signal not installed: {e}")
+        return False
+    return True
+
+
+class LoopLagMonitor:
+    """Measures event-loop wake-up lag and logs the stack of whatever is blocking the loop"""
+
+    def __init__(self, threshold: float = LOOP_LAG_THRESHOLD, interval: Optional[float] = None):
+        self.threshold = threshold
+        self.interval = interval or min(0.05, threshold / 2)
+        self.max_lag = 0.0
+        self.lag_ewma = 0.0
+        self.blocked = 0
+        self.last_beat = time.monotonic()
+        self._blocking_stack: Optional[str] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start on the running loop"""
+        self._loop_thread = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._task = asyncio.ensure_future(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="loop-lag-watchdog", daemon=True).start()
+        with _monitors_lock:
+            _monitors.add(self)
+        return self
+
+    async def aclose(self):
+        # The job is over, so its loop no longer counts towards the worker's lag
+        with _monitors_lock:
+            _monitors.discard(self)
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def recent_lag(self, now: Optional[float] = None) -> float:
+        """Smoothed lag, or the current stall if the loop has been stuck for longer"""
+        stalled = (now or time.monotonic()) - self.last_beat - self.interval
+        return max(self.lag_ewma, stalled, 0.0)
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_beat = now
+            lag = max(now - expected, 0.0)
+            loop_lag_seconds.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self.lag_ewma = 0.8 * self.lag_ewma + 0.2 * lag
+            stack, self._blocking_stack = self._blocking_stack, None
+            if lag >= self.threshold:
+                self.blocked += 1
+                loop_blocked_total.inc()
+                if stack:
+                    logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms in:\n{stack}")
+                else:
+                    logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def _watchdog(self):
+        # Runs off the loop so it can catch the blocking callback while it is still running
+        while not self._stop.wait(self.threshold / 2):
+            stalled = time.monotonic() - self.last_beat - self.interval
+            if self._blocking_stack is None and stalled > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._blocking_stack = "\n".join(
+                        f"  {label}" for label in collapse_stack(frame).split(";")[-12:]
+                    )
+
+
+def start_loop_monitor(threshold: float = LOOP_LAG_THRESHOLD) -> Optional[LoopLagMonitor]:
+    if threshold <= 0:
+        return None
+    return LoopLagMonitor(threshold).start()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Normalize stored complaints into the MunicipalAssistant service_codes taxonomy.
+
+Complaints are read from the complaint store (COMPLAINT_DB) with store.scan(), one batch at a
+time. Complaints whose type is already canonical, a known alias or a close spelling are resolved
+locally; the rest are sent to Gemini in batches with bounded concurrency and a request-rate limit.
+
+Each result is written back onto its complaint as service_type / service_code / classified,
+in batched store transactions; the caller's original type is left as it is. The store is the
+checkpoint: complaints that already carry a classification are skipped, so a run stopped at
+the end of its window (or killed) resumes where it left off.
+
+    python reclassify_complaints.py --db complaints.db
+    python reclassify_complaints.py --synthetic 50000 --mock
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import difflib
+import argparse
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from complaint_store import COMPLAINT_DB, SCAN_BATCH_SIZE, is_sharded, open_store
+from complaints import MunicipalAssistant
+
+logger = logging.getLogger("municipal-agent")
+
+SERVICE_CODES = MunicipalAssistant().service_codes
+UNKNOWN = "unknown"
+# Classifications written back per store transaction
+WRITE_BATCH = 500
+
+# Spellings and Hindi/Hinglish words callers and the LLM commonly produce for each service
+ALIASES = {
+    "property tax": ["tax", "house tax", "property", "sampatti kar", "संपत्ति कर"],
+    "water supply": ["water", "paani", "pani", "no water", "water leakage", "pipeline", "पानी", "jal"],
+    "waste management": ["waste", "dump", "dumping", "landfill"],
+    # "bijli" is electricity in general (supply, bills, wiring), so it is left to the model
+    "street light": ["streetlight", "street lights", "light", "lamp", "street lamp", "khamba", "बत्ती"],
+    "certificates": ["certificate", "birth certificate", "death certificate", "praman patra", "प्रमाण पत्र"],
+    "road issues": ["road", "pothole", "potholes", "sadak", "road repair", "सड़क"],
+    "garbage collection": ["garbage", "kachra", "trash", "rubbish", "कचरा"],
+    "drainage": ["drain", "sewer", "sewage", "naali", "nala", "gutter", "waterlogging", "नाली"],
+}
+_ALIAS_LOOKUP = {alias: service for service, aliases in ALIASES.items() for alias in aliases}
+
+PROMPT = """Classify each municipal complaint into exactly one of these services:
+{services}
+Use "unknown" only if none fits. Reply with a JSON object mapping each complaint id to a service name.
+
+Complaints:
+{complaints}"""
+
+
+def normalize_type(service_type: str) -> Optional[str]:
+    """Resolve a raw service_type locally; None means the LLM has to decide"""
+    text = re.sub(r"\s+", " ", (service_type or "").strip().lower())
+    if not text:
+        return None
+    if text in SERVICE_CODES:
+        return text
+    if text in _ALIAS_LOOKUP:
+        return _ALIAS_LOOKUP[text]
+    match = difflib.get_close_matches(text, list(SERVICE_CODES) + list(_ALIAS_LOOKUP), n=1, cutoff=0.85)
+    if match:
+        return match[0] if match[0] in SERVICE_CODES else _ALIAS_LOOKUP[match[0]]
+    return None
+
+
+def synthetic_complaints(count: int, seed: int = 7) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    rng = random.Random(seed)
+    raw_types = list(SERVICE_CODES) + list(_ALIAS_LOOKUP) + ["Water Suply", "street-light", "illegal construction",
+                                                               "stray dogs", "mosquito", "tree fallen", "bijli"]
+    now = time.time()
+    for i in range(count):
+        service_type = rng.choice(raw_types)
+        yield f"{service_type[:2].upper()}20240101-{i:06d}", {
+            "type": service_type,
+            "description": f"{service_type} problem reported near house {rng.randint(1, 500)}",
+            "location": f"Sector {rng.randint(1, 40)}",
+            "status": "submitted",
+            "timestamp": now - count + i,
+            "worker": 0,
+        }
+
+
+def seed_store(store, count: int):
+    batch = []
+    for item in synthetic_complaints(count):
+        batch.append(item)
+        if len(batch) >= WRITE_BATCH:
+            _add_batch(store, batch)
+            batch = []
+    _add_batch(store, batch)
+    if hasattr(store, "flush"):
+        store.flush()
+
+
+def _add_batch(store, batch):
+    if hasattr(store, "add_many"):
+        store.add_many(batch)
+    else:
+        for complaint_id, record in batch:
+            store.add(complaint_id, record)
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GeminiClassifier:
+    """One generateContent request per batch, answered as JSON"""
+
+    def __init__(self, model_name: str, endpoint: Optional[str] = None):
+        import google.generativeai as genai
+
+        if endpoint:
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY", "mock"), transport="rest",
+                            client_options={"api_endpoint": endpoint})
+        else:
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        self.model = genai.GenerativeModel(
+            model_name,
+            generation_config=genai.types.GenerationConfig(temperature=0.0, max_output_tokens=2048),
+        )
+        self.rest = bool(endpoint)
+
+    async def classify(self, batch: List[Dict[str, Any]]) -> Dict[str, str]:
+        prompt = PROMPT.format(
+            services=", ".join(SERVICE_CODES),
+            complaints="\n".join(
+                json.dumps({"id": c["id"], "type": c.get("type"), "description": c.get("description")},
+                           ensure_ascii=False)
+                for c in batch
+            ),
+        )
+        request_options = {"timeout": 60, "retry": None}
+        if self.rest:
+            # The REST transport has no async client
+            response = await asyncio.get_event_loop().run_in_executor(
+                None, lambda: self.model.generate_content(prompt, request_options=request_options)
+            )
+        else:
+            response = await self.model.generate_content_async(prompt, request_options=request_options)
+        return parse_labels(response.text)
+
+
+class MockClassifier:
+    """Offline stand-in: keyword matching on the description, with model-like latency"""
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+
+    async def classify(self, batch: List[Dict[str, Any]]) -> Dict[str, str]:
+        await asyncio.sleep(self.latency)
+        labels = {}
+        for complaint in batch:
+            words = f"{complaint.get('type', '')} {complaint.get('description', '')}".lower()
+            labels[complaint["id"]] = next(
+                (service for alias, service in _ALIAS_LOOKUP.items() if alias in words),
+                next((service for service in SERVICE_CODES if service in words), UNKNOWN),
+            )
+        return labels
+
+
+def parse_labels(text: str) -> Dict[str, str]:
+    """Pull the JSON object out of a model reply, tolerating code fences"""
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if not match:
+        raise ValueError(f"No JSON object in model reply: {text[:80]!r}")
+    return {str(k): str(v).strip().lower() for k, v in json.loads(match.group(0)).items()}
+
+
+def classification(service: Optional[str], method: str) -> Dict[str, Any]:
+    """Fields written onto the complaint; "classified" also marks it done for later runs"""
+    service = service if service in SERVICE_CODES else UNKNOWN
+    return {"service_type": service, "service_code": SERVICE_CODES.get(service), "classified": method}
+
+
+async def run_pipeline(store, classifier, batch_size: int, concurrency: int, rate: float,
+                       deadline: Optional[float], max_retries: int = 3, scan_batch: int = SCAN_BATCH_SIZE):
+    stats = {"skipped": 0, "local": 0, "llm": 0, "unknown": 0, "failed_batches": 0, "batches": 0}
+    limiter = RateLimiter(rate, burst=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    pending: set = set()
+    local_updates: List[Tuple[str, Dict[str, Any]]] = []
+
+    async def write(updates: List[Tuple[str, Dict[str, Any]]]):
+        # One transaction per batch, off the event loop: the store may wait on a busy agent worker
+        await asyncio.to_thread(store.update_many, updates)
+        for _, fields in updates:
+            stats["unknown" if fields["service_type"] == UNKNOWN else
+                  ("llm" if fields["classified"] == "llm" else "local")] += 1
+
+    async def classify_batch(batch):
+        try:
+            for attempt in range(max_retries + 1):
+                await limiter.acquire()
+                try:
+                    labels = await classifier.classify(batch)
+                    break
+                except Exception as e:
+                    if attempt == max_retries:
+                        # Left unclassified in the store, so the next run retries these
+                        stats["failed_batches"] += 1
+                        logger.error(f"Batch of {len(batch)} failed after {attempt + 1} attempts: {e}")
+                        return
+                    await asyncio.sleep(min(2 ** attempt, 30))
+            stats["batches"] += 1
+            updates = []
+            for complaint in batch:
+                label = labels.get(complaint["id"], UNKNOWN)
+                updates.append((complaint["id"], classification(normalize_type(label) or label, "llm")))
+            await write(updates)
+        finally:
+            semaphore.release()
+
+    batch: List[Dict[str, Any]] = []
+    stopped = False
+    try:
+        for complaint_id, record in store.scan(batch_size=scan_batch):
+            if deadline and time.monotonic() > deadline:
+                stopped = True
+                break
+            if record.get("classified"):
+                stats["skipped"] += 1
+                continue
+            local = normalize_type(record.get("type", ""))
+            if local:
+                local_updates.append((complaint_id, classification(local, "local")))
+                if len(local_updates) >= WRITE_BATCH:
+                    await write(local_updates)
+                    local_updates = []
+                continue
+            batch.append({"id": complaint_id, **record})
+            if len(batch) >= batch_size:
+                # Backpressure: the reader waits instead of buffering the whole store
+                await semaphore.acquire()
+                pending.add(asyncio.create_task(classify_batch(batch)))
+                pending = {task for task in pending if not task.done()}
+                batch = []
+        if batch and not stopped:
+            await semaphore.acquire()
+            pending.add(asyncio.create_task(classify_batch(batch)))
+        if pending:
+            await asyncio.gather(*pending)
+    finally:
+        if local_updates:
+            await write(local_updates)
+    stats["stopped_at_deadline"] = stopped
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-classify stored complaints into service codes")
+    parser.add_argument("--db", default=COMPLAINT_DB, help="Complaint store (default: COMPLAINT_DB)")
+    parser.add_argument("--synthetic", type=int,
+                        help="Add this many synthetic complaints to the store first (an in-memory one without --db)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Complaints per LLM request")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM requests in flight")
+    parser.add_argument("--rate", type=float, default=5.0, help="LLM requests per second")
+    parser.add_argument("--model", default="gemini-1.5-flash")
+    parser.add_argument("--endpoint", help="Gemini endpoint override, e.g. the local mock server")
+    parser.add_argument("--mock", action="store_true", help="Classify offline with the keyword mock model")
+    parser.add_argument("--mock-latency", type=float, default=0.2)
+    parser.add_argument("--window-minutes", type=float, help="Stop taking new work after this long; resume later")
+    args = parser.parse_args()
+
+    if not args.db and not args.synthetic:
+        parser.error("give --db or set COMPLAINT_DB; the in-memory store lives only inside the agent worker")
+    if args.db and not args.synthetic and not (os.path.exists(args.db) or is_sharded(args.db)):
+        parser.error(f"no complaint store at {args.db}")
+    logging.basicConfig(level=logging.WARNING)
+
+    # A sharded store reads its shard count from its own layout
+    store = open_store(args.db, shards=1)
+    if args.synthetic:
+        seed_store(store, args.synthetic)
+    classifier = MockClassifier(args.mock_latency) if args.mock else GeminiClassifier(args.model, args.endpoint)
+    deadline = time.monotonic() + args.window_minutes * 60 if args.window_minutes else None
+
+    print(f"🏷️  Re-classifying complaints in {args.db or 'memory'} into {len(SERVICE_CODES)} service codes")
+    start = time.perf_counter()
+    stats = asyncio.run(run_pipeline(store, classifier, args.batch_size, args.concurrency, args.rate, deadline))
+    elapsed = time.perf_counter() - start
+    processed = stats["local"] + stats["llm"] + stats["unknown"]
+
+    print("=" * 60)
+    print(f"Resolved locally: {stats['local']}  by LLM: {stats['llm']}  unknown: {stats['unknown']}")
+    print(f"Skipped (already classified): {stats['skipped']}  LLM batches: {stats['batches']}  "
+          f"failed batches: {stats['failed_batches']}")
+    print(f"Elapsed: {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.0f} complaints/s)")
+    if stats["stopped_at_deadline"]:
+        print("⏸️  Stopped at the end of the window; run again to resume")
+    elif stats["failed_batches"]:
+        print("⚠️  Some batches failed; run again to retry them")
+    else:
+        print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Replay recorded call transcripts through GeminiLLM and MunicipalAssistant against the mock Gemini server.
+
+Corpus format (JSONL, one conversation per line):
+
+    {"id": "call-001", "turns": [
+        {"user": "mere ghar mein paani nahi aa raha"},
+        {"user": "Sector 15, Gandhinagar", "complaint": {"service_type": "water supply",
+            "description": "No water for 2 days", "location": "Sector 15, Gandhinagar"}}
+    ]}
+
+A turn's "complaint" is the complaint the live call filed at that point.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_gemini_server import MockConfig, start_mock_server
+from model_registry import GEMINI_MODEL
+
+SAMPLE_CORPUS = [
+    {"id": "sample-water", "turns": [
+        {"user": "mere ghar mein do din se paani nahi aa raha"},
+        {"user": "Sector 15, Gandhinagar", "complaint": {
+            "service_type": "water supply", "description": "No water for 2 days",
+            "location": "Sector 15, Gandhinagar"}},
+    ]},
+    {"id": "sample-streetlight", "turns": [
+        {"user": "The streetlight outside my house has been off for a week."},
+        {"user": "It is near the temple on MG Road.", "complaint": {
+            "service_type": "street light", "description": "Streetlight off for a week",
+            "location": "MG Road, near temple"}},
+        {"user": "Thank you."},
+    ]},
+]
+
+
+def load_corpus(path):
+    if not path:
+        return SAMPLE_CORPUS
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+async def replay_conversation(conversation, model_name, results, assistant):
+    from livekit.agents import llm
+    from municipal_agent import FALLBACK_REPLY, GeminiLLM
+
+    gemini = GeminiLLM(model_name=model_name)
+    history = []
+    for turn in conversation["turns"]:
+        history.append(llm.ChatMessage(role="user", content=[turn["user"]]))
+        start = time.perf_counter()
+        first_token = None
+        parts = []
+        stream = await gemini.chat(history)
+        async for chunk in stream.stream():
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            parts.append(chunk.text_content)
+        reply = "".join(parts)
+        history.append(llm.ChatMessage(role="assistant", content=[reply]))
+
+        results["turns"].append({
+            "conversation": conversation["id"],
+            "first_token": first_token or 0.0,
+            "total": time.perf_counter() - start,
+            "fallback": reply == FALLBACK_REPLY,
+        })
+        if turn.get("complaint"):
+            complaint = turn["complaint"]
+            results["complaints"].append(assistant.submit_complaint(
+                complaint["service_type"], complaint["description"], complaint["location"]
+            ))
+
+    for key, value in gemini.stats.items():
+        results["llm"][key] = results["llm"].get(key, 0) + value
+
+
+async def run_replay(corpus, model_name, concurrency):
+    from complaints import MunicipalAssistant
+
+    assistant = MunicipalAssistant()
+    results = {"turns": [], "complaints": [], "llm": {}}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(conversation):
+        async with semaphore:
+            await replay_conversation(conversation, model_name, results, assistant)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(conversation) for conversation in corpus))
+    results["elapsed"] = time.perf_counter() - start
+    return results
+
+
+def summarize(corpus, results, mock_stats):
+    first = [t["first_token"] * 1000 for t in results["turns"]]
+    total = [t["total"] * 1000 for t in results["turns"]]
+    return {
+        "conversations": len(corpus),
+        "turns": len(results["turns"]),
+        "first_token_p50_ms": round(percentile(first, 50), 1),
+        "first_token_p95_ms": round(percentile(first, 95), 1),
+        "turn_p50_ms": round(percentile(total, 50), 1),
+        "turn_p95_ms": round(percentile(total, 95), 1),
+        "retries": results["llm"].get("retries", 0),
+        "fallbacks": sum(1 for t in results["turns"] if t["fallback"]),
+        "complaints_created": len(results["complaints"]),
+        "elapsed_s": round(results["elapsed"], 2),
+        "mock": mock_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay call transcripts against a local Gemini mock")
+    parser.add_argument("corpus", nargs="?", help="JSONL corpus (defaults to a built-in sample)")
+    parser.add_argument("--endpoint", help="Use an already running mock instead of starting one")
+    parser.add_argument("--mode", choices=["canned", "replay"], default="canned")
+    parser.add_argument("--cassette", help="Cassette for replay mode")
+    parser.add_argument("--responses", help="Canned response rules JSON")
+    parser.add_argument("--model", default=GEMINI_MODEL)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--first-chunk-ms", type=float, default=300)
+    parser.add_argument("--chunk-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    server = None
+    if args.endpoint:
+        endpoint = args.endpoint
+    else:
+        responses = {}
+        if args.responses:
+            with open(args.responses) as f:
+                responses = json.load(f)
+        config = MockConfig(
+            rules=responses.get("rules"),
+            first_chunk_ms=args.first_chunk_ms,
+            chunk_ms=args.chunk_ms,
+            error_rate=args.error_rate,
+            mode=args.mode,
+            cassette=args.cassette,
+            **({"default_reply": responses["default"]} if "default" in responses else {}),
+        )
+        server = start_mock_server(0, config)
+        endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Must be set before municipal_agent configures the Gemini client
+    os.environ["GEMINI_API_ENDPOINT"] = endpoint
+    os.environ.setdefault("GEMINI_API_KEY", "replay")
+    os.environ.setdefault("METRICS_PORT", "0")
+    logging.getLogger("municipal-agent").setLevel(logging.WARNING)
+
+    results = asyncio.run(run_replay(corpus, args.model, args.concurrency))
+    mock_stats = dict(server.RequestHandlerClass.config.stats) if server else {}
+    summary = summarize(corpus, results, mock_stats)
+    if server:
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"📼 Replayed {summary['conversations']} conversation(s), {summary['turns']} turn(s) via {endpoint}")
+    print("=" * 60)
+    print(f"First token: p50 {summary['first_token_p50_ms']}ms  p95 {summary['first_token_p95_ms']}ms")
+    print(f"Full turn:   p50 {summary['turn_p50_ms']}ms  p95 {summary['turn_p95_ms']}ms")
+    print(f"Retries: {summary['retries']}  Fallbacks: {summary['fallbacks']}  "
+          f"Complaints created: {summary['complaints_created']}")
+    print(f"Elapsed: {summary['elapsed_s']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -8,8 +7,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 load_dotenv()
 
-async def run_agent():
-    """Run the municipal agent"""
+# sysexits' EX_CONFIG: the supervisor does not restart a worker that exits with it
+EXIT_CONFIG = getattr(os, "EX_CONFIG", 78)
+
+def run_agent() -> int:
+    """Run the municipal agent; returns the process exit code"""
     print("🚀 Starting Municipal Voice AI Agent...")
     
     # Check if required environment variables are set
@@ -26,21 +28,25 @@ async def run_agent():
     if missing_vars:
         print(f"❌ Missing environment variables: {', '.join(missing_vars)}")
         print("   Please check your .env file")
-        return
+        return EXIT_CONFIG
     
     print("✅ All required environment variables are set")
     print(f"🔗 LiveKit URL: {os.getenv('LIVEKIT_URL')}")
     
     try:
-        from municipal_agent import entrypoint
-        from livekit.agents import WorkerOptions, cli
+        from municipal_agent import create_server
+        from profiling import install_signal_trigger
+        from livekit.agents import cli
         
         # Run the agent in development mode
         print("📞 Agent is running. Press Ctrl+C to stop.")
         print("   You can now connect clients to room: municipal-support")
         
-        # This will run until interrupted
-        cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+        # `kill -USR1 <pid>` writes a flamegraph profile of the whole worker
+        install_signal_trigger()
+        
+        # Runs LiveKit's own event loop until interrupted, so this must not be called from inside one
+        cli.run_app(create_server())
         
     except KeyboardInterrupt:
         print("\n🛑 Agent stopped by user")
@@ -48,6 +54,8 @@ async def run_agent():
         print(f"❌ Failed to start agent: {e}")
         import traceback
         traceback.print_exc()
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    asyncio.run(run_agent())
\ No newline at end of file
+    sys.exit(run_agent())
\ No newline at end of file
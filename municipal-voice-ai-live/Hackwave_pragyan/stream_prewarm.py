@@ -0,0 +1,240 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("municipal-agent")
+
+# Eager connect is on by default; set EAGER_CONNECT=0 to fall back to lazy connections
+EAGER_CONNECT = os.getenv("EAGER_CONNECT", "1").lower() not in ("0", "false", "no")
+KEEPALIVE_INTERVAL = float(os.getenv("STREAM_KEEPALIVE_INTERVAL", "5.0"))
+CONNECT_TIMEOUT = float(os.getenv("STREAM_CONNECT_TIMEOUT", "10.0"))
+MAX_RECYCLE_DELAY = 30.0
+
+
+class ConnectTimings:
+    """Wall-clock time spent in each connect stage of a job"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    async def measure(self, stage: str, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.stages[stage] = time.perf_counter() - start
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = seconds
+
+    def total(self) -> float:
+        return time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict[str, float]:
+        return {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}
+
+    def log(self):
+        parts = ", ".join(f"{stage}={ms}ms" for stage, ms in self.as_dict().items())
+        logger.info(f"Connect timings: {parts} (total {self.total() * 1000:.1f}ms)")
+
+
+def _handshake_done(stream) -> Optional[asyncio.Future]:
+    """Future resolved when the provider stream's websocket is up, if the stream exposes its connect step"""
+    inner = getattr(stream, "_stream", stream)  # unwrap the circuit-breaker proxy
+    connect_ws = getattr(inner, "_connect_ws", None)
+    if connect_ws is None:
+        return None
+    done = asyncio.get_running_loop().create_future()
+
+    async def connect_and_signal(*args, **kwargs):
+        try:
+            ws = await connect_ws(*args, **kwargs)
+        except Exception as e:
+            if not done.done():
+                done.set_exception(e)
+            raise
+        if not done.done():
+            done.set_result(None)
+        return ws
+
+    # The stream's task has been created but not run yet, so its first connect goes through here
+    inner._connect_ws = connect_and_signal
+    return done
+
+
+class WarmStream:
+    """A provider stream opened ahead of first use, kept alive while idle and handed to the session once"""
+
+    def __init__(
+        self,
+        name: str,
+        open_stream: Callable[[], Any],
+        keepalive: Optional[Callable[[Any], None]] = None,
+        keepalive_interval: float = KEEPALIVE_INTERVAL,
+    ):
+        self.name = name
+        self.stream = None
+        self.connect_seconds: Optional[float] = None
+        self.recycles = 0
+        self._open_stream = open_stream
+        self._keepalive = keepalive
+        self._keepalive_interval = keepalive_interval
+        self._supervisor: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._first_event: Optional[asyncio.Future] = None
+        self._closed = False
+
+    async def connect(self) -> float:
+        """Open the stream and wait for the provider handshake (or its first event); returns seconds taken"""
+        start = time.perf_counter()
+        self.stream = self._open_stream()
+        handshake = _handshake_done(self.stream)
+        self._first_event = asyncio.get_running_loop().create_future()
+        self._supervisor = asyncio.create_task(self._supervise())
+        waiters = [w for w in (handshake, self._first_event) if w is not None]
+        try:
+            done, _ = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Only the first signal counts; later ones (or failures after a timeout) go unobserved
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.cancel()
+        for waiter in done:
+            if waiter.exception():
+                raise waiter.exception()
+        self.connect_seconds = time.perf_counter() - start
+        logger.info(f"{self.name} stream pre-connected in {self.connect_seconds * 1000:.1f}ms")
+        return self.connect_seconds
+
+    def take(self):
+        """Hand the warm stream to the session; it is not replaced, so no spare connection stays open"""
+        stream = self.stream
+        self.stream = None
+        self._closed = True
+        # Stop idle draining now, before the session's first read, so no event is swallowed
+        for task in (self._watcher, self._supervisor):
+            if task:
+                task.cancel()
+        self._watcher = self._supervisor = None
+        return stream
+
+    async def _supervise(self):
+        delay = 1.0
+        while not self._closed:
+            self._watcher = watcher = asyncio.create_task(self._drain(self.stream))
+            try:
+                while not watcher.done():
+                    done, _ = await asyncio.wait({watcher}, timeout=self._keepalive_interval)
+                    if not done and self._keepalive:
+                        self._keepalive(self.stream)
+                if watcher.exception():
+                    raise watcher.exception()
+                delay = 1.0
+            except asyncio.CancelledError:
+                watcher.cancel()
+                raise
+            except Exception as e:
+                watcher.cancel()
+                if self._first_event and not self._first_event.done():
+                    self._first_event.set_exception(e)
+                logger.warning(f"{self.name} warm stream failed, recycling in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECYCLE_DELAY)
+
+            if self._closed:
+                break
+            await self._close_stream(self.stream)
+            self.recycles += 1
+            self.stream = self._open_stream()
+
+    async def _drain(self, stream):
+        # Idle streams should produce nothing; iterating surfaces connection errors
+        async for _ in stream:
+            if self._first_event and not self._first_event.done():
+                self._first_event.set_result(None)
+
+    @staticmethod
+    async def _close_stream(stream):
+        if stream is None:
+            return
+        try:
+            await stream.aclose()
+        except Exception as e:
+            logger.debug(f"Error closing warm stream: {e}")
+
+    async def aclose(self):
+        """Close the stream if the session never took it"""
+        self._closed = True
+        if self._supervisor:
+            self._supervisor.cancel()
+            self._supervisor = None
+        await self._close_stream(self.stream)
+        self.stream = None
+
+
+def _push_silence(stream, sample_rate: int = 16000, duration_ms: int = 20):
+    from livekit import rtc
+
+    samples = sample_rate * duration_ms // 1000
+    stream.push_frame(rtc.AudioFrame(
+        data=bytes(samples * 2),
+        sample_rate=sample_rate,
+        num_channels=1,
+        samples_per_channel=samples,
+    ))
+
+
+class StreamPrewarmer:
+    """Connects STT and TTS in parallel with the room, and gives the session the connected STT stream"""
+
+    def __init__(self, stt, tts, timings: Optional[ConnectTimings] = None):
+        self.timings = timings or ConnectTimings()
+        self.stt = WarmStream("STT", stt.stream, keepalive=_push_silence)
+        self._tts_provider = tts
+        self._hand_off(stt)
+
+    def _hand_off(self, stt):
+        """The session's first stt.stream() gets the warm stream instead of opening a new one"""
+        open_stream = stt.stream
+
+        def stream(*args, **kwargs):
+            stt.stream = open_stream
+            warm = self.stt.take()
+            if warm is not None:
+                # Opened with the default connect options rather than the session's; only retries differ
+                logger.info("STT session using the pre-connected stream")
+                return warm
+            return open_stream(*args, **kwargs)
+
+        stt.stream = stream
+
+    async def _connect_tts(self):
+        # ElevenLabs pools one websocket per TTS instance and every synthesis stream reuses it,
+        # so warming that connection is enough; an idle SynthesizeStream would add nothing
+        self._tts_provider.prewarm()
+        current_connection = getattr(self._tts_provider, "_current_connection", None)
+        if current_connection is not None:
+            # Waits on the provider's connection lock, i.e. for the prewarm handshake to finish
+            await current_connection()
+
+    async def _connect_stage(self, stage: str, connect):
+        try:
+            await self.timings.measure(stage, asyncio.wait_for(connect, CONNECT_TIMEOUT))
+        except Exception as e:
+            # A failed pre-connect is not fatal; the session will connect lazily instead
+            logger.warning(f"Eager {stage} connect failed: {e}")
+
+    async def connect_with(self, room_connect):
+        """Run the room connection and both provider handshakes concurrently"""
+        await asyncio.gather(
+            self.timings.measure("room", room_connect),
+            self._connect_stage("stt", self.stt.connect()),
+            self._connect_stage("tts", self._connect_tts()),
+        )
+        self.timings.log()
+
+    async def aclose(self):
+        await self.stt.aclose()
@@ -0,0 +1,319 @@
+"""
+Start every service in parallel, wait on real readiness probes, and keep them running.
+
+    python supervisor.py                     # token server, voice agent, web interface
+    python supervisor.py --only token,web    # without the voice agent
+    python supervisor.py --production        # AGENT_WORKERS agents sharing COMPLAINT_DB, token server on gunicorn
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+import subprocess
+import webbrowser
+import urllib.request
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+READY_TIMEOUT = float(os.getenv("SUPERVISOR_READY_TIMEOUT", "60"))
+RESTART_BACKOFF = float(os.getenv("SUPERVISOR_RESTART_BACKOFF", "1"))
+RESTART_BACKOFF_MAX = float(os.getenv("SUPERVISOR_RESTART_BACKOFF_MAX", "60"))
+# A child that stays up this long after becoming ready resets its backoff
+STABLE_SECONDS = float(os.getenv("SUPERVISOR_STABLE_SECONDS", "30"))
+SHUTDOWN_GRACE = float(os.getenv("SUPERVISOR_SHUTDOWN_GRACE", "10"))
+# Stop restarting a child that has exited this many times in a row without becoming ready
+MAX_START_FAILURES = int(os.getenv("SUPERVISOR_MAX_START_FAILURES", "5"))
+# Exit code for a configuration error (sysexits' EX_CONFIG); restarting cannot fix those
+EXIT_CONFIG = getattr(os, "EX_CONFIG", 78)
+
+# Deployment mode: "production" runs one agent worker per core and the token server on gunicorn
+DEPLOY_MODE = os.getenv("DEPLOY_MODE", "dev")
+CPU_COUNT = os.cpu_count() or 1
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "0"))
+# Pin agent worker i to core i (Linux only); keeps each worker's caches and loop on one core
+AGENT_CPU_PIN = os.getenv("AGENT_CPU_PIN", "0") == "1"
+AGENT_HTTP_PORT = int(os.getenv("AGENT_HTTP_PORT", "8081"))
+TOKEN_SERVER_WORKERS = int(os.getenv("TOKEN_SERVER_WORKERS", str(2 * CPU_COUNT + 1)))
+TOKEN_SERVER_BIND = os.getenv("TOKEN_SERVER_BIND", "0.0.0.0:5000")
+# Workers share complaints (and unique IDs) through this SQLite file in production
+DEFAULT_COMPLAINT_DB = os.path.join(HERE, "complaints.db")
+
+
+def http_probe(url: str) -> Callable[[], bool]:
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                return response.status == 200
+        except Exception:
+            return False
+    return probe
+
+
+@dataclass
+class Service:
+    name: str
+    command: List[str]
+    probe: Callable[[], bool]
+    url: str = ""
+    depends_on: List[str] = field(default_factory=list)
+    env: Dict[str, str] = field(default_factory=dict)
+    cpus: Optional[List[int]] = None
+
+
+def default_services() -> List[Service]:
+    python = sys.executable
+    return [
+        Service("token", [python, "token_server.py"], http_probe("http://localhost:5000/health"),
+                url="http://localhost:5000", env={"FLASK_DEBUG": "0"}),
+        # Ready once LiveKit has registered the worker, not merely when the process is up
+        Service("agent", [python, "run_agent.py", "start"], http_probe(f"http://localhost:{METRICS_PORT}/ready"),
+                url=f"http://localhost:{METRICS_PORT}/dashboard"),
+        Service("web", [python, "-m", "streamlit", "run", "app.py", "--server.headless", "true"],
+                http_probe("http://localhost:8501/_stcore/health"), url="http://localhost:8501"),
+    ]
+
+
+def production_services(workers: int, pin: bool) -> List[Service]:
+    """N agent workers on their own ports sharing one complaint store, the token server on gunicorn"""
+    python = sys.executable
+    complaint_db = os.getenv("COMPLAINT_DB") or DEFAULT_COMPLAINT_DB
+    services = []
+
+    if importlib.util.find_spec("gunicorn"):
+        token_command = [python, "-m", "gunicorn", "--workers", str(TOKEN_SERVER_WORKERS),
+                         "--bind", TOKEN_SERVER_BIND, "token_server:app"]
+    else:
+        print("⚠️  gunicorn not installed (pip install gunicorn); token server falls back to the Flask server")
+        token_command = [python, "token_server.py"]
+    port = TOKEN_SERVER_BIND.rsplit(":", 1)[1]
+    services.append(Service("token", token_command, http_probe(f"http://localhost:{port}/health"),
+                            url=f"http://localhost:{port}", env={"FLASK_DEBUG": "0"}))
+
+    dashboards, feeds = [], []
+    for index in range(workers):
+        metrics_port = METRICS_PORT + index
+        services.append(Service(
+            f"agent-{index}", [python, "run_agent.py", "start"],
+            http_probe(f"http://localhost:{metrics_port}/ready"),
+            url=f"http://localhost:{metrics_port}/dashboard",
+            env={
+                "AGENT_WORKER_INDEX": str(index),
+                "METRICS_PORT": str(metrics_port),
+                "AGENT_HTTP_PORT": str(AGENT_HTTP_PORT + index),
+                "COMPLAINT_DB": complaint_db,
+            },
+            cpus=[index % CPU_COUNT] if pin else None,
+        ))
+        dashboards.append(f"http://localhost:{metrics_port}/dashboard")
+        feeds.append(f"http://localhost:{metrics_port}/events")
+
+    services.append(Service(
+        "web", [python, "-m", "streamlit", "run", "app.py", "--server.headless", "true"],
+        http_probe("http://localhost:8501/_stcore/health"), url="http://localhost:8501",
+        # The dashboard sums every worker's counters and follows every worker's feed
+        env={"DASHBOARD_URL": ",".join(dashboards), "COMPLAINT_FEED_URL": ",".join(feeds)},
+    ))
+    return services
+
+
+class Supervised:
+    """One child process: start after dependencies, probe until ready, restart with backoff when it dies"""
+
+    def __init__(self, service: Service, supervisor: "Supervisor"):
+        self.service = service
+        self.supervisor = supervisor
+        self.process: Optional[subprocess.Popen] = None
+        self.ready = threading.Event()
+        self.time_to_ready: Optional[float] = None
+        self.restarts = 0
+        self.failure: Optional[str] = None
+
+    def spawn(self) -> bool:
+        env = {**os.environ, **self.service.env}
+        # Checked under the lock so a restart cannot slip in after shutdown has signalled the children
+        with self.supervisor.lock:
+            if self.supervisor.stopping.is_set():
+                return False
+            # Own process group so shutdown reaches grandchildren (reloaders, job processes)
+            self.process = subprocess.Popen(self.service.command, cwd=HERE, env=env, start_new_session=True)
+        if self.service.cpus and hasattr(os, "sched_setaffinity"):
+            # Threads and processes the worker starts later inherit the mask
+            os.sched_setaffinity(self.process.pid, self.service.cpus)
+        return True
+
+    def wait_ready(self, started: float) -> bool:
+        delay = 0.05
+        deadline = started + READY_TIMEOUT
+        while not self.supervisor.stopping.is_set():
+            if self.process.poll() is not None:
+                return False
+            if self.service.probe():
+                self.time_to_ready = time.monotonic() - started
+                self.ready.set()
+                return True
+            if time.monotonic() > deadline:
+                print(f"⚠️  {self.service.name} not ready after {READY_TIMEOUT:g}s; still waiting")
+                deadline = float("inf")
+            self.supervisor.stopping.wait(delay)
+            delay = min(delay * 2, 0.5)
+        return False
+
+    def run(self):
+        for dependency in self.service.depends_on:
+            self.supervisor.children[dependency].ready.wait()
+        failures = 0
+        start_failures = 0
+        while not self.supervisor.stopping.is_set():
+            started = time.monotonic()
+            if not self.spawn():
+                return
+            if self.wait_ready(started):
+                print(f"✅ {self.service.name} ready in {self.time_to_ready:.2f}s"
+                      + (f" (restart {self.restarts})" if self.restarts else ""))
+            code = self.process.wait()
+            self.ready.clear()
+            if self.supervisor.stopping.is_set():
+                return
+            if code == EXIT_CONFIG:
+                self.give_up(f"exited with a configuration error (code {code})")
+                return
+            start_failures = start_failures + 1 if self.time_to_ready is None else 0
+            if start_failures >= MAX_START_FAILURES:
+                self.give_up(f"exited {start_failures} times in a row without becoming ready (last code {code})")
+                return
+            if self.time_to_ready is not None and time.monotonic() - started - self.time_to_ready >= STABLE_SECONDS:
+                failures = 0
+            delay = min(RESTART_BACKOFF * 2 ** failures, RESTART_BACKOFF_MAX)
+            failures += 1
+            self.restarts += 1
+            self.time_to_ready = None
+            print(f"❌ {self.service.name} exited with code {code}; restarting in {delay:g}s")
+            self.supervisor.stopping.wait(delay)
+
+    def give_up(self, reason: str):
+        self.failure = reason
+        print(f"❌ {self.service.name} {reason}; not restarting it")
+        self.supervisor.fail()
+
+    def terminate(self):
+        if self.process is not None and self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+class Supervisor:
+    def __init__(self, services: List[Service]):
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.children: Dict[str, Supervised] = {service.name: Supervised(service, self) for service in services}
+        self.threads: List[threading.Thread] = []
+        self.failed = threading.Event()
+
+    def fail(self):
+        """A child cannot be kept running; stop the rest instead of serving without it"""
+        self.failed.set()
+        self.stopping.set()
+
+    def start(self) -> float:
+        """Start everything at once (dependencies permitting) and block until all are ready"""
+        started = time.monotonic()
+        for child in self.children.values():
+            thread = threading.Thread(target=child.run, name=f"supervise-{child.service.name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        for child in self.children.values():
+            while not child.ready.wait(0.2):
+                if self.stopping.is_set():
+                    return time.monotonic() - started
+        return time.monotonic() - started
+
+    def shutdown(self):
+        with self.lock:
+            self.stopping.set()
+            for child in self.children.values():
+                child.terminate()
+        deadline = time.monotonic() + SHUTDOWN_GRACE
+        for child in self.children.values():
+            if child.process is None:
+                continue
+            try:
+                child.process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                print(f"⚠️  {child.service.name} did not stop within {SHUTDOWN_GRACE:g}s; killing")
+                child.kill()
+                child.process.wait()
+        for thread in self.threads:
+            thread.join(timeout=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start and supervise the municipal voice AI services")
+    parser.add_argument("--only", help="Comma-separated subset of services: token,agent,web")
+    parser.add_argument("--production", action="store_true", default=DEPLOY_MODE == "production",
+                        help="Multi-core mode (or DEPLOY_MODE=production)")
+    parser.add_argument("--workers", type=int, default=AGENT_WORKERS or CPU_COUNT,
+                        help="Agent workers in production mode (AGENT_WORKERS, default: one per core)")
+    parser.add_argument("--pin", action="store_true", default=AGENT_CPU_PIN,
+                        help="Pin each agent worker to its own core (AGENT_CPU_PIN=1)")
+    parser.add_argument("--no-browser", action="store_true", help="Do not open the web interface")
+    args = parser.parse_args()
+
+    print("🏛️ Municipal Voice AI Assistant - Starting All Services")
+    print("=" * 50)
+    if not os.path.exists(os.path.join(HERE, ".env")):
+        print("⚠️  No .env file found; services will only see variables from the environment")
+
+    services = production_services(args.workers, args.pin) if args.production else default_services()
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(",")}
+        services = [service for service in services if service.name.split("-")[0] in wanted]
+    supervisor = Supervisor(services)
+
+    # SIGTERM (e.g. from systemd or docker stop) shuts down like Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: supervisor.stopping.set())
+    try:
+        cold_start = supervisor.start()
+        if not supervisor.stopping.is_set():
+            print("=" * 50)
+            for child in supervisor.children.values():
+                ready_in = f"{child.time_to_ready:.2f}s" if child.time_to_ready is not None else "(restarting)"
+                print(f"   {child.service.name:<6} ready in {ready_in}  {child.service.url}")
+            print(f"🚀 All services ready in {cold_start:.2f}s")
+            if "web" in supervisor.children and not args.no_browser:
+                webbrowser.open(supervisor.children["web"].service.url)
+            print("\n Press Ctrl+C to stop all services")
+        while not supervisor.stopping.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    print("\n🛑 Stopping all services...")
+    supervisor.shutdown()
+    if supervisor.failed.is_set():
+        failed = [child.service.name for child in supervisor.children.values() if child.failure]
+        print(f"❌ Stopped because {', '.join(failed)} could not be kept running")
+        return 1
+    print("✅ All services stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
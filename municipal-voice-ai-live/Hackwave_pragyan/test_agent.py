@@ -105,7 +105,7 @@ async def test_complaint_system():
     """Test the complaint generation system"""
     print("🔍 Testing complaint system...")
     try:
-        from municipal_agent import MunicipalAssistant
+        from complaints import MunicipalAssistant
 
         assistant = MunicipalAssistant()
         complaint_id = assistant.submit_complaint(
@@ -130,7 +130,8 @@ async def test_agent_initialization():
     """Test if the agent can initialize properly"""
     print("🔍 Testing agent initialization...")
     try:
-        from municipal_agent import MunicipalAssistant, GeminiLLM
+        from complaints import MunicipalAssistant
+        from municipal_agent import GeminiLLM
         from livekit.plugins import deepgram, elevenlabs
         from livekit_plugins import silero  # ✅ correct silero import
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Checks that complaint_export.py's --service filter agrees with its service_code column after
+reclassify_complaints.py has re-coded a complaint, for every store type.
+
+    python test_complaint_export.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from complaint_export import export_rows
+from complaint_store import MemoryComplaintStore, ShardedComplaintStore, SQLiteComplaintStore
+
+ROUTES = ["WS", "SL", "GC", "DR"]
+
+
+def seed(store):
+    """An unclassified WS complaint, and an ad hoc "WA" one that reclassification re-coded to WS"""
+    store.add("WS20240601-0001", {'type': 'water supply', 'description': 'paani nahi', 'location': 'Ward 1',
+                                  'status': 'submitted', 'timestamp': 1717200000.0})
+    store.add("WA20240601-0001", {'type': 'water', 'description': 'paani nahi aaya', 'location': 'Ward 2',
+                                  'status': 'submitted', 'timestamp': 1717200060.0})
+    store.add("SL20240601-0001", {'type': 'street light', 'description': 'batti band', 'location': 'Ward 3',
+                                  'status': 'submitted', 'timestamp': 1717200120.0})
+    store.update_many([("WA20240601-0001", {'service_type': 'water supply', 'service_code': 'WS',
+                                            'classified': True})])
+    flush = getattr(store, "flush", None)
+    if flush:
+        flush()
+
+
+def check(store) -> bool:
+    seed(store)
+    water = [row['id'] for row in export_rows(store, service_code="WS")]
+    stale = [row['id'] for row in export_rows(store, service_code="WA")]
+    codes = {row['id']: row['service_code'] for row in export_rows(store)}
+    ok = (sorted(water) == ["WA20240601-0001", "WS20240601-0001"] and stale == []
+          and codes["WA20240601-0001"] == "WS")
+    print(f"{'✅' if ok else '❌'} {type(store).__name__}: WS -> {water}, WA -> {stale}")
+    return ok
+
+
+def test_memory_store():
+    assert check(MemoryComplaintStore())
+
+
+def test_sqlite_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert check(SQLiteComplaintStore(os.path.join(tmp, "complaints.db")))
+
+
+def test_sharded_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert check(ShardedComplaintStore(os.path.join(tmp, "complaints.db"), 2, ROUTES))
+
+
+if __name__ == "__main__":
+    print("🔍 Testing the export service filter on reclassified complaints...")
+    failed = 0
+    for test in (test_memory_store, test_sqlite_store, test_sharded_store):
+        try:
+            test()
+        except AssertionError:
+            failed += 1
+    sys.exit(1 if failed else 0)
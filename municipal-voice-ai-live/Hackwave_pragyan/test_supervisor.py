@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Smoke test: the supervisor starts the voice agent and it reaches /ready.
+
+A stand-in LiveKit server answers the worker's registration on /agent, so no LiveKit
+deployment or provider keys are needed; no call is ever dispatched to the worker.
+
+    python test_supervisor.py
+"""
+import os
+import sys
+import socket
+import asyncio
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+READY_TIMEOUT = float(os.getenv("SMOKE_READY_TIMEOUT", "60"))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_livekit(port: int) -> threading.Event:
+    """Accept agent workers on ws://127.0.0.1:<port>/agent; the event is set once one registers"""
+    from aiohttp import web
+    from livekit.protocol import agent
+
+    registered = threading.Event()
+
+    async def agent_ws(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        request_msg = agent.WorkerMessage()
+        request_msg.ParseFromString(await ws.receive_bytes())
+        if request_msg.HasField("register"):
+            response = agent.ServerMessage()
+            response.register.worker_id = "W_SMOKE"
+            response.register.server_info.version = "smoke"
+            await ws.send_bytes(response.SerializeToString())
+            registered.set()
+        # Status updates and pings until the worker goes away
+        async for _ in ws:
+            pass
+        return ws
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get("/agent", agent_ws)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), name="fake-livekit", daemon=True).start()
+    return registered
+
+
+def main() -> int:
+    print("🔍 Testing that the supervised agent worker becomes ready...")
+    livekit_port, metrics_port = free_port(), free_port()
+    # Read by supervisor at import: the /ready probe targets this port
+    os.environ["METRICS_PORT"] = str(metrics_port)
+    sys.path.append(HERE)
+    import supervisor
+
+    registered = start_fake_livekit(livekit_port)
+    service = next(service for service in supervisor.default_services() if service.name == "agent")
+    service.env.update({
+        "LIVEKIT_URL": f"ws://127.0.0.1:{livekit_port}",
+        "LIVEKIT_API_KEY": "smoke-key",
+        "LIVEKIT_API_SECRET": "smoke-secret-smoke-secret-smoke-secret",
+        # Only checked for presence; no provider is contacted before a call arrives
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY") or "smoke",
+        "DEEPGRAM_API_KEY": os.getenv("DEEPGRAM_API_KEY") or "smoke",
+        "ELEVENLABS_API_KEY": os.getenv("ELEVENLABS_API_KEY") or "smoke",
+        "AGENT_HTTP_PORT": str(free_port()),
+    })
+
+    sup = supervisor.Supervisor([service])
+    ready = threading.Thread(target=sup.start, daemon=True)
+    ready.start()
+    ready.join(READY_TIMEOUT)
+    child = sup.children["agent"]
+    try:
+        if child.ready.is_set():
+            print(f"✅ Agent registered and ready in {child.time_to_ready:.2f}s")
+            return 0
+        reason = child.failure or ("never registered" if not registered.is_set() else "/ready never answered")
+        print(f"❌ Agent not ready after {READY_TIMEOUT:g}s: {reason}")
+        return 1
+    finally:
+        sup.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-from livekit import AccessToken
-from livekit.models import VideoGrant
+from livekit import api
+from datetime import timedelta
 import os
 from dotenv import load_dotenv
 
@@ -12,18 +12,20 @@ CORS(app)  # Enable CORS for all routes
 
 def generate_token(identity: str, room: str):
     """Generate a LiveKit access token"""
-    token = access_token.AccessToken(
+    token = api.AccessToken(
         os.getenv("LIVEKIT_API_KEY"),
-        os.getenv("LIVEKIT_API_SECRET"),
-        identity=identity,
-        ttl=3600  # 1 hour expiration
-    )
+        os.getenv("LIVEKIT_API_SECRET")
+    ).with_identity(identity).with_ttl(timedelta(hours=1))  # 1 hour expiration
     
-    grant = VideoGrant(room_join=True, room=room, room_create=True)
-    token.add_grant(grant)
+    grant = api.VideoGrants(room_join=True, room=room, room_create=True)
+    token.with_grants(grant)
     
     return token.to_jwt()
 
+@app.route('/health')
+def health():
+    return jsonify({'status': 'ok'})
+
 @app.route('/token/<identity>/<room>')
 def get_token(identity, room):
     try:
@@ -33,4 +35,5 @@ def get_token(identity, room):
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # The supervisor sets FLASK_DEBUG=0: the debug reloader forks a child it cannot watch
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv("FLASK_DEBUG", "1") == "1")
\ No newline at end of file